@@ -0,0 +1,151 @@
+"""A local stand-in for the parts of the Blaise REST API that copy_cases_to_edit uses.
+
+Serves a configurable questionnaire list for each server park, so the function
+can be driven end to end without a Blaise server:
+
+    python -m benchmarks.fake_blaise_rest_api --questionnaires 50 --port 5000
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+QUESTIONNAIRES_PATH_PATTERN = re.compile(
+    r"^/api/v2/serverparks/([^/]+)/questionnaires$"
+)
+
+
+def make_questionnaire_names(survey_type: str, count: int) -> List[str]:
+    return [f"{survey_type}{2500 + number:04d}A" for number in range(count)]
+
+
+def make_questionnaires(
+    questionnaire_names: List[str], server_park: str
+) -> List[Dict[str, Any]]:
+    """Lists each questionnaire alongside its _EDIT questionnaire, as Blaise does."""
+    questionnaires = []
+    for questionnaire_name in questionnaire_names:
+        for name in (questionnaire_name, f"{questionnaire_name}_EDIT"):
+            questionnaires.append(
+                {
+                    "name": name,
+                    "serverParkName": server_park,
+                    "status": "Active",
+                }
+            )
+    return questionnaires
+
+
+class FakeBlaiseRestApi:
+    """Runs the fake REST API on a background thread until stopped."""
+
+    def __init__(
+        self,
+        questionnaires_by_server_park: Dict[str, List[Dict[str, Any]]],
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.questionnaires_by_server_park = questionnaires_by_server_park
+        self.request_count = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        """The host and port, in the form BLAISE_API_URL expects."""
+        host, port = self._server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"{host}:{port}"
+
+    def serve_forever(self) -> None:
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def start(self) -> "FakeBlaiseRestApi":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-blaise-rest-api", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeBlaiseRestApi":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def _make_handler(self):
+        fake_api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 keeps connections open, like the real REST API
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                fake_api.request_count += 1
+                match = QUESTIONNAIRES_PATH_PATTERN.match(self.path.split("?")[0])
+                if (
+                    match is None
+                    or match.group(1) not in fake_api.questionnaires_by_server_park
+                ):
+                    self.send_error(404)
+                    return
+
+                body = json.dumps(
+                    fake_api.questionnaires_by_server_park[match.group(1)]
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_) -> None:
+                # request logging would drown out the harness's own output
+                pass
+
+        return Handler
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questionnaires", type=int, default=10)
+    parser.add_argument("--survey-type", default="LMS")
+    parser.add_argument("--server-park", default="gusty")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    options = parser.parse_args(arguments)
+
+    fake_api = FakeBlaiseRestApi(
+        {
+            options.server_park: make_questionnaires(
+                make_questionnaire_names(options.survey_type, options.questionnaires),
+                options.server_park,
+            )
+        },
+        options.host,
+        options.port,
+    )
+    print(f"Serving {options.questionnaires} questionnaires on {fake_api.address}")
+    try:
+        fake_api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Reports the import cost of each module loaded on the cold-start path.
+
+Runs a fresh interpreter with ``-X importtime`` and lists the modules with the
+largest cumulative import time:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --first-request --top 30 --json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# the modules create_case_service loads when the first request arrives
+FIRST_REQUEST_MODULES = [
+    "providers.configuration_provider",
+    "services.blaise_service",
+    "services.case_service",
+    "services.database_connection_service",
+    "services.database_service",
+]
+
+
+def collect_import_times(modules: List[str]) -> List[Dict[str, Any]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=REPOSITORY_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # entries are printed after their children, so everything seen since the
+    # last top-level entry belongs to the next top-level import
+    import_times: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if not match:
+            continue
+
+        pending.append(
+            {
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": len(match.group(3)) // 2,
+            }
+        )
+        if pending[-1]["depth"] == 0:
+            if pending[-1]["module"] in modules:
+                import_times.extend(pending)
+            pending = []
+    return import_times
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--first-request",
+        action="store_true",
+        help="also import the modules loaded lazily by the first request",
+    )
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print JSON instead")
+    options = parser.parse_args(arguments)
+
+    modules = ["main"] + (FIRST_REQUEST_MODULES if options.first_request else [])
+    import_times = collect_import_times(modules)
+    top_level = [entry for entry in import_times if entry["depth"] == 0]
+    slowest = sorted(
+        import_times, key=lambda entry: entry["cumulative_ms"], reverse=True
+    )[: options.top]
+
+    report = {
+        "modules": modules,
+        "total_ms": round(sum(entry["cumulative_ms"] for entry in top_level), 3),
+        "slowest": slowest,
+    }
+    if options.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"Total import time for {', '.join(modules)}: {report['total_ms']}ms")
+    for entry in slowest:
+        print(
+            f"{entry['cumulative_ms']:>10.3f}ms cumulative "
+            f"{entry['self_ms']:>10.3f}ms self  {entry['module']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""Drives copy_cases_to_edit end to end against local stand-ins and reports its throughput.
+
+Generates questionnaires with cases in a local MySQL, of which a share have
+already been edited, serves them from a fake Blaise REST API, and invokes the
+function as a request would. Reports rows per second, per-questionnaire latency
+and peak memory for each run:
+
+    docker compose -f benchmarks/docker-compose.yml up -d
+    python -m benchmarks.load_test --questionnaires 20 --cases 5000 --edited-ratio 0.1
+    COPY_CASES_MODE=hashed python -m benchmarks.load_test --runs 3 --output load.json
+
+The DATABASE_* and COPY_CASES_* environment variables are passed through, so the
+same harness can be pointed at another database or used to compare copy settings.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+from benchmarks.fake_blaise_rest_api import (
+    FakeBlaiseRestApi,
+    make_questionnaire_names,
+    make_questionnaires,
+)
+from benchmarks.request_path import (
+    BENCHMARK_ENVIRONMENT,
+    REPOSITORY_ROOT,
+    current_commit,
+)
+
+INSERT_BATCH_SIZE = 5000
+
+
+def create_seed_engine():
+    import sqlalchemy
+
+    return sqlalchemy.create_engine(
+        sqlalchemy.URL.create(
+            drivername="mysql+pymysql",
+            username=os.environ["DATABASE_USERNAME"],
+            password=os.environ["DATABASE_PASSWORD"],
+            host=os.environ["DATABASE_IP_ADDRESS"],
+            port=int(os.environ["DATABASE_PORT"]),
+            database=os.environ["DATABASE_NAME"],
+        )
+    )
+
+
+def seed_questionnaire(
+    connection,
+    questionnaire_name: str,
+    cases: int,
+    edited_ratio: float,
+    payload_bytes: int,
+    seed: int,
+) -> int:
+    """Creates a questionnaire's tables afresh and returns how many cases are edited."""
+    from sqlalchemy import text
+
+    questionnaire_table_name = f"{questionnaire_name}_Form"
+    edit_table_name = f"{questionnaire_name}_EDIT_Form"
+    for table_name in (
+        questionnaire_table_name,
+        edit_table_name,
+        f"{questionnaire_name}_RowHash",
+    ):
+        connection.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+
+    connection.execute(
+        text(
+            f"CREATE TABLE {questionnaire_table_name} ( \
+            Serial_Number INT NOT NULL PRIMARY KEY, \
+            QEdit_edited TINYINT NOT NULL DEFAULT 0, \
+            QEdit_LastUpdated DATETIME NULL, \
+            QHAdmin_HOut VARCHAR(10) NULL, \
+            DataStream TEXT NULL)"
+        )
+    )
+    connection.execute(
+        text(f"CREATE TABLE {edit_table_name} LIKE {questionnaire_table_name}")
+    )
+
+    last_updated = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+    payload = "x" * payload_bytes
+    insert_command = text(
+        f"INSERT INTO {questionnaire_table_name} \
+        (Serial_Number, QEdit_edited, QEdit_LastUpdated, QHAdmin_HOut, DataStream) \
+        VALUES (:serial_number, 0, :last_updated, '110', :data_stream)"
+    )
+    for batch_start in range(1, cases + 1, INSERT_BATCH_SIZE):
+        connection.execute(
+            insert_command,
+            [
+                {
+                    "serial_number": serial_number,
+                    "last_updated": last_updated,
+                    "data_stream": payload,
+                }
+                for serial_number in range(
+                    batch_start, min(batch_start + INSERT_BATCH_SIZE, cases + 1)
+                )
+            ],
+        )
+
+    # the same cases are edited on every run with the same seed
+    edited_serial_numbers = sorted(
+        random.Random(f"{seed}.{questionnaire_name}").sample(
+            range(1, cases + 1), round(cases * edited_ratio)
+        )
+    )
+    if edited_serial_numbers:
+        connection.execute(
+            text(
+                f"INSERT INTO {edit_table_name} \
+                (Serial_Number, QEdit_edited, QEdit_LastUpdated, QHAdmin_HOut, DataStream) \
+                VALUES (:serial_number, 1, :last_updated, '110', 'edited')"
+            ),
+            [
+                {"serial_number": serial_number, "last_updated": last_updated}
+                for serial_number in edited_serial_numbers
+            ],
+        )
+    return len(edited_serial_numbers)
+
+
+def seed_database(
+    questionnaire_names: List[str],
+    cases: int,
+    edited_ratio: float,
+    payload_bytes: int,
+    seed: int,
+) -> Dict[str, Any]:
+    from sqlalchemy import text
+
+    start_time = time.perf_counter()
+    engine = create_seed_engine()
+    edited_cases = 0
+    try:
+        with engine.begin() as connection:
+            # a watermark left by an earlier harness run would skip the first copy
+            connection.execute(
+                text(
+                    "DROP TABLE IF EXISTS "
+                    + os.environ.get(
+                        "COPY_CASES_WATERMARK_TABLE", "copy_cases_watermark"
+                    )
+                )
+            )
+        for questionnaire_name in questionnaire_names:
+            with engine.begin() as connection:
+                edited_cases += seed_questionnaire(
+                    connection,
+                    questionnaire_name,
+                    cases,
+                    edited_ratio,
+                    payload_bytes,
+                    seed,
+                )
+    finally:
+        engine.dispose()
+
+    return {
+        "questionnaires": len(questionnaire_names),
+        "cases": cases * len(questionnaire_names),
+        "edited_cases": edited_cases,
+        "seconds": round(time.perf_counter() - start_time, 3),
+    }
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """The nearest-rank percentile, so it is always one of the measured values."""
+    if not values:
+        return None
+    ordered_values = sorted(values)
+    rank = max(1, round(fraction * len(ordered_values) + 0.5))
+    return ordered_values[min(rank, len(ordered_values)) - 1]
+
+
+def get_peak_rss_mb() -> float:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS bytes
+    if sys.platform == "darwin":
+        return round(peak_rss / (1024 * 1024), 1)
+    return round(peak_rss / 1024, 1)
+
+
+def invoke_copy_cases_to_edit(survey_type: str):
+    import flask
+
+    import main
+
+    app = flask.Flask(__name__)
+    with app.test_request_context(json={"survey_type": survey_type}):
+        return main.copy_cases_to_edit(flask.request)
+
+
+def run_once(survey_type: str, total_cases: int, trace_memory: bool) -> Dict[str, Any]:
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        response, status_code = invoke_copy_cases_to_edit(survey_type)
+        wall_seconds = time.perf_counter() - start_time
+        python_peak_memory = (
+            tracemalloc.get_traced_memory()[1] if trace_memory else None
+        )
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    if not isinstance(response, dict):
+        return {"status_code": status_code, "error": response}
+
+    questionnaire_results = response["questionnaires"]
+    rows_written = sum(
+        (
+            result["rows_affected"]
+            if result["rows_inserted"] is None or result["rows_updated"] is None
+            else result["rows_inserted"] + result["rows_updated"]
+        )
+        for result in questionnaire_results
+    )
+    latencies_ms = [
+        result["duration_ms"]
+        for result in questionnaire_results
+        if result["duration_ms"] is not None
+    ]
+    return {
+        "status_code": status_code,
+        "wall_seconds": round(wall_seconds, 3),
+        "rows_written": rows_written,
+        "rows_per_second": round(rows_written / wall_seconds, 1),
+        "cases_per_second": round(total_cases / wall_seconds, 1),
+        "questionnaire_latency_ms": {
+            "min": min(latencies_ms, default=None),
+            "p50": percentile(latencies_ms, 0.5),
+            "p95": percentile(latencies_ms, 0.95),
+            "max": max(latencies_ms, default=None),
+        },
+        "totals": response["totals"],
+        "peak_rss_mb": get_peak_rss_mb(),
+        "python_peak_memory_mb": (
+            None
+            if python_peak_memory is None
+            else round(python_peak_memory / (1024 * 1024), 1)
+        ),
+    }
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questionnaires", type=int, default=10)
+    parser.add_argument(
+        "--cases", type=int, default=1000, help="cases per questionnaire"
+    )
+    parser.add_argument(
+        "--edited-ratio",
+        type=float,
+        default=0.1,
+        help="share of each questionnaire's cases that have already been edited",
+    )
+    parser.add_argument("--payload-bytes", type=int, default=200)
+    parser.add_argument("--survey-type", default="LMS")
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=1,
+        help="invocations against the same data, the later ones on a warm instance",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skip-seed", action="store_true", help="reuse the tables from an earlier run"
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="also report the Python heap peak, which slows the copy down",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="show the function's logs"
+    )
+    parser.add_argument("--output", help="file to write the JSON results to")
+    options = parser.parse_args(arguments)
+    if not 0 <= options.edited_ratio <= 1:
+        parser.error("--edited-ratio must be between 0 and 1")
+
+    for name, value in BENCHMARK_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    sys.path.insert(0, REPOSITORY_ROOT)
+    logging.basicConfig(
+        stream=sys.stderr, level=logging.INFO if options.verbose else logging.WARNING
+    )
+
+    questionnaire_names = make_questionnaire_names(
+        options.survey_type, options.questionnaires
+    )
+    seeding = None
+    if not options.skip_seed:
+        seeding = seed_database(
+            questionnaire_names,
+            options.cases,
+            options.edited_ratio,
+            options.payload_bytes,
+            options.seed,
+        )
+
+    server_park = os.environ["BLAISE_SERVER_PARK"]
+    total_cases = options.cases * options.questionnaires
+    with FakeBlaiseRestApi(
+        {server_park: make_questionnaires(questionnaire_names, server_park)}
+    ) as fake_api, mock.patch.dict(os.environ, {"BLAISE_API_URL": fake_api.address}):
+        # the function's logs go to stderr with the harness's, rather than
+        # being written as structured JSON among the results
+        with mock.patch("main.setup_logger"):
+            runs = [
+                run_once(options.survey_type, total_cases, options.trace_memory)
+                for _ in range(options.runs)
+            ]
+
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "parameters": {
+            "questionnaires": options.questionnaires,
+            "cases_per_questionnaire": options.cases,
+            "edited_ratio": options.edited_ratio,
+            "payload_bytes": options.payload_bytes,
+            "copy_cases_settings": {
+                name: value
+                for name, value in sorted(os.environ.items())
+                if name.startswith("COPY_CASES_")
+            },
+        },
+        "seeding": seeding,
+        "runs": runs,
+    }
+
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w") as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+    return 0 if all(run["status_code"] == 200 for run in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""Micro-benchmarks for the Python overhead of the copy_cases_to_edit request path.
+
+The Blaise REST API and the database are stubbed out, so only the time spent in
+this code base and its imports is measured. Results are written as JSON so runs
+from different commits can be compared:
+
+    python -m benchmarks.request_path --output bench.json
+    python -m benchmarks.request_path --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARK_ENVIRONMENT = {
+    "DATABASE_NAME": "blaise",
+    "DATABASE_USERNAME": "benchmark",
+    "DATABASE_PASSWORD": "benchmark",
+    "DATABASE_IP_ADDRESS": "127.0.0.1",
+    "DATABASE_PORT": "3306",
+    "BLAISE_API_URL": "localhost:5000",
+    "BLAISE_SERVER_PARK": "gusty",
+}
+
+
+def measure(
+    function: Callable[[], Any], repeat: int, number: int = 1
+) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        "repeat": repeat,
+        "number": number,
+        "min_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "mean_seconds": statistics.mean(timings),
+    }
+
+
+def measure_cold_import(repeat: int) -> Dict[str, Any]:
+    """Times a fresh interpreter importing main, minus the bare interpreter start-up."""
+
+    def run(code: str) -> Callable[[], Any]:
+        return lambda: subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=REPOSITORY_ROOT,
+            env={**os.environ, **BENCHMARK_ENVIRONMENT},
+            check=True,
+        )
+
+    interpreter = measure(run("pass"), repeat)
+    import_main = measure(run("import main"), repeat)
+    return {
+        **import_main,
+        "min_seconds": import_main["min_seconds"] - interpreter["min_seconds"],
+        "median_seconds": import_main["median_seconds"] - interpreter["median_seconds"],
+        "mean_seconds": import_main["mean_seconds"] - interpreter["mean_seconds"],
+    }
+
+
+def make_questionnaires(count: int) -> List[Dict[str, Any]]:
+    survey_types = ["FRS", "LCF", "LMS", "OPN"]
+    questionnaires = []
+    for number in range(count // 2):
+        questionnaire_name = f"{survey_types[number % 4]}{number:06d}A"
+        questionnaires.append({"name": questionnaire_name})
+        questionnaires.append({"name": f"{questionnaire_name}_EDIT"})
+    return questionnaires[:count]
+
+
+def run_benchmarks(repeat: int) -> Dict[str, Dict[str, Any]]:
+    import sqlalchemy
+    from sqlalchemy.dialects import mysql
+
+    from factories.service_instance_factory import ServiceInstanceFactory
+    from models.copy_columns_model import CopyColumnsModel
+    from providers.configuration_provider import ConfigurationProvider
+    from services.blaise_service import SessionRestApiClient
+    from services.case_service import CaseService
+    from services.copy_statement_builder import CopyStatementBuilder, compile_statement
+    from services.database_service import DatabaseService
+
+    results = {"cold_import_main": measure_cold_import(repeat)}
+
+    with mock.patch.dict(os.environ, BENCHMARK_ENVIRONMENT), mock.patch.object(
+        sqlalchemy, "create_engine"
+    ), mock.patch.object(
+        SessionRestApiClient, "get_all_questionnaires_for_server_park"
+    ):
+        configuration_provider = ConfigurationProvider()
+        results["configuration_provider_database_connection_model"] = measure(
+            configuration_provider.get_database_connection_model, repeat, 1000
+        )
+        results["configuration_provider_blaise_connection_model"] = measure(
+            configuration_provider.get_blaise_connection_model, repeat, 1000
+        )
+        results["configuration_provider_configuration_snapshot"] = measure(
+            configuration_provider.get_configuration_snapshot, repeat, 1000
+        )
+        results["create_case_service"] = measure(
+            ServiceInstanceFactory.create_case_service, repeat, 100
+        )
+
+    for count in (10, 1_000, 100_000):
+        questionnaires = make_questionnaires(count)
+        results[f"filter_questionnaires_by_survey_type_{count}"] = measure(
+            lambda: CaseService.filter_questionnaires_by_survey_type(
+                questionnaires, "FRS"
+            ),
+            repeat,
+            max(1, 10_000 // count),
+        )
+
+    dialect = mysql.dialect()
+    copy_columns = CopyColumnsModel(
+        ["Serial_Number", *(f"QHousehold_{number}" for number in range(200))],
+        [f"QHousehold_{number}" for number in range(200)],
+    )
+    results["copy_cases_command"] = measure(
+        lambda: DatabaseService.copy_cases_command(
+            dialect, "FRS2504A_EDIT_Form", "FRS2504A_Form", copy_columns
+        ),
+        repeat,
+        1000,
+    )
+    # what each copy would pay without the compiled statement cache
+    results["copy_cases_command_uncached"] = measure(
+        lambda: compile_statement(
+            CopyStatementBuilder.build_copy_cases(
+                dialect.name, "FRS2504A_EDIT_Form", "FRS2504A_Form", copy_columns
+            ),
+            dialect,
+        ),
+        repeat,
+        10,
+    )
+    return results
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPOSITORY_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    regressions = []
+    for name, result in current["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None or baseline_result["median_seconds"] <= 0:
+            continue
+
+        ratio = result["median_seconds"] / baseline_result["median_seconds"]
+        print(f"{name}: {ratio:.2f}x baseline")
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument("--compare", help="JSON results from an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="fractional slowdown against --compare that counts as a regression",
+    )
+    options = parser.parse_args(arguments)
+
+    sys.path.insert(0, REPOSITORY_ROOT)
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "results": run_benchmarks(options.repeat),
+    }
+
+    output = json.dumps(report, indent=2)
+    if options.output:
+        with open(options.output, "w") as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare(json.load(baseline_file), report, options.threshold)
+        if regressions:
+            print(f"Regressions against {options.compare}: {regressions}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
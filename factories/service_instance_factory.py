@@ -1,9 +1,13 @@
-from providers.configuration_provider import ConfigurationProvider
-from services.blaise_service import BlaiseService
-from services.case_service import CaseService
-from services.database_connection_service import DatabaseConnectionService
+from typing import TYPE_CHECKING
+
 from services.validation_service import ValidationService
-from services.database_service import DatabaseService
+from utilities.logging import log_stage
+
+if TYPE_CHECKING:
+    from models.profiling_configuration_model import ProfilingConfigurationModel
+    from services.async_case_service import AsyncCaseService
+    from services.case_service import CaseService
+    from services.fan_out_service import FanOutService
 
 
 class ServiceInstanceFactory:
@@ -13,9 +17,75 @@ class ServiceInstanceFactory:
         return ValidationService()
 
     @staticmethod
-    def create_case_service() -> CaseService:
-        configuration_provider = ConfigurationProvider()
-        database_connection_service = DatabaseConnectionService(configuration_provider)
+    def create_case_service() -> "CaseService":
+        # imported here so SQLAlchemy, PyMySQL and the Blaise REST client are only
+        # loaded once a request needs them, not when the function instance starts
+        from providers.configuration_provider import configuration_provider
+        from services.blaise_service import BlaiseService
+        from services.case_service import CaseService
+        from services.database_connection_service import DatabaseConnectionService
+        from services.database_service import DatabaseService
+
+        with log_stage("config_load"):
+            configuration_snapshot = configuration_provider.get_configuration_snapshot()
+            database_connection_service = DatabaseConnectionService(
+                configuration_provider
+            )
         database_service = DatabaseService(database_connection_service)
         blaise_service = BlaiseService(configuration_provider)
-        return CaseService(database_service, blaise_service)
+        return CaseService(
+            database_service, blaise_service, configuration_snapshot.copy_cases
+        )
+
+    @staticmethod
+    def create_async_case_service() -> "AsyncCaseService":
+        from providers.configuration_provider import configuration_provider
+        from services.async_case_service import AsyncCaseService
+        from services.async_database_service import AsyncDatabaseService
+        from services.blaise_service import BlaiseService
+        from services.database_connection_service import DatabaseConnectionService
+
+        with log_stage("config_load"):
+            configuration_snapshot = configuration_provider.get_configuration_snapshot()
+            database_connection_service = DatabaseConnectionService(
+                configuration_provider
+            )
+        async_database_service = AsyncDatabaseService(database_connection_service)
+        blaise_service = BlaiseService(configuration_provider)
+        return AsyncCaseService(
+            async_database_service, blaise_service, configuration_snapshot.copy_cases
+        )
+
+    @staticmethod
+    def is_async_execution_enabled() -> bool:
+        from models.copy_cases_configuration_model import ExecutionMode
+        from providers.configuration_provider import configuration_provider
+
+        return (
+            configuration_provider.get_configuration_snapshot().copy_cases.execution_mode
+            == ExecutionMode.ASYNC
+        )
+
+    @staticmethod
+    def create_profiling_configuration_model() -> "ProfilingConfigurationModel":
+        from providers.configuration_provider import configuration_provider
+
+        return configuration_provider.get_configuration_snapshot().profiling
+
+    @staticmethod
+    def create_fan_out_service() -> "FanOutService":
+        from providers.configuration_provider import configuration_provider
+        from services.database_connection_service import DatabaseConnectionService
+        from services.fan_out_service import FanOutService
+        from services.work_queue import get_work_queue
+
+        copy_cases_configuration_model = (
+            configuration_provider.get_configuration_snapshot().copy_cases
+        )
+        # the engine is cached per process, so the queue shares the copies' pool
+        database = DatabaseConnectionService(configuration_provider).get_database()
+        return FanOutService(
+            ServiceInstanceFactory.create_case_service(),
+            get_work_queue(copy_cases_configuration_model, database),
+            copy_cases_configuration_model,
+        )
@@ -1,25 +1,38 @@
 import logging
+from typing import Union
 
 from factories.service_instance_factory import ServiceInstanceFactory
 from utilities.custom_exceptions import ConfigError, RequestError, BlaiseError
 from utilities.logging import setup_logger
+from utilities.metrics import record_invocation
 
-setup_logger()
 
-
-def copy_cases_to_edit(request) -> tuple[str, int]:
+@record_invocation("copy_cases_to_edit")
+def copy_cases_to_edit(request) -> tuple[Union[str, dict], int]:
+    setup_logger()
     try:
         logging.info("Running Cloud Function - 'copy_cases_to_edit'")
 
         validation_service = ServiceInstanceFactory.create_validation_service()
         validation_service.validate_request_values_are_not_empty(request)
 
-        case_service = ServiceInstanceFactory.create_case_service()
-        questionnaire_name = request.get_json()["survey_type"]
-        case_service.copy_cases(questionnaire_name)
+        request_json = request.get_json()
+        profiling_configuration = (
+            ServiceInstanceFactory.create_profiling_configuration_model()
+        )
+        if profiling_configuration.should_profile(request_json):
+            # only imported when profiling, so a normal invocation pays nothing
+            from utilities.profiling import profile
 
-        logging.info("Finished Running Cloud Function - 'copy_cases_to_edit'")
-        return f"Successfully copied cases to edit", 200
+            with profile(
+                "copy_cases_to_edit",
+                top_count=profiling_configuration.top_count,
+                sample_interval_milliseconds=(
+                    profiling_configuration.sample_interval_milliseconds
+                ),
+            ):
+                return run_copy_cases_to_edit(request_json)
+        return run_copy_cases_to_edit(request_json)
     except (ConfigError, RequestError, BlaiseError) as e:
         error_message = f"Error copying cases to edit: {e}"
         logging.error(error_message)
@@ -28,3 +41,124 @@ def copy_cases_to_edit(request) -> tuple[str, int]:
         error_message = f"Error copying cases to edit: {e}"
         logging.error(error_message)
         return error_message, 500
+
+
+def run_copy_cases_to_edit(request_json) -> tuple[Union[str, dict], int]:
+    if (
+        not request_json.get("dry_run")
+        and ServiceInstanceFactory.is_async_execution_enabled()
+    ):
+        from utilities.event_loop import run_coroutine
+
+        async_case_service = ServiceInstanceFactory.create_async_case_service()
+        copy_cases_result = run_coroutine(
+            async_case_service.copy_cases(
+                request_json["survey_type"],
+                refresh_questionnaires=bool(request_json.get("refresh_questionnaires")),
+            )
+        )
+        return copy_cases_response(copy_cases_result)
+
+    case_service = ServiceInstanceFactory.create_case_service()
+    if request_json.get("dry_run"):
+        estimate_result = case_service.estimate_copy_cases(
+            request_json["survey_type"],
+            refresh_questionnaires=bool(request_json.get("refresh_questionnaires")),
+            explain=bool(request_json.get("explain")),
+        )
+        logging.info("Finished dry run of Cloud Function - 'copy_cases_to_edit'")
+        return {
+            "message": "Dry run, no cases copied",
+            **estimate_result.to_dict(),
+        }, 200
+
+    copy_cases_result = case_service.copy_cases(
+        request_json["survey_type"],
+        refresh_questionnaires=bool(request_json.get("refresh_questionnaires")),
+    )
+    return copy_cases_response(copy_cases_result)
+
+
+def copy_cases_response(copy_cases_result) -> tuple[Union[str, dict], int]:
+    failed_questionnaires = copy_cases_result.failed_questionnaires
+    if failed_questionnaires:
+        error_message = (
+            f"Error copying cases to edit for questionnaires: "
+            f"{failed_questionnaires}"
+        )
+        logging.error(error_message)
+        return {"message": error_message, **copy_cases_result.to_dict()}, 500
+
+    logging.info("Finished Running Cloud Function - 'copy_cases_to_edit'")
+    return {
+        "message": "Successfully copied cases to edit",
+        **copy_cases_result.to_dict(),
+    }, 200
+
+
+@record_invocation("copy_cases_coordinator")
+def copy_cases_coordinator(request) -> tuple[Union[str, dict], int]:
+    setup_logger()
+    try:
+        logging.info("Running Cloud Function - 'copy_cases_coordinator'")
+
+        validation_service = ServiceInstanceFactory.create_validation_service()
+        validation_service.validate_request_values_are_not_empty(request)
+
+        request_json = request.get_json()
+        fan_out_service = ServiceInstanceFactory.create_fan_out_service()
+        enqueue_result = fan_out_service.enqueue_copy_cases(
+            request_json["survey_type"],
+            refresh_questionnaires=bool(request_json.get("refresh_questionnaires")),
+        )
+        logging.info("Finished Running Cloud Function - 'copy_cases_coordinator'")
+        return {
+            "message": "Successfully queued questionnaires to copy to edit",
+            **enqueue_result.to_dict(),
+        }, 200
+    except (ConfigError, RequestError, BlaiseError) as e:
+        error_message = f"Error queuing questionnaires to copy to edit: {e}"
+        logging.error(error_message)
+        return error_message, 400
+    except Exception as e:
+        error_message = f"Error queuing questionnaires to copy to edit: {e}"
+        logging.error(error_message)
+        return error_message, 500
+
+
+@record_invocation("copy_cases_worker")
+def copy_cases_worker(request) -> tuple[Union[str, dict], int]:
+    setup_logger()
+    try:
+        logging.info("Running Cloud Function - 'copy_cases_worker'")
+
+        request_json = request.get_json(silent=True) or {}
+        max_items = request_json.get("max_items", 1)
+        if not isinstance(max_items, int) or max_items < 1:
+            raise RequestError("max_items must be a whole number of at least 1")
+
+        fan_out_service = ServiceInstanceFactory.create_fan_out_service()
+        work_item_results = fan_out_service.process_work_items(max_items)
+
+        failed_questionnaires = work_item_results.failed_questionnaires
+        if failed_questionnaires:
+            error_message = (
+                f"Error copying cases to edit for questionnaires: "
+                f"{failed_questionnaires}"
+            )
+            logging.error(error_message)
+            return {"message": error_message, **work_item_results.to_dict()}, 500
+
+        logging.info("Finished Running Cloud Function - 'copy_cases_worker'")
+        return {
+            "message": "Successfully copied queued cases to edit",
+            **work_item_results.to_dict(),
+        }, 200
+    except (ConfigError, RequestError, BlaiseError) as e:
+        error_message = f"Error copying queued cases to edit: {e}"
+        logging.error(error_message)
+        return error_message, 400
+    except Exception as e:
+        error_message = f"Error copying queued cases to edit: {e}"
+        logging.error(error_message)
+        return error_message, 500
@@ -1,5 +1,7 @@
-class BlaiseConnectionModel:
+from typing import NamedTuple
 
-    def __init__(self, blaise_api_url: str, blaise_server_park: str):
-        self.blaise_api_url = blaise_api_url
-        self.blaise_server_park = blaise_server_park
+
+class BlaiseConnectionModel(NamedTuple):
+    blaise_api_url: str
+    blaise_server_park: str
+    questionnaire_cache_ttl_seconds: int = 60
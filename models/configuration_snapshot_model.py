@@ -0,0 +1,33 @@
+import hashlib
+from typing import NamedTuple
+
+from models.blaise_connection_model import BlaiseConnectionModel
+from models.copy_cases_configuration_model import CopyCasesConfigurationModel
+from models.database_connection_model import DatabaseConnectionModel
+from models.profiling_configuration_model import ProfilingConfigurationModel
+
+
+class ConfigurationSnapshotModel(NamedTuple):
+    """Every setting the function needs, validated together and then left alone.
+
+    Loaded once per instance and shared by the services, so a warm invocation
+    does not re-read or re-validate the environment.
+    """
+
+    database: DatabaseConnectionModel
+    blaise: BlaiseConnectionModel
+    copy_cases: CopyCasesConfigurationModel = CopyCasesConfigurationModel()
+    profiling: ProfilingConfigurationModel = ProfilingConfigurationModel()
+
+    @property
+    def fingerprint(self) -> str:
+        return hashlib.sha256(
+            repr(
+                (
+                    self.database.fingerprint,
+                    tuple(self.blaise),
+                    tuple(self.copy_cases),
+                    tuple(self.profiling),
+                )
+            ).encode()
+        ).hexdigest()
@@ -0,0 +1,65 @@
+from typing import NamedTuple
+
+
+class CopyMode:
+    FULL = "full"
+    CHUNKED = "chunked"
+    INCREMENTAL = "incremental"
+    HASHED = "hashed"
+    ADAPTIVE = "adaptive"
+    MODES = (FULL, CHUNKED, INCREMENTAL, HASHED, ADAPTIVE)
+
+
+class ExecutionMode:
+    THREADS = "threads"
+    ASYNC = "async"
+    MODES = (THREADS, ASYNC)
+
+
+class JoinStrategy:
+    AUTO = "auto"
+    LEFT_JOIN = "left_join"
+    EDITED_SET = "edited_set"
+    STRATEGIES = (AUTO, LEFT_JOIN, EDITED_SET)
+
+
+class WorkQueueBackend:
+    MYSQL = "mysql"
+    SQLITE = "sqlite"
+    BACKENDS = (MYSQL, SQLITE)
+
+
+class CopyCasesConfigurationModel(NamedTuple):
+    max_workers: int = 1
+    copy_mode: str = CopyMode.FULL
+    chunk_size: int = 1000
+    chunk_pause_milliseconds: int = 0
+    watermark_column: str = "QEdit_LastUpdated"
+    watermark_table: str = "copy_cases_watermark"
+    execution_mode: str = ExecutionMode.THREADS
+    join_strategy: str = JoinStrategy.AUTO
+    edited_set_min_rows: int = 50000
+    retry_attempts: int = 3
+    retry_base_delay_milliseconds: int = 100
+    retry_max_delay_milliseconds: int = 2000
+    requeue_limit: int = 1
+    work_queue: str = WorkQueueBackend.MYSQL
+    work_queue_path: str = "/tmp/copy_cases_work_queue.sqlite3"
+    work_queue_visibility_timeout_seconds: int = 600
+    work_queue_max_deliveries: int = 10
+    work_queue_shared: bool = False
+    questionnaire_locks: bool = True
+    lock_timeout_seconds: int = 0
+
+    def resolve_join_strategy(self, questionnaire_row_estimate: int) -> str:
+        """Picks how a copy skips edited cases when the strategy is left to us.
+
+        Joining the full width of both tables is cheapest for small questionnaires.
+        Past edited_set_min_rows it is cheaper to collect the edited serial
+        numbers into a narrow indexed table and filter against that instead.
+        """
+        if self.join_strategy != JoinStrategy.AUTO:
+            return self.join_strategy
+        if questionnaire_row_estimate >= self.edited_set_min_rows:
+            return JoinStrategy.EDITED_SET
+        return JoinStrategy.LEFT_JOIN
@@ -0,0 +1,27 @@
+from typing import Any, Dict, List
+
+from models.copy_plan_model import CopyPlanModel
+
+
+class CopyCasesEnqueueResultModel:
+
+    def __init__(
+        self,
+        survey_types: List[str],
+        copy_plan: CopyPlanModel,
+        enqueued_count: int,
+        pending_count: int,
+    ):
+        self.survey_types = survey_types
+        self.copy_plan = copy_plan
+        self.enqueued_count = enqueued_count
+        self.pending_count = pending_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "survey_types": self.survey_types,
+            "plan": self.copy_plan.to_dict(),
+            "enqueued": self.enqueued_count,
+            "already_queued": len(self.copy_plan.copyable) - self.enqueued_count,
+            "pending": self.pending_count,
+        }
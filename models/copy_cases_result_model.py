@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+
+from models.copy_estimate_model import CopyEstimateModel
+from models.copy_plan_model import CopyPlanModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from models.row_count_model import RowCountModel
+
+
+class CopyCasesResultModel:
+
+    def __init__(
+        self,
+        survey_types: List[str],
+        copy_plan: CopyPlanModel,
+        questionnaire_results: List[QuestionnaireCopyResultModel],
+        estimates: Optional[List[CopyEstimateModel]] = None,
+        duration_ms: Optional[float] = None,
+    ):
+        self.survey_types = survey_types
+        self.copy_plan = copy_plan
+        self.questionnaire_results = questionnaire_results
+        self.estimates = estimates
+        self.duration_ms = duration_ms
+
+    @property
+    def dry_run(self) -> bool:
+        return self.estimates is not None
+
+    @property
+    def failed_questionnaires(self) -> List[str]:
+        return [
+            result.questionnaire_name
+            for result in self.questionnaire_results
+            if result.failed
+        ]
+
+    def get_totals(self) -> Dict[str, Any]:
+        row_counts = RowCountModel(inserted=0, updated=0)
+        status_counts = dict.fromkeys(QuestionnaireCopyResultModel.STATUSES, 0)
+        for questionnaire_result in self.questionnaire_results:
+            status_counts[questionnaire_result.status] += 1
+            if questionnaire_result.row_counts is not None:
+                row_counts.add(questionnaire_result.row_counts)
+
+        return {
+            "questionnaires": len(self.questionnaire_results),
+            **status_counts,
+            **row_counts.to_dict(),
+            "duration_ms": self.duration_ms,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "survey_types": self.survey_types,
+            "dry_run": self.dry_run,
+            "plan": self.copy_plan.to_dict(),
+            "questionnaires": [
+                questionnaire_result.to_dict()
+                for questionnaire_result in self.questionnaire_results
+            ],
+        }
+        if self.estimates is not None:
+            result["estimates"] = [estimate.to_dict() for estimate in self.estimates]
+        else:
+            result["totals"] = self.get_totals()
+        return result
@@ -0,0 +1,30 @@
+from typing import List
+
+from models.table_schema_model import TableSchemaModel
+
+
+class CopyColumnsModel:
+
+    def __init__(self, columns: List[str], update_columns: List[str]):
+        self.columns = columns
+        self.update_columns = update_columns
+
+    @classmethod
+    def from_table_schemas(
+        cls, questionnaire_schema: TableSchemaModel, edit_schema: TableSchemaModel
+    ) -> "CopyColumnsModel":
+        """Maps the columns both tables share, in the questionnaire table's order.
+
+        Edit-only columns, such as those for the edit block, are left untouched.
+        """
+        edit_columns = set(edit_schema.columns)
+        columns = [
+            column for column in questionnaire_schema.columns if column in edit_columns
+        ]
+        update_columns = [
+            column
+            for column in columns
+            if column not in edit_schema.primary_key_columns
+        ]
+        # ON DUPLICATE KEY UPDATE needs at least one assignment
+        return cls(columns, update_columns or columns[:1])
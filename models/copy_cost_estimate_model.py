@@ -0,0 +1,12 @@
+from typing import Any, Dict, NamedTuple
+
+
+class CopyCostEstimateModel(NamedTuple):
+    strategy: str
+    rows_read: int
+    rows_written: int
+    statements: int
+    cost: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
@@ -0,0 +1,29 @@
+from typing import Any, Dict, List, Optional
+
+
+class CopyEstimateModel:
+
+    def __init__(
+        self,
+        questionnaire_name: str,
+        rows_to_insert: int,
+        rows_to_overwrite: int,
+        rows_to_skip: int,
+        explain_plan: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self.questionnaire_name = questionnaire_name
+        self.rows_to_insert = rows_to_insert
+        self.rows_to_overwrite = rows_to_overwrite
+        self.rows_to_skip = rows_to_skip
+        self.explain_plan = explain_plan
+
+    def to_dict(self) -> Dict[str, Any]:
+        estimate = {
+            "questionnaire_name": self.questionnaire_name,
+            "rows_to_insert": self.rows_to_insert,
+            "rows_to_overwrite": self.rows_to_overwrite,
+            "rows_to_skip": self.rows_to_skip,
+        }
+        if self.explain_plan is not None:
+            estimate["explain_plan"] = self.explain_plan
+        return estimate
@@ -0,0 +1,16 @@
+from typing import NamedTuple, Optional
+
+
+class CopyFilterModel(NamedTuple):
+    """Narrows a copy to a range of one column, or to the serial numbers in a table.
+
+    The bounds are named bind parameters rather than values, so the same
+    statement is reused for every chunk or watermark range. The lower bound is
+    exclusive unless lower_bound_inclusive is set.
+    """
+
+    column: Optional[str] = None
+    lower_bound_parameter: Optional[str] = None
+    upper_bound_parameter: Optional[str] = None
+    serial_number_table: Optional[str] = None
+    lower_bound_inclusive: bool = False
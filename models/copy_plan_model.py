@@ -0,0 +1,48 @@
+from typing import AbstractSet, Any, Dict, Iterable, List
+
+
+class CopyPlanModel:
+
+    def __init__(
+        self,
+        copyable: List[str],
+        missing_edit_table: List[str],
+        missing_questionnaire_table: List[str],
+    ):
+        self.copyable = copyable
+        self.missing_edit_table = missing_edit_table
+        self.missing_questionnaire_table = missing_questionnaire_table
+
+    @classmethod
+    def from_existing_tables(
+        cls, questionnaire_names: Iterable[str], existing_tables: AbstractSet[str]
+    ) -> "CopyPlanModel":
+        copy_plan = cls(
+            copyable=[], missing_edit_table=[], missing_questionnaire_table=[]
+        )
+        for questionnaire_name in questionnaire_names:
+            if f"{questionnaire_name}_Form" not in existing_tables:
+                copy_plan.missing_questionnaire_table.append(questionnaire_name)
+            elif f"{questionnaire_name}_EDIT_Form" not in existing_tables:
+                copy_plan.missing_edit_table.append(questionnaire_name)
+            else:
+                copy_plan.copyable.append(questionnaire_name)
+        return copy_plan
+
+    @staticmethod
+    def table_names(questionnaire_names: Iterable[str]) -> List[str]:
+        return [
+            table_name
+            for questionnaire_name in questionnaire_names
+            for table_name in (
+                f"{questionnaire_name}_Form",
+                f"{questionnaire_name}_EDIT_Form",
+            )
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "copyable": self.copyable,
+            "missing_edit_table": self.missing_edit_table,
+            "missing_questionnaire_table": self.missing_questionnaire_table,
+        }
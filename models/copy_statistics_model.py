@@ -0,0 +1,9 @@
+from typing import NamedTuple, Optional
+
+
+class CopyStatisticsModel(NamedTuple):
+    questionnaire_rows: int
+    edited_rows: int
+    seconds_since_last_run: Optional[int] = None
+    seconds_since_questionnaire_update: Optional[int] = None
+    watermark_available: bool = False
@@ -1,15 +1,29 @@
-class DatabaseConnectionModel:
-
-    def __init__(
-        self,
-        database_name: str,
-        database_username: str,
-        database_password: str,
-        database_ip_address: str,
-        database_port: int,
-    ):
-        self.database_name = database_name
-        self.database_username = database_username
-        self.database_password = database_password
-        self.database_ip_address = database_ip_address
-        self.database_port = database_port
+import hashlib
+from typing import NamedTuple
+
+
+class DatabaseConnectionModel(NamedTuple):
+    database_name: str
+    database_username: str
+    database_password: str
+    database_ip_address: str
+    database_port: int
+    database_pool_size: int = 5
+    database_pool_max_overflow: int = 2
+    database_pool_recycle_seconds: int = 1800
+    database_pool_pre_ping: bool = True
+    database_pool_timeout_seconds: int = 30
+    database_connect_timeout_seconds: int = 10
+
+    @property
+    def fingerprint(self) -> str:
+        # hashed so the password never ends up in an engine key or a log
+        return hashlib.sha256(repr(tuple(self)).encode()).hexdigest()
+
+    def __repr__(self) -> str:
+        return (
+            f"DatabaseConnectionModel(database_name={self.database_name!r}, "
+            f"database_ip_address={self.database_ip_address!r}, "
+            f"database_port={self.database_port!r}, "
+            f"fingerprint={self.fingerprint[:12]!r})"
+        )
@@ -0,0 +1,21 @@
+from typing import Any, Dict, NamedTuple
+
+
+class ProfilingMode:
+    OFF = "off"
+    ON = "on"
+    REQUEST = "request"
+    MODES = (OFF, ON, REQUEST)
+
+
+class ProfilingConfigurationModel(NamedTuple):
+    mode: str = ProfilingMode.OFF
+    top_count: int = 20
+    sample_interval_milliseconds: int = 5
+
+    def should_profile(self, request_json: Dict[str, Any]) -> bool:
+        if self.mode == ProfilingMode.ON:
+            return True
+        return (
+            self.mode == ProfilingMode.REQUEST and request_json.get("profile") is True
+        )
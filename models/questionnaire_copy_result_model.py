@@ -0,0 +1,52 @@
+from typing import Any, Dict, Optional
+
+from models.row_count_model import RowCountModel
+
+
+class QuestionnaireCopyResultModel:
+    COPIED = "copied"
+    MISSING_EDIT_TABLE = "missing_edit_table"
+    MISSING_QUESTIONNAIRE_TABLE = "missing_questionnaire_table"
+    FAILED = "failed"
+    LOCKED = "locked"
+    STATUSES = (
+        COPIED,
+        MISSING_EDIT_TABLE,
+        MISSING_QUESTIONNAIRE_TABLE,
+        FAILED,
+        LOCKED,
+    )
+
+    def __init__(
+        self,
+        questionnaire_name: str,
+        status: str,
+        error: Optional[str] = None,
+        attempts: int = 1,
+        retryable: bool = False,
+        row_counts: Optional[RowCountModel] = None,
+        duration_ms: Optional[float] = None,
+    ):
+        self.questionnaire_name = questionnaire_name
+        self.status = status
+        self.error = error
+        self.attempts = attempts
+        self.retryable = retryable
+        self.row_counts = row_counts
+        self.duration_ms = duration_ms
+
+    @property
+    def failed(self) -> bool:
+        return self.status == self.FAILED
+
+    def to_dict(self) -> Dict[str, Any]:
+        row_counts = self.row_counts or RowCountModel()
+        return {
+            "questionnaire_name": self.questionnaire_name,
+            "status": self.status,
+            **row_counts.to_dict(),
+            "attempts": self.attempts,
+            "retryable": self.retryable,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+        }
@@ -0,0 +1,41 @@
+from typing import Any, Dict, Optional
+
+
+class RowCountModel:
+
+    def __init__(
+        self,
+        rows_affected: int = 0,
+        inserted: Optional[int] = None,
+        updated: Optional[int] = None,
+    ):
+        self.rows_affected = rows_affected
+        self.inserted = inserted
+        self.updated = updated
+
+    @property
+    def rows_written(self) -> int:
+        # rows_affected counts an updated row twice, so use the split when known
+        if self.inserted is None or self.updated is None:
+            return self.rows_affected
+        return self.inserted + self.updated
+
+    def add(self, other: "RowCountModel") -> None:
+        self.rows_affected += other.rows_affected
+        self.inserted = (
+            None
+            if self.inserted is None or other.inserted is None
+            else self.inserted + other.inserted
+        )
+        self.updated = (
+            None
+            if self.updated is None or other.updated is None
+            else self.updated + other.updated
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows_affected": self.rows_affected,
+            "rows_inserted": self.inserted,
+            "rows_updated": self.updated,
+        }
@@ -0,0 +1,16 @@
+from typing import List
+
+
+class TableSchemaModel:
+
+    def __init__(
+        self,
+        table_name: str,
+        fingerprint: str,
+        columns: List[str],
+        primary_key_columns: List[str],
+    ):
+        self.table_name = table_name
+        self.fingerprint = fingerprint
+        self.columns = columns
+        self.primary_key_columns = primary_key_columns
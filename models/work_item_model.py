@@ -0,0 +1,6 @@
+from typing import NamedTuple
+
+
+class WorkItemModel(NamedTuple):
+    questionnaire_name: str
+    deliveries: int = 0
@@ -0,0 +1,36 @@
+from typing import Any, Dict, List
+
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+
+
+class WorkItemResultsModel:
+
+    def __init__(
+        self,
+        questionnaire_results: List[QuestionnaireCopyResultModel],
+        requeued_questionnaires: List[str],
+        pending_count: int,
+    ):
+        self.questionnaire_results = questionnaire_results
+        self.requeued_questionnaires = requeued_questionnaires
+        self.pending_count = pending_count
+
+    @property
+    def failed_questionnaires(self) -> List[str]:
+        # a requeued questionnaire has not failed yet, another worker will retry it
+        return [
+            result.questionnaire_name
+            for result in self.questionnaire_results
+            if result.failed
+            and result.questionnaire_name not in self.requeued_questionnaires
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "questionnaires": [
+                questionnaire_result.to_dict()
+                for questionnaire_result in self.questionnaire_results
+            ],
+            "requeued": self.requeued_questionnaires,
+            "pending": self.pending_count,
+        }
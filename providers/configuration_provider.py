@@ -1,12 +1,45 @@
 import os
+import threading
+from typing import Optional
 
 from models.database_connection_model import DatabaseConnectionModel
 from models.blaise_connection_model import BlaiseConnectionModel
+from models.configuration_snapshot_model import ConfigurationSnapshotModel
+from models.copy_cases_configuration_model import (
+    CopyCasesConfigurationModel,
+    CopyMode,
+    ExecutionMode,
+    JoinStrategy,
+    WorkQueueBackend,
+)
+from models.profiling_configuration_model import (
+    ProfilingConfigurationModel,
+    ProfilingMode,
+)
 from utilities.custom_exceptions import ConfigError
 
 
 class ConfigurationProvider:
 
+    def __init__(self) -> None:
+        self._configuration_snapshot: Optional[ConfigurationSnapshotModel] = None
+        self._configuration_snapshot_lock = threading.Lock()
+
+    def get_configuration_snapshot(self) -> ConfigurationSnapshotModel:
+        """Reads and validates the environment on first use, then returns the same snapshot.
+
+        An invalid environment raises ConfigError every time rather than being cached.
+        """
+        with self._configuration_snapshot_lock:
+            if self._configuration_snapshot is None:
+                self._configuration_snapshot = ConfigurationSnapshotModel(
+                    database=self.get_database_connection_model(),
+                    blaise=self.get_blaise_connection_model(),
+                    copy_cases=self.get_copy_cases_configuration_model(),
+                    profiling=self.get_profiling_configuration_model(),
+                )
+            return self._configuration_snapshot
+
     def get_database_connection_model(self) -> DatabaseConnectionModel:
         return DatabaseConnectionModel(
             database_name=self.get_environment_variable("DATABASE_NAME"),
@@ -14,12 +47,189 @@ class ConfigurationProvider:
             database_password=self.get_environment_variable("DATABASE_PASSWORD"),
             database_ip_address=self.get_environment_variable("DATABASE_IP_ADDRESS"),
             database_port=self.get_database_port_environment_variable(),
+            database_pool_size=self.get_database_pool_size_environment_variable(),
+            database_pool_max_overflow=self.get_database_pool_max_overflow_environment_variable(),
+            database_pool_recycle_seconds=self.get_optional_integer_environment_variable(
+                "DATABASE_POOL_RECYCLE_SECONDS", 1800
+            ),
+            database_pool_pre_ping=self.get_optional_boolean_environment_variable(
+                "DATABASE_POOL_PRE_PING", True
+            ),
+            database_pool_timeout_seconds=self.get_optional_integer_environment_variable(
+                "DATABASE_POOL_TIMEOUT_SECONDS", 30
+            ),
+            database_connect_timeout_seconds=self.get_optional_integer_environment_variable(
+                "DATABASE_CONNECT_TIMEOUT_SECONDS", 10
+            ),
         )
 
     def get_blaise_connection_model(self) -> BlaiseConnectionModel:
         return BlaiseConnectionModel(
             blaise_api_url=self.get_environment_variable("BLAISE_API_URL"),
             blaise_server_park=self.get_environment_variable("BLAISE_SERVER_PARK"),
+            questionnaire_cache_ttl_seconds=self.get_optional_integer_environment_variable(
+                "BLAISE_QUESTIONNAIRE_CACHE_TTL_SECONDS", 60
+            ),
+        )
+
+    def get_copy_cases_configuration_model(self) -> CopyCasesConfigurationModel:
+        max_workers = self.get_optional_integer_environment_variable(
+            "COPY_CASES_MAX_WORKERS", 1
+        )
+        if max_workers < 1:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_MAX_WORKERS must be at least 1"
+            )
+
+        # every worker holds one pooled connection for its whole copy, so more
+        # workers than the pool can hand out would wait on each other until the
+        # pool timeout
+        pool_capacity = (
+            self.get_database_pool_size_environment_variable()
+            + self.get_database_pool_max_overflow_environment_variable()
+        )
+        if max_workers > pool_capacity:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_MAX_WORKERS must not be more than "
+                f"DATABASE_POOL_SIZE + DATABASE_POOL_MAX_OVERFLOW ({pool_capacity})"
+            )
+
+        copy_mode = os.getenv("COPY_CASES_MODE", CopyMode.FULL)
+        if copy_mode not in CopyMode.MODES:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_MODE must be one of: "
+                f"{list(CopyMode.MODES)}"
+            )
+
+        chunk_size = self.get_optional_integer_environment_variable(
+            "COPY_CASES_CHUNK_SIZE", 1000
+        )
+        if chunk_size < 1:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_CHUNK_SIZE must be at least 1"
+            )
+
+        execution_mode = os.getenv("COPY_CASES_EXECUTION", ExecutionMode.THREADS)
+        if execution_mode not in ExecutionMode.MODES:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_EXECUTION must be one of: "
+                f"{list(ExecutionMode.MODES)}"
+            )
+        if execution_mode == ExecutionMode.ASYNC and copy_mode != CopyMode.FULL:
+            raise ConfigError(
+                "Environment variable COPY_CASES_EXECUTION 'async' only supports "
+                "COPY_CASES_MODE 'full'"
+            )
+
+        join_strategy = os.getenv("COPY_CASES_JOIN_STRATEGY", JoinStrategy.AUTO)
+        if join_strategy not in JoinStrategy.STRATEGIES:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_JOIN_STRATEGY must be one of: "
+                f"{list(JoinStrategy.STRATEGIES)}"
+            )
+
+        retry_attempts = self.get_optional_integer_environment_variable(
+            "COPY_CASES_RETRY_ATTEMPTS", 3
+        )
+        if retry_attempts < 1:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_RETRY_ATTEMPTS must be at least 1"
+            )
+
+        work_queue = os.getenv("COPY_CASES_WORK_QUEUE", WorkQueueBackend.MYSQL)
+        if work_queue not in WorkQueueBackend.BACKENDS:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_WORK_QUEUE must be one of: "
+                f"{list(WorkQueueBackend.BACKENDS)}"
+            )
+
+        work_queue_max_deliveries = self.get_optional_integer_environment_variable(
+            "COPY_CASES_WORK_QUEUE_MAX_DELIVERIES", 10
+        )
+        if work_queue_max_deliveries < 1:
+            raise ConfigError(
+                f"Environment variable COPY_CASES_WORK_QUEUE_MAX_DELIVERIES must be "
+                f"at least 1"
+            )
+
+        return CopyCasesConfigurationModel(
+            max_workers=max_workers,
+            copy_mode=copy_mode,
+            chunk_size=chunk_size,
+            chunk_pause_milliseconds=self.get_optional_integer_environment_variable(
+                "COPY_CASES_CHUNK_PAUSE_MILLISECONDS", 0
+            ),
+            watermark_column=os.getenv(
+                "COPY_CASES_WATERMARK_COLUMN", "QEdit_LastUpdated"
+            ),
+            watermark_table=os.getenv(
+                "COPY_CASES_WATERMARK_TABLE", "copy_cases_watermark"
+            ),
+            execution_mode=execution_mode,
+            join_strategy=join_strategy,
+            edited_set_min_rows=self.get_optional_integer_environment_variable(
+                "COPY_CASES_EDITED_SET_MIN_ROWS", 50000
+            ),
+            retry_attempts=retry_attempts,
+            retry_base_delay_milliseconds=self.get_optional_integer_environment_variable(
+                "COPY_CASES_RETRY_BASE_DELAY_MILLISECONDS", 100
+            ),
+            retry_max_delay_milliseconds=self.get_optional_integer_environment_variable(
+                "COPY_CASES_RETRY_MAX_DELAY_MILLISECONDS", 2000
+            ),
+            requeue_limit=self.get_optional_integer_environment_variable(
+                "COPY_CASES_REQUEUE_LIMIT", 1
+            ),
+            work_queue=work_queue,
+            work_queue_path=os.getenv(
+                "COPY_CASES_WORK_QUEUE_PATH", "/tmp/copy_cases_work_queue.sqlite3"
+            ),
+            work_queue_visibility_timeout_seconds=self.get_optional_integer_environment_variable(
+                "COPY_CASES_WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS", 600
+            ),
+            work_queue_max_deliveries=work_queue_max_deliveries,
+            work_queue_shared=self.get_optional_boolean_environment_variable(
+                "COPY_CASES_WORK_QUEUE_SHARED", False
+            ),
+            questionnaire_locks=self.get_optional_boolean_environment_variable(
+                "COPY_CASES_QUESTIONNAIRE_LOCKS", True
+            ),
+            lock_timeout_seconds=self.get_optional_integer_environment_variable(
+                "COPY_CASES_LOCK_TIMEOUT_SECONDS", 0
+            ),
+        )
+
+    def get_profiling_configuration_model(self) -> ProfilingConfigurationModel:
+        mode = os.getenv("PROFILING_MODE", ProfilingMode.OFF)
+        if mode not in ProfilingMode.MODES:
+            raise ConfigError(
+                f"Environment variable PROFILING_MODE must be one of: "
+                f"{list(ProfilingMode.MODES)}"
+            )
+
+        sample_interval_milliseconds = self.get_optional_integer_environment_variable(
+            "PROFILING_SAMPLE_INTERVAL_MILLISECONDS", 5
+        )
+        if sample_interval_milliseconds < 1:
+            raise ConfigError(
+                f"Environment variable PROFILING_SAMPLE_INTERVAL_MILLISECONDS "
+                f"must be at least 1"
+            )
+
+        return ProfilingConfigurationModel(
+            mode=mode,
+            top_count=self.get_optional_integer_environment_variable(
+                "PROFILING_TOP_COUNT", 20
+            ),
+            sample_interval_milliseconds=sample_interval_milliseconds,
+        )
+
+    def get_database_pool_size_environment_variable(self) -> int:
+        return self.get_optional_integer_environment_variable("DATABASE_POOL_SIZE", 5)
+
+    def get_database_pool_max_overflow_environment_variable(self) -> int:
+        return self.get_optional_integer_environment_variable(
+            "DATABASE_POOL_MAX_OVERFLOW", 2
         )
 
     def get_database_port_environment_variable(self) -> int:
@@ -34,3 +244,30 @@ class ConfigurationProvider:
         if environment_variable is None or environment_variable == "":
             raise ConfigError(f"Missing environment variable: {variable_name}")
         return environment_variable
+
+    @staticmethod
+    def get_optional_integer_environment_variable(
+        variable_name: str, default: int
+    ) -> int:
+        environment_variable = os.getenv(variable_name, None)
+        if environment_variable is None or environment_variable == "":
+            return default
+        if not environment_variable.isnumeric():
+            raise ConfigError(f"Environment variable {variable_name} must be a number")
+        return int(environment_variable)
+
+    @staticmethod
+    def get_optional_boolean_environment_variable(
+        variable_name: str, default: bool
+    ) -> bool:
+        environment_variable = os.getenv(variable_name, None)
+        if environment_variable is None or environment_variable == "":
+            return default
+        if environment_variable.lower() in ("true", "1", "yes"):
+            return True
+        if environment_variable.lower() in ("false", "0", "no"):
+            return False
+        raise ConfigError(f"Environment variable {variable_name} must be a boolean")
+
+
+configuration_provider = ConfigurationProvider()
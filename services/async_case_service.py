@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from models.copy_cases_configuration_model import (
+    CopyCasesConfigurationModel,
+    CopyMode,
+    JoinStrategy,
+)
+from models.copy_cases_result_model import CopyCasesResultModel
+from models.copy_plan_model import CopyPlanModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from services.async_database_service import AsyncDatabaseService
+from services.blaise_service import BlaiseService
+from services.case_service import CaseService
+from utilities.logging import log_stage
+from utilities.retry_policy import RetryPolicy
+
+
+class AsyncCaseService:
+    """Copies cases on one event loop instead of a thread per questionnaire.
+
+    The questionnaire fetch overlaps with opening the first database connection,
+    and the copies run concurrently up to max_workers at a time.
+    """
+
+    def __init__(
+        self,
+        async_database_service: AsyncDatabaseService,
+        blaise_service: BlaiseService,
+        copy_cases_configuration_model: CopyCasesConfigurationModel,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> None:
+        self._database_service = async_database_service
+        self._blaise_service = blaise_service
+        self._copy_cases_configuration = copy_cases_configuration_model
+        self._retry_policy = retry_policy or RetryPolicy(
+            max_attempts=copy_cases_configuration_model.retry_attempts,
+            base_delay_seconds=(
+                copy_cases_configuration_model.retry_base_delay_milliseconds / 1000
+            ),
+            max_delay_seconds=(
+                copy_cases_configuration_model.retry_max_delay_milliseconds / 1000
+            ),
+        )
+
+    async def copy_cases(
+        self,
+        survey_types: Union[str, List[str]],
+        refresh_questionnaires: bool = False,
+    ) -> CopyCasesResultModel:
+        start_time = time.perf_counter()
+        if isinstance(survey_types, str):
+            survey_types = [survey_types]
+
+        async with AsyncExitStack() as exit_stack:
+            # the Blaise REST client is blocking, so it runs on a worker thread
+            # while the event loop checks a connection out of the pool
+            connecting = asyncio.ensure_future(
+                exit_stack.enter_async_context(
+                    self._database_service.database.connect()
+                )
+            )
+            try:
+                questionnaire_index = await asyncio.to_thread(
+                    self._blaise_service.get_questionnaire_index,
+                    refresh_questionnaires,
+                )
+            except BaseException:
+                # wait for the connection, so the exit stack gives it back
+                await asyncio.gather(connecting, return_exceptions=True)
+                raise
+            connection = await connecting
+
+            questionnaire_names = [
+                questionnaire["name"]
+                for questionnaire in questionnaire_index.resolve(survey_types)
+            ]
+            copy_plan = await self.get_copy_plan(connection, questionnaire_names)
+
+        CaseService.record_copy_plan_metrics(copy_plan)
+        questionnaire_results = await self._copy_questionnaires(
+            copy_plan.copyable
+        ) + CaseService.missing_table_results(copy_plan)
+        return CopyCasesResultModel(
+            survey_types,
+            copy_plan,
+            questionnaire_results,
+            duration_ms=round((time.perf_counter() - start_time) * 1000, 3),
+        )
+
+    async def get_copy_plan(self, connection, questionnaire_names: List[str]):
+        table_names = CopyPlanModel.table_names(questionnaire_names)
+        with log_stage("table_existence_check", table_count=len(table_names)):
+            table_fingerprints = await self._database_service.get_table_fingerprints(
+                connection, table_names
+            )
+
+        return CopyPlanModel.from_existing_tables(
+            questionnaire_names, table_fingerprints.keys()
+        )
+
+    async def _copy_questionnaires(
+        self, questionnaire_names: List[str]
+    ) -> List[QuestionnaireCopyResultModel]:
+        semaphore = asyncio.Semaphore(self._copy_cases_configuration.max_workers)
+
+        async def copy_with_limit(
+            questionnaire_name: str,
+            previous_result: Optional[QuestionnaireCopyResultModel],
+        ):
+            async with semaphore:
+                return await self.try_copy_cases_for_questionnaire(
+                    questionnaire_name, previous_result
+                )
+
+        results: Dict[str, QuestionnaireCopyResultModel] = {}
+        previous_results: Dict[str, QuestionnaireCopyResultModel] = {}
+        pending_names = questionnaire_names
+        requeue_limit = self._copy_cases_configuration.requeue_limit
+
+        for round_number in range(requeue_limit + 1):
+            round_results = await asyncio.gather(
+                *(
+                    copy_with_limit(
+                        questionnaire_name, previous_results.get(questionnaire_name)
+                    )
+                    for questionnaire_name in pending_names
+                )
+            )
+            requeued_names = []
+            for questionnaire_name, result in zip(pending_names, round_results):
+                results[questionnaire_name] = result
+                if CaseService.should_requeue(result) and round_number < requeue_limit:
+                    requeued_names.append(questionnaire_name)
+                    previous_results[questionnaire_name] = result
+
+            if not requeued_names:
+                break
+            logging.warning(f"Requeuing after lock conflicts: {requeued_names}")
+            pending_names = requeued_names
+
+        return [
+            results[questionnaire_name] for questionnaire_name in questionnaire_names
+        ]
+
+    async def try_copy_cases_for_questionnaire(
+        self,
+        questionnaire_name: str,
+        previous_result: Optional[QuestionnaireCopyResultModel] = None,
+    ) -> QuestionnaireCopyResultModel:
+        previous_attempts = 0
+        previous_duration_ms = 0.0
+        if previous_result is not None:
+            previous_attempts = previous_result.attempts
+            previous_duration_ms = previous_result.duration_ms or 0.0
+
+        start_time = time.perf_counter()
+        try:
+            # the lock and the copy share one connection, so each questionnaire
+            # only ever holds one connection from the pool
+            async with AsyncExitStack() as exit_stack:
+                connection = await exit_stack.enter_async_context(
+                    self._database_service.database.connect()
+                )
+                lock_acquired = await exit_stack.enter_async_context(
+                    self.questionnaire_lock(connection, questionnaire_name)
+                )
+                if lock_acquired:
+                    result, attempts = await self._retry_policy.call_async(
+                        questionnaire_name,
+                        lambda: self.copy_cases_for_questionnaire(
+                            connection, questionnaire_name
+                        ),
+                    )
+                    result.attempts = previous_attempts + attempts
+                else:
+                    result = CaseService.questionnaire_locked_result(questionnaire_name)
+        except Exception as e:
+            error_message = f"Error copying cases for '{questionnaire_name}': {e}"
+            logging.error(error_message)
+            result = QuestionnaireCopyResultModel(
+                questionnaire_name,
+                QuestionnaireCopyResultModel.FAILED,
+                str(e),
+                attempts=previous_attempts + RetryPolicy.get_attempts(e),
+                retryable=RetryPolicy.is_retryable(e),
+            )
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        result.duration_ms = round(previous_duration_ms + duration_ms, 3)
+        CaseService.record_copy_metrics(
+            result,
+            self._copy_cases_configuration.copy_mode,
+            result.attempts - previous_attempts,
+            duration_ms,
+        )
+        return result
+
+    @asynccontextmanager
+    async def questionnaire_lock(
+        self, connection: AsyncConnection, questionnaire_name: str
+    ) -> AsyncIterator[bool]:
+        """Takes the questionnaire's named lock on the connection the copy runs on.
+
+        MySQL named locks belong to the session and survive its COMMITs, so the
+        lock is held for the whole copy without a second connection.
+        """
+        if not self._copy_cases_configuration.questionnaire_locks:
+            yield True
+            return
+
+        lock_name = f"copy_cases_to_edit.{questionnaire_name}"
+        lock_timeout_seconds = self._copy_cases_configuration.lock_timeout_seconds
+        with log_stage(
+            "questionnaire_lock",
+            questionnaire_name=questionnaire_name,
+            timeout_seconds=lock_timeout_seconds,
+        ) as stage_fields:
+            lock_acquired = await self._database_service.acquire_named_lock(
+                connection, lock_name, lock_timeout_seconds
+            )
+            stage_fields["acquired"] = lock_acquired
+        try:
+            yield lock_acquired
+        finally:
+            if lock_acquired:
+                await self._database_service.release_named_lock(connection, lock_name)
+
+    async def copy_cases_for_questionnaire(
+        self, connection: AsyncConnection, questionnaire_name: str
+    ) -> QuestionnaireCopyResultModel:
+        logging.info(f"copy_cases_to_edit for '{questionnaire_name}'")
+        with log_stage(
+            "copy_questionnaire",
+            questionnaire_name=questionnaire_name,
+            copy_mode=CopyMode.FULL,
+        ) as stage_fields:
+            async with connection.begin():
+                join_strategy = await self.get_join_strategy(
+                    connection, f"{questionnaire_name}_Form"
+                )
+                stage_fields["join_strategy"] = join_strategy
+                row_counts = await self._database_service.copy_cases(
+                    connection,
+                    f"{questionnaire_name}_EDIT_Form",
+                    f"{questionnaire_name}_Form",
+                    join_strategy=join_strategy,
+                )
+            stage_fields.update(row_counts.to_dict())
+
+        return QuestionnaireCopyResultModel(
+            questionnaire_name,
+            QuestionnaireCopyResultModel.COPIED,
+            row_counts=row_counts,
+        )
+
+    async def get_join_strategy(self, connection, questionnaire_table_name: str) -> str:
+        if self._copy_cases_configuration.join_strategy != JoinStrategy.AUTO:
+            return self._copy_cases_configuration.join_strategy
+
+        return self._copy_cases_configuration.resolve_join_strategy(
+            await self._database_service.get_table_row_estimate(
+                connection, questionnaire_table_name
+            )
+        )
@@ -0,0 +1,81 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from models.copy_cases_configuration_model import JoinStrategy
+from models.row_count_model import RowCountModel
+from services.database_connection_service import DatabaseConnectionService
+from services.database_service import DatabaseService
+from services.table_schema_service import TableSchemaService
+
+
+class AsyncDatabaseService:
+    """Runs the DatabaseService statements on an asyncio engine.
+
+    The statements themselves are shared with DatabaseService, so both execution
+    modes copy cases in exactly the same way.
+    """
+
+    def __init__(
+        self,
+        database_connection_service: DatabaseConnectionService,
+        table_schema_service: Optional[TableSchemaService] = None,
+    ) -> None:
+        self._database_engine: AsyncEngine = (
+            database_connection_service.get_async_database()
+        )
+        self._table_schema_service = table_schema_service or TableSchemaService()
+
+    @property
+    def database(self) -> AsyncEngine:
+        return self._database_engine
+
+    async def get_table_fingerprints(
+        self, connection: AsyncConnection, table_names: List[str]
+    ) -> Dict[str, str]:
+        return await connection.run_sync(
+            self._table_schema_service.get_table_fingerprints, table_names
+        )
+
+    @staticmethod
+    async def get_table_row_estimate(
+        connection: AsyncConnection, table_name: str
+    ) -> int:
+        return await connection.run_sync(
+            DatabaseService.get_table_row_estimate, table_name
+        )
+
+    @staticmethod
+    async def acquire_named_lock(
+        connection: AsyncConnection, lock_name: str, timeout_seconds: int
+    ) -> bool:
+        return await connection.run_sync(
+            DatabaseService.acquire_named_lock, lock_name, timeout_seconds
+        )
+
+    @staticmethod
+    async def release_named_lock(connection: AsyncConnection, lock_name: str) -> None:
+        await connection.run_sync(DatabaseService.release_named_lock, lock_name)
+
+    async def copy_cases(
+        self,
+        connection: AsyncConnection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        join_strategy: str = JoinStrategy.LEFT_JOIN,
+    ) -> RowCountModel:
+        def copy_cases(sync_connection) -> RowCountModel:
+            with DatabaseService.edited_set(
+                sync_connection, edit_table_name, join_strategy
+            ) as edited_set_table_name:
+                return DatabaseService.execute_copy(
+                    sync_connection,
+                    edit_table_name,
+                    questionnaire_table_name,
+                    self._table_schema_service.get_copy_columns(
+                        sync_connection, edit_table_name, questionnaire_table_name
+                    ),
+                    edited_set_table_name=edited_set_table_name,
+                )
+
+        return await connection.run_sync(copy_cases)
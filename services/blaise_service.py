@@ -1,37 +1,134 @@
 import logging
-from typing import Any, Dict, List
+import threading
+import time
+from typing import Any, Dict, List, Optional
 
 import blaise_restapi
+import requests
 
 from providers.configuration_provider import ConfigurationProvider
 from utilities.custom_exceptions import BlaiseError
-from utilities.logging import function_name
+from utilities.logging import function_name, log_stage
+from utilities.metrics import metrics
+from utilities.questionnaire_index import QuestionnaireIndex
+from utilities.ttl_cache import TtlCache
+
+questionnaire_cache = TtlCache()
+
+
+class SessionRestApiClient(blaise_restapi.Client):
+    """Blaise REST API client that fetches questionnaires over a shared session.
+
+    blaise_restapi.Client opens a new connection for every request. The
+    questionnaire list is fetched through a requests.Session instead, so warm
+    invocations keep the connection to the REST API alive.
+    """
+
+    def __init__(
+        self, restapi_url: str, session: Optional[requests.Session] = None
+    ) -> None:
+        super().__init__(restapi_url)
+        self.restapi_url = restapi_url
+        self.session = session or requests.Session()
+
+    def get_all_questionnaires_for_server_park(
+        self, server_park: str
+    ) -> List[Dict[str, Any]]:
+        response = self.session.get(
+            f"{self.restapi_url}/api/v2/serverparks/{server_park}/questionnaires"
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+_restapi_clients: Dict[str, SessionRestApiClient] = {}
+_restapi_clients_lock = threading.Lock()
+
+
+def get_restapi_client(restapi_url: str) -> SessionRestApiClient:
+    # clients, and their sessions, are kept for the life of the process so warm
+    # invocations reuse their connections
+    with _restapi_clients_lock:
+        if restapi_url not in _restapi_clients:
+            _restapi_clients[restapi_url] = SessionRestApiClient(restapi_url)
+        return _restapi_clients[restapi_url]
 
 
 class BlaiseService:
-    def __init__(self, configuration_provider: ConfigurationProvider) -> None:
+    def __init__(
+        self,
+        configuration_provider: ConfigurationProvider,
+        questionnaire_ttl_cache: Optional[TtlCache] = None,
+    ) -> None:
         self._configuration_provider = configuration_provider
         self._blaise_connection_model = (
-            self._configuration_provider.get_blaise_connection_model()
+            self._configuration_provider.get_configuration_snapshot().blaise
         )
 
-        self.restapi_client = blaise_restapi.Client(
+        self.restapi_client = get_restapi_client(
             f"http://{self._blaise_connection_model.blaise_api_url}"
         )
 
         self._server_park_name = self._blaise_connection_model.blaise_server_park
+        self._questionnaire_cache = questionnaire_ttl_cache or questionnaire_cache
+
+    def get_questionnaires(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        return self.get_questionnaire_index(refresh).questionnaires
 
-    def get_questionnaires(self) -> List[Dict[str, Any]]:
-        try:
-            questionnaires = self.restapi_client.get_all_questionnaires_for_server_park(
-                self._server_park_name
+    def get_questionnaire_index(self, refresh: bool = False) -> QuestionnaireIndex:
+        """Returns the server park's questionnaires indexed by name.
+
+        The index is built once per fetch and cached in place of the list, so
+        invocations served from the cache do not sort the questionnaires again.
+        """
+        with log_stage(
+            "questionnaire_fetch", server_park=self._server_park_name
+        ) as stage_fields:
+            if refresh:
+                self.invalidate_questionnaire_cache()
+            else:
+                questionnaire_index = self._questionnaire_cache.get(
+                    self._server_park_name
+                )
+                if questionnaire_index is not None:
+                    logging.info(f"Got questionnaires from cache")
+                    metrics.increment("blaise_questionnaire_fetches", cached=True)
+                    stage_fields.update(
+                        cached=True,
+                        questionnaire_count=len(questionnaire_index.questionnaires),
+                    )
+                    return questionnaire_index
+
+            start_time = time.perf_counter()
+            try:
+                questionnaires = (
+                    self.restapi_client.get_all_questionnaires_for_server_park(
+                        self._server_park_name
+                    )
+                )
+                logging.info(f"Got questionnaires")
+            except Exception as e:
+                metrics.increment("blaise_questionnaire_fetch_errors")
+                error_message = (
+                    f"Exception caught in {function_name()}. "
+                    f"Error getting questionnaires: {e}"
+                )
+                logging.error(error_message)
+                raise BlaiseError(error_message)
+
+            metrics.increment("blaise_questionnaire_fetches", cached=False)
+            metrics.observe(
+                "blaise_questionnaire_fetch_duration_ms",
+                (time.perf_counter() - start_time) * 1000,
             )
-            logging.info(f"Got questionnaires")
-            return questionnaires
-        except Exception as e:
-            error_message = (
-                f"Exception caught in {function_name()}. "
-                f"Error getting questionnaires: {e}"
+            stage_fields.update(cached=False, questionnaire_count=len(questionnaires))
+            questionnaire_index = QuestionnaireIndex(questionnaires)
+            self._questionnaire_cache.set(
+                self._server_park_name,
+                questionnaire_index,
+                self._blaise_connection_model.questionnaire_cache_ttl_seconds,
             )
-            logging.error(error_message)
-            raise BlaiseError(error_message)
+            return questionnaire_index
+
+    def invalidate_questionnaire_cache(self) -> None:
+        self._questionnaire_cache.invalidate(self._server_park_name)
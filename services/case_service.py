@@ -1,50 +1,742 @@
+import contextvars
 import logging
-from typing import Any, Dict, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
+from sqlalchemy import Connection
+
+from models.copy_cases_configuration_model import (
+    CopyCasesConfigurationModel,
+    CopyMode,
+    JoinStrategy,
+)
+from models.copy_cases_result_model import CopyCasesResultModel
+from models.copy_estimate_model import CopyEstimateModel
+from models.copy_plan_model import CopyPlanModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from models.row_count_model import RowCountModel
 from services.blaise_service import BlaiseService
 from services.database_service import DatabaseService
+from utilities.copy_cost_model import CopyCostModel
+from utilities.logging import log_stage
+from utilities.metrics import metrics
+from utilities.questionnaire_index import QuestionnaireIndex
+from utilities.retry_policy import RetryPolicy
+
+CopyStrategy = Callable[[Connection, str, str, str, Dict[str, Any]], RowCountModel]
 
 
 class CaseService:
     def __init__(
-        self, database_service: DatabaseService, blaise_service: BlaiseService
+        self,
+        database_service: DatabaseService,
+        blaise_service: BlaiseService,
+        copy_cases_configuration_model: Optional[CopyCasesConfigurationModel] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        copy_cost_model: Optional[CopyCostModel] = None,
     ) -> None:
         self._database_service = database_service
         self._blaise_service = blaise_service
+        self._copy_cases_configuration = (
+            copy_cases_configuration_model or CopyCasesConfigurationModel()
+        )
+        self._retry_policy = retry_policy or RetryPolicy(
+            max_attempts=self._copy_cases_configuration.retry_attempts,
+            base_delay_seconds=(
+                self._copy_cases_configuration.retry_base_delay_milliseconds / 1000
+            ),
+            max_delay_seconds=(
+                self._copy_cases_configuration.retry_max_delay_milliseconds / 1000
+            ),
+        )
+        self._copy_cost_model = copy_cost_model or CopyCostModel(
+            chunk_size=self._copy_cases_configuration.chunk_size
+        )
 
-    def copy_cases(self, survey_type: str):
-        questionnaires = self._blaise_service.get_questionnaires()
+    def copy_cases(
+        self,
+        survey_types: Union[str, List[str]],
+        refresh_questionnaires: bool = False,
+    ) -> CopyCasesResultModel:
+        start_time = time.perf_counter()
+        survey_types, copy_plan = self.resolve_copy_plan(
+            survey_types, refresh_questionnaires
+        )
+        self.record_copy_plan_metrics(copy_plan)
+        questionnaire_results = self._copy_questionnaires(
+            copy_plan.copyable
+        ) + self.missing_table_results(copy_plan)
+        return CopyCasesResultModel(
+            survey_types,
+            copy_plan,
+            questionnaire_results,
+            duration_ms=round((time.perf_counter() - start_time) * 1000, 3),
+        )
+
+    def estimate_copy_cases(
+        self,
+        survey_types: Union[str, List[str]],
+        refresh_questionnaires: bool = False,
+        explain: bool = False,
+    ) -> CopyCasesResultModel:
+        """Resolves questionnaires and counts the work a copy would do, without writing."""
+        survey_types, copy_plan = self.resolve_copy_plan(
+            survey_types, refresh_questionnaires
+        )
+        estimates = []
+        with self._database_service.database.connect() as connection:
+            for questionnaire_name in copy_plan.copyable:
+                estimates.append(
+                    self.estimate_copy_cases_for_questionnaire(
+                        connection, questionnaire_name, explain
+                    )
+                )
+
+        return CopyCasesResultModel(
+            survey_types, copy_plan, self.missing_table_results(copy_plan), estimates
+        )
+
+    def estimate_copy_cases_for_questionnaire(
+        self, connection: Connection, questionnaire_name: str, explain: bool = False
+    ) -> CopyEstimateModel:
+        questionnaire_table_name = f"{questionnaire_name}_Form"
+        edit_table_name = f"{questionnaire_name}_EDIT_Form"
+
+        with log_stage(
+            "estimate_questionnaire", questionnaire_name=questionnaire_name
+        ) as stage_fields:
+            row_estimates = self._database_service.estimate_copy_cases(
+                connection, edit_table_name, questionnaire_table_name
+            )
+            stage_fields.update(row_estimates)
+
+        explain_plan = None
+        if explain:
+            explain_plan = self._database_service.explain_copy_cases(
+                connection, edit_table_name, questionnaire_table_name
+            )
+
+        return CopyEstimateModel(
+            questionnaire_name, explain_plan=explain_plan, **row_estimates
+        )
+
+    def resolve_copy_plan(
+        self, survey_types: Union[str, List[str]], refresh_questionnaires: bool
+    ) -> Tuple[List[str], CopyPlanModel]:
+        if isinstance(survey_types, str):
+            survey_types = [survey_types]
+
+        questionnaire_index = self._blaise_service.get_questionnaire_index(
+            refresh=refresh_questionnaires
+        )
+        questionnaire_names = [
+            questionnaire["name"]
+            for questionnaire in questionnaire_index.resolve(survey_types)
+        ]
+        return survey_types, self.get_copy_plan(questionnaire_names)
+
+    @staticmethod
+    def record_copy_plan_metrics(copy_plan: CopyPlanModel) -> None:
+        for status, questionnaire_names in (
+            ("copyable", copy_plan.copyable),
+            ("missing_edit_table", copy_plan.missing_edit_table),
+            ("missing_questionnaire_table", copy_plan.missing_questionnaire_table),
+        ):
+            metrics.set_gauge(
+                "copy_plan_questionnaires", len(questionnaire_names), status=status
+            )
+
+    @staticmethod
+    def record_copy_metrics(
+        result: QuestionnaireCopyResultModel,
+        copy_mode: str,
+        attempts: int,
+        duration_ms: float,
+    ) -> None:
+        """Records one try at copying a questionnaire.
 
-        for questionnaire in self.filter_questionnaires_by_survey_type(
-            questionnaires, survey_type
+        A requeued questionnaire is recorded once per try, with only that try's
+        attempts and duration, so the totals are not counted twice.
+        """
+        metrics.increment("questionnaire_copies", status=result.status)
+        metrics.observe(
+            "questionnaire_copy_duration_ms",
+            duration_ms,
+            status=result.status,
+            copy_mode=copy_mode,
+        )
+        if result.status in (
+            QuestionnaireCopyResultModel.COPIED,
+            QuestionnaireCopyResultModel.FAILED,
         ):
-            self.copy_cases_for_questionnaire(questionnaire["name"])
+            metrics.increment("questionnaire_copy_attempts", attempts)
+        if result.row_counts is not None:
+            metrics.increment("rows_copied", result.row_counts.rows_written)
+            if result.row_counts.inserted is not None:
+                metrics.increment("rows_inserted", result.row_counts.inserted)
+            if result.row_counts.updated is not None:
+                metrics.increment("rows_updated", result.row_counts.updated)
+
+    @staticmethod
+    def missing_table_results(
+        copy_plan: CopyPlanModel,
+    ) -> List[QuestionnaireCopyResultModel]:
+        return [
+            CaseService._edit_table_missing_result(questionnaire_name)
+            for questionnaire_name in copy_plan.missing_edit_table
+        ] + [
+            CaseService._questionnaire_table_missing_result(questionnaire_name)
+            for questionnaire_name in copy_plan.missing_questionnaire_table
+        ]
+
+    def get_copy_plan(self, questionnaire_names: List[str]) -> CopyPlanModel:
+        table_names = CopyPlanModel.table_names(questionnaire_names)
+        with log_stage("table_existence_check", table_count=len(table_names)):
+            with self._database_service.database.connect() as connection:
+                # the fingerprints are kept so the copies can reuse cached schemas
+                table_fingerprints = self._database_service.get_table_fingerprints(
+                    connection, table_names
+                )
+
+        return CopyPlanModel.from_existing_tables(
+            questionnaire_names, table_fingerprints.keys()
+        )
+
+    def _copy_questionnaires(
+        self, questionnaire_names: List[str]
+    ) -> List[QuestionnaireCopyResultModel]:
+        """Copies each questionnaire, requeuing lock conflicts after everything else.
+
+        A questionnaire that keeps hitting locked rows after its retries is tried
+        again once the rest have finished, when editors may have moved on.
+        """
+        results: Dict[str, QuestionnaireCopyResultModel] = {}
+        previous_results: Dict[str, QuestionnaireCopyResultModel] = {}
+        pending_names = questionnaire_names
+        requeue_limit = self._copy_cases_configuration.requeue_limit
 
-    def copy_cases_for_questionnaire(self, questionnaire_name: str):
+        for round_number in range(requeue_limit + 1):
+            requeued_names = []
+            round_results = self._copy_questionnaire_round(
+                pending_names, previous_results
+            )
+            for questionnaire_name, result in zip(pending_names, round_results):
+                results[questionnaire_name] = result
+                if self.should_requeue(result) and round_number < requeue_limit:
+                    requeued_names.append(questionnaire_name)
+                    previous_results[questionnaire_name] = result
+
+            if not requeued_names:
+                break
+            logging.warning(f"Requeuing after lock conflicts: {requeued_names}")
+            pending_names = requeued_names
+
+        return [
+            results[questionnaire_name] for questionnaire_name in questionnaire_names
+        ]
+
+    @staticmethod
+    def should_requeue(result: QuestionnaireCopyResultModel) -> bool:
+        return result.status == QuestionnaireCopyResultModel.FAILED and result.retryable
+
+    def _copy_questionnaire_round(
+        self,
+        questionnaire_names: List[str],
+        previous_results: Dict[str, QuestionnaireCopyResultModel],
+    ) -> List[QuestionnaireCopyResultModel]:
+        max_workers = min(
+            self._copy_cases_configuration.max_workers, len(questionnaire_names)
+        )
+        if max_workers <= 1:
+            return [
+                self.try_copy_cases_for_questionnaire(
+                    questionnaire_name, previous_results.get(questionnaire_name)
+                )
+                for questionnaire_name in questionnaire_names
+            ]
+
+        # each worker checks out its own connection from the engine's pool, and
+        # runs in a copy of this context so its metrics go to this invocation
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda context, questionnaire_name: context.run(
+                        self.try_copy_cases_for_questionnaire,
+                        questionnaire_name,
+                        previous_results.get(questionnaire_name),
+                    ),
+                    [contextvars.copy_context() for _ in questionnaire_names],
+                    questionnaire_names,
+                )
+            )
+
+    def try_copy_cases_for_questionnaire(
+        self,
+        questionnaire_name: str,
+        previous_result: Optional[QuestionnaireCopyResultModel] = None,
+        check_edit_table_exists: bool = False,
+    ) -> QuestionnaireCopyResultModel:
+        previous_attempts = 0
+        previous_duration_ms = 0.0
+        if previous_result is not None:
+            previous_attempts = previous_result.attempts
+            previous_duration_ms = previous_result.duration_ms or 0.0
+
+        start_time = time.perf_counter()
+        try:
+            # the lock and the copy share one connection, so each questionnaire
+            # only ever holds one connection from the pool
+            with ExitStack() as exit_stack:
+                connection = exit_stack.enter_context(
+                    self._database_service.database.connect()
+                )
+                lock_acquired = exit_stack.enter_context(
+                    self.questionnaire_lock(connection, questionnaire_name)
+                )
+                if lock_acquired:
+                    # chunked copies, including those chosen by the adaptive
+                    # mode, retry each chunk instead, and an exhausted chunk is
+                    # not retried again here, so a conflict does not restart
+                    # the chunks that have already been committed
+                    result, attempts = self._retry_policy.call(
+                        questionnaire_name,
+                        lambda: self.copy_cases_for_questionnaire(
+                            connection,
+                            questionnaire_name,
+                            check_edit_table_exists=check_edit_table_exists,
+                        ),
+                    )
+                    result.attempts = previous_attempts + attempts
+                else:
+                    result = self.questionnaire_locked_result(questionnaire_name)
+        except Exception as e:
+            error_message = f"Error copying cases for '{questionnaire_name}': {e}"
+            logging.error(error_message)
+            result = QuestionnaireCopyResultModel(
+                questionnaire_name,
+                QuestionnaireCopyResultModel.FAILED,
+                str(e),
+                attempts=previous_attempts + RetryPolicy.get_attempts(e),
+                retryable=RetryPolicy.is_retryable(e),
+            )
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        result.duration_ms = round(previous_duration_ms + duration_ms, 3)
+        self.record_copy_metrics(
+            result,
+            self._copy_cases_configuration.copy_mode,
+            result.attempts - previous_attempts,
+            duration_ms,
+        )
+        return result
+
+    @contextmanager
+    def questionnaire_lock(
+        self, connection: Connection, questionnaire_name: str
+    ) -> Iterator[bool]:
+        """Takes the questionnaire's named lock, yielding False if another copy holds it.
+
+        Overlapping invocations for the same survey would otherwise run the same
+        copy against the same edit table, contending on its row locks. MySQL
+        named locks belong to the session, not a transaction, and survive its
+        COMMITs, so the copy runs on the same connection that holds the lock.
+        """
+        if not self._copy_cases_configuration.questionnaire_locks:
+            yield True
+            return
+
+        lock_timeout_seconds = self._copy_cases_configuration.lock_timeout_seconds
+        with ExitStack() as exit_stack:
+            # only the wait for the lock is timed, not the copy it protects
+            with log_stage(
+                "questionnaire_lock",
+                questionnaire_name=questionnaire_name,
+                timeout_seconds=lock_timeout_seconds,
+            ) as stage_fields:
+                lock_acquired = exit_stack.enter_context(
+                    self._database_service.named_lock(
+                        connection,
+                        f"copy_cases_to_edit.{questionnaire_name}",
+                        lock_timeout_seconds,
+                    )
+                )
+                stage_fields["acquired"] = lock_acquired
+            yield lock_acquired
+
+    def copy_cases_for_questionnaire(
+        self,
+        connection: Connection,
+        questionnaire_name: str,
+        check_edit_table_exists: bool = True,
+    ) -> QuestionnaireCopyResultModel:
         logging.info(f"copy_cases_to_edit for '{questionnaire_name}'")
         questionnaire_table_name = f"{questionnaire_name}_Form"
         edit_table_name = f"{questionnaire_name}_EDIT_Form"
 
-        with self._database_service.database.begin() as connection:
-            if not self._database_service.table_exists(connection, edit_table_name):
-                error_message = (
-                    f"Edit questionnaire missing for: '{questionnaire_name}'"
+        if check_edit_table_exists:
+            with connection.begin():
+                if not self._database_service.table_exists(connection, edit_table_name):
+                    return self._edit_table_missing_result(questionnaire_name)
+
+        copy_mode = self._copy_cases_configuration.copy_mode
+        with log_stage(
+            "copy_questionnaire",
+            questionnaire_name=questionnaire_name,
+            copy_mode=copy_mode,
+        ) as stage_fields:
+            row_counts = self.get_copy_strategies()[copy_mode](
+                connection,
+                questionnaire_name,
+                edit_table_name,
+                questionnaire_table_name,
+                stage_fields,
+            )
+            stage_fields.update(row_counts.to_dict())
+
+        return QuestionnaireCopyResultModel(
+            questionnaire_name,
+            QuestionnaireCopyResultModel.COPIED,
+            row_counts=row_counts,
+        )
+
+    def get_copy_strategies(self) -> Dict[str, CopyStrategy]:
+        """Maps each copy mode to the method that copies a questionnaire that way.
+
+        Every strategy takes the questionnaire's connection, the questionnaire
+        name, the edit and questionnaire table names, and the copy stage's log
+        fields, and returns the row counts. Strategies open their transactions on
+        that connection rather than checking out another one.
+        """
+        return {
+            CopyMode.FULL: self.copy_cases_in_full,
+            CopyMode.CHUNKED: (
+                lambda connection, _, edit_table_name, questionnaire_table_name, __: (
+                    self.copy_cases_in_chunks(
+                        connection, edit_table_name, questionnaire_table_name
+                    )
                 )
-                logging.error(error_message)
-                return
+            ),
+            CopyMode.INCREMENTAL: (
+                lambda connection, questionnaire_name, edit_table_name, questionnaire_table_name, _: (
+                    self.copy_cases_incrementally(
+                        connection,
+                        questionnaire_name,
+                        edit_table_name,
+                        questionnaire_table_name,
+                    )
+                )
+            ),
+            CopyMode.HASHED: (
+                lambda connection, questionnaire_name, edit_table_name, questionnaire_table_name, _: (
+                    self.copy_changed_cases(
+                        connection,
+                        questionnaire_name,
+                        edit_table_name,
+                        questionnaire_table_name,
+                    )
+                )
+            ),
+            CopyMode.ADAPTIVE: self.copy_cases_adaptively,
+        }
 
-            self._database_service.copy_cases(
-                connection, edit_table_name, questionnaire_table_name
+    def copy_cases_in_full(
+        self,
+        connection: Connection,
+        questionnaire_name: str,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        stage_fields: Dict[str, Any],
+    ) -> RowCountModel:
+        with connection.begin():
+            join_strategy = self.get_join_strategy(connection, questionnaire_table_name)
+            stage_fields["join_strategy"] = join_strategy
+            return self._database_service.copy_cases(
+                connection,
+                edit_table_name,
+                questionnaire_table_name,
+                join_strategy=join_strategy,
+            )
+
+    def copy_cases_adaptively(
+        self,
+        connection: Connection,
+        questionnaire_name: str,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        stage_fields: Dict[str, Any],
+    ) -> RowCountModel:
+        """Copies the questionnaire with whichever strategy the cost model predicts is cheapest.
+
+        The watermark is moved on after every strategy, not only the incremental
+        one, so a later run can still choose to copy just the changed cases. It is
+        read before copying, so a case changed during the copy is copied again
+        next time rather than missed.
+        """
+        watermark_table = self._copy_cases_configuration.watermark_table
+        watermark_column = self._copy_cases_configuration.watermark_column
+
+        with connection.begin():
+            self._database_service.create_watermark_table(connection, watermark_table)
+
+        with connection.begin():
+            copy_statistics = self._database_service.get_copy_statistics(
+                connection,
+                questionnaire_name,
+                edit_table_name,
+                questionnaire_table_name,
+                watermark_table,
+                watermark_column,
+            )
+            upper_watermark = None
+            if copy_statistics.watermark_available:
+                upper_watermark = self._database_service.get_max_watermark(
+                    connection, questionnaire_table_name, watermark_column
+                )
+
+        # the cost model only chooses between the strategies that copy directly
+        copy_cost_estimate = self._copy_cost_model.choose_strategy(copy_statistics)
+        stage_fields.update(
+            copy_strategy=copy_cost_estimate.strategy,
+            predicted_cost=copy_cost_estimate.cost,
+            predicted_rows_read=copy_cost_estimate.rows_read,
+            predicted_rows_written=copy_cost_estimate.rows_written,
+            estimated_costs={
+                estimate.strategy: estimate.cost
+                for estimate in self._copy_cost_model.estimate_costs(copy_statistics)
+            },
+            **copy_statistics._asdict(),
+        )
+
+        row_counts = self.get_copy_strategies()[copy_cost_estimate.strategy](
+            connection,
+            questionnaire_name,
+            edit_table_name,
+            questionnaire_table_name,
+            stage_fields,
+        )
+        stage_fields["actual_rows_written"] = row_counts.rows_written
+
+        if (
+            copy_cost_estimate.strategy != CopyMode.INCREMENTAL
+            and upper_watermark is not None
+        ):
+            with connection.begin():
+                self._database_service.set_watermark(
+                    connection, watermark_table, questionnaire_name, upper_watermark
+                )
+        return row_counts
+
+    def get_join_strategy(
+        self, connection: Connection, questionnaire_table_name: str
+    ) -> str:
+        if self._copy_cases_configuration.join_strategy != JoinStrategy.AUTO:
+            return self._copy_cases_configuration.join_strategy
+
+        return self._copy_cases_configuration.resolve_join_strategy(
+            self._database_service.get_table_row_estimate(
+                connection, questionnaire_table_name
+            )
+        )
+
+    def copy_changed_cases(
+        self,
+        connection: Connection,
+        questionnaire_name: str,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+    ) -> RowCountModel:
+        """Copies only cases whose content changed since they were last copied.
+
+        A hash of each copied case is kept in a side table keyed by Serial_Number,
+        so unchanged cases are not rewritten and add nothing to the binlog.
+        """
+        row_hash_table_name = f"{questionnaire_name}_RowHash"
+
+        with connection.begin():
+            self._database_service.create_row_hash_table(
+                connection, row_hash_table_name, questionnaire_table_name
+            )
+
+        with connection.begin():
+            return self._database_service.copy_changed_cases(
+                connection,
+                edit_table_name,
+                questionnaire_table_name,
+                row_hash_table_name,
+                join_strategy=self.get_join_strategy(
+                    connection, questionnaire_table_name
+                ),
+            )
+
+    def copy_cases_incrementally(
+        self,
+        connection: Connection,
+        questionnaire_name: str,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+    ) -> RowCountModel:
+        """Copies only the cases changed since the questionnaire's last watermark.
+
+        The first run for a questionnaire has no watermark and copies everything.
+        The new watermark is saved in the same transaction as the copy.
+        """
+        watermark_table = self._copy_cases_configuration.watermark_table
+        watermark_column = self._copy_cases_configuration.watermark_column
+
+        with connection.begin():
+            self._database_service.create_watermark_table(connection, watermark_table)
+
+        row_counts = RowCountModel()
+        with connection.begin():
+            lower_watermark = self._database_service.get_watermark(
+                connection, watermark_table, questionnaire_name
             )
+            upper_watermark = self._database_service.get_max_watermark(
+                connection, questionnaire_table_name, watermark_column
+            )
+            join_strategy = self.get_join_strategy(connection, questionnaire_table_name)
+
+            if lower_watermark is None:
+                row_counts = self._database_service.copy_cases(
+                    connection,
+                    edit_table_name,
+                    questionnaire_table_name,
+                    join_strategy=join_strategy,
+                )
+            elif upper_watermark is not None:
+                row_counts = self._database_service.copy_cases_changed_since(
+                    connection,
+                    edit_table_name,
+                    questionnaire_table_name,
+                    watermark_column,
+                    lower_watermark,
+                    upper_watermark,
+                    join_strategy=join_strategy,
+                )
+
+            if upper_watermark is not None:
+                self._database_service.set_watermark(
+                    connection, watermark_table, questionnaire_name, upper_watermark
+                )
+
+        logging.info(
+            f"Copied cases changed since '{lower_watermark}' "
+            f"up to '{upper_watermark}' for '{questionnaire_name}'"
+        )
+        return row_counts
+
+    def copy_cases_in_chunks(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+    ) -> RowCountModel:
+        """Copies cases in Serial_Number order, committing after every chunk.
+
+        Locks on the edit table are only held for one chunk at a time, so editors
+        are not blocked for the whole copy on large questionnaires. Each chunk
+        already joins a narrow key range, so chunks always use the LEFT JOIN.
+        """
+        chunk_size = self._copy_cases_configuration.chunk_size
+        pause_seconds = self._copy_cases_configuration.chunk_pause_milliseconds / 1000
+        lower_bound = None
+        chunk_count = 0
+        chunk_retries = 0
+        row_counts = RowCountModel(inserted=0, updated=0)
+
+        while True:
+            (upper_bound, chunk_row_counts), attempts = self._retry_policy.call(
+                f"{questionnaire_table_name} after {lower_bound}",
+                lambda: self.copy_cases_chunk(
+                    connection,
+                    edit_table_name,
+                    questionnaire_table_name,
+                    lower_bound,
+                    chunk_size,
+                ),
+            )
+            if upper_bound is None:
+                break
+
+            row_counts.add(chunk_row_counts)
+            chunk_retries += attempts - 1
+            chunk_count += 1
+            lower_bound = upper_bound
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+
+        logging.info(
+            f"Copied '{questionnaire_table_name}' to '{edit_table_name}' "
+            f"in {chunk_count} chunks with {chunk_retries} retries"
+        )
+        return row_counts
+
+    def copy_cases_chunk(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        lower_bound: Optional[Any],
+        chunk_size: int,
+    ) -> Tuple[Optional[Any], RowCountModel]:
+        """Copies the next chunk in its own transaction and returns its upper bound."""
+        with connection.begin():
+            upper_bound = self._database_service.get_chunk_upper_bound(
+                connection, questionnaire_table_name, lower_bound, chunk_size
+            )
+            if upper_bound is None:
+                return None, RowCountModel()
+
+            return upper_bound, self._database_service.copy_cases_chunk(
+                connection,
+                edit_table_name,
+                questionnaire_table_name,
+                lower_bound,
+                upper_bound,
+            )
+
+    @staticmethod
+    def _edit_table_missing_result(
+        questionnaire_name: str,
+    ) -> QuestionnaireCopyResultModel:
+        error_message = f"Edit questionnaire missing for: '{questionnaire_name}'"
+        logging.error(error_message)
+        return QuestionnaireCopyResultModel(
+            questionnaire_name,
+            QuestionnaireCopyResultModel.MISSING_EDIT_TABLE,
+            error_message,
+        )
+
+    @staticmethod
+    def questionnaire_locked_result(
+        questionnaire_name: str,
+    ) -> QuestionnaireCopyResultModel:
+        message = f"Questionnaire already being copied by another invocation: '{questionnaire_name}'"
+        logging.warning(message)
+        return QuestionnaireCopyResultModel(
+            questionnaire_name, QuestionnaireCopyResultModel.LOCKED, message
+        )
+
+    @staticmethod
+    def _questionnaire_table_missing_result(
+        questionnaire_name: str,
+    ) -> QuestionnaireCopyResultModel:
+        error_message = f"Questionnaire table missing for: '{questionnaire_name}'"
+        logging.error(error_message)
+        return QuestionnaireCopyResultModel(
+            questionnaire_name,
+            QuestionnaireCopyResultModel.MISSING_QUESTIONNAIRE_TABLE,
+            error_message,
+        )
 
     @staticmethod
     def filter_questionnaires_by_survey_type(
-        questionnaires: List[Dict[str, Any]], survey_type: str
+        questionnaires: Union[List[Dict[str, Any]], QuestionnaireIndex],
+        survey_type: str,
     ) -> List[Dict[str, Any]]:
-        return list(
-            filter(
-                lambda questionnaire: questionnaire["name"].startswith(survey_type)
-                and not questionnaire["name"].endswith("_EDIT"),
-                questionnaires,
-            )
-        )
+        # the cached index from BlaiseService can be passed to skip building one
+        if not isinstance(questionnaires, QuestionnaireIndex):
+            questionnaires = QuestionnaireIndex(questionnaires)
+        return questionnaires.find_by_prefix(survey_type)
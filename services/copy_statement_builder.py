@@ -0,0 +1,540 @@
+import copy
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import (
+    bindparam,
+    case,
+    column,
+    func,
+    literal_column,
+    select,
+    table,
+    text,
+    Dialect,
+    TextClause,
+)
+from sqlalchemy.dialects import mysql, sqlite
+
+from models.copy_columns_model import CopyColumnsModel
+from models.copy_filter_model import CopyFilterModel
+from utilities.lru_cache import LruCache
+
+COPY_STATEMENT_CACHE_SIZE = 512
+
+copy_statement_cache = LruCache(COPY_STATEMENT_CACHE_SIZE)
+
+
+class CopyStatementBuilder:
+    """Builds the copy statements from SQLAlchemy Core and memoises them compiled.
+
+    Table and column names are quoted by the dialect rather than interpolated.
+    Each statement is compiled once per dialect, questionnaire and edit table pair
+    and kept as text with named parameters, which SQLAlchemy's own compiled cache
+    can then reuse. The MySQL and SQLite upserts opt out of that cache, so without
+    this every copy would compile its statement again.
+    """
+
+    SERIAL_NUMBER = "Serial_Number"
+    EDITED = "QEdit_edited"
+    ROW_HASH = "row_hash"
+    QUESTIONNAIRE_NAME = "questionnaire_name"
+    WATERMARK = "watermark"
+    UPDATED_AT = "updated_at"
+
+    def __init__(self, statement_cache: Optional[LruCache] = None):
+        # an empty cache is falsy, so `or` would swap it for the shared one
+        self._statement_cache = (
+            copy_statement_cache if statement_cache is None else statement_cache
+        )
+
+    def copy_cases(
+        self,
+        dialect: Dialect,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        copy_columns: CopyColumnsModel,
+        edited_set_table_name: Optional[str] = None,
+        copy_filter: Optional[CopyFilterModel] = None,
+    ) -> TextClause:
+        return self._get_statement(
+            dialect,
+            (
+                "copy_cases",
+                edit_table_name,
+                questionnaire_table_name,
+                tuple(copy_columns.columns),
+                tuple(copy_columns.update_columns),
+                edited_set_table_name,
+                copy_filter,
+            ),
+            lambda: self.build_copy_cases(
+                dialect.name,
+                edit_table_name,
+                questionnaire_table_name,
+                copy_columns,
+                edited_set_table_name,
+                copy_filter,
+            ),
+        )
+
+    def count_copy_cases(
+        self,
+        dialect: Dialect,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        copy_columns: CopyColumnsModel,
+        edited_set_table_name: Optional[str] = None,
+        copy_filter: Optional[CopyFilterModel] = None,
+    ) -> TextClause:
+        return self._get_statement(
+            dialect,
+            (
+                "count_copy_cases",
+                edit_table_name,
+                questionnaire_table_name,
+                tuple(copy_columns.columns),
+                edited_set_table_name,
+                copy_filter,
+            ),
+            lambda: self.build_count_copy_cases(
+                edit_table_name,
+                questionnaire_table_name,
+                copy_columns,
+                edited_set_table_name,
+                copy_filter,
+            ),
+        )
+
+    def estimate_copy_cases(
+        self, dialect: Dialect, edit_table_name: str, questionnaire_table_name: str
+    ) -> TextClause:
+        return self._get_statement(
+            dialect,
+            ("estimate_copy_cases", edit_table_name, questionnaire_table_name),
+            lambda: self.build_estimate_copy_cases(
+                edit_table_name, questionnaire_table_name
+            ),
+        )
+
+    def count_edited_cases(self, dialect: Dialect, edit_table_name: str) -> TextClause:
+        return self._get_statement(
+            dialect,
+            ("count_edited_cases", edit_table_name),
+            lambda: self.build_count_edited_cases(edit_table_name),
+        )
+
+    def chunk_upper_bound(
+        self, dialect: Dialect, questionnaire_table_name: str, has_lower_bound: bool
+    ) -> TextClause:
+        return self._get_statement(
+            dialect,
+            ("chunk_upper_bound", questionnaire_table_name, has_lower_bound),
+            lambda: self.build_chunk_upper_bound(
+                questionnaire_table_name, has_lower_bound
+            ),
+        )
+
+    def max_watermark(
+        self, dialect: Dialect, questionnaire_table_name: str, watermark_column: str
+    ) -> TextClause:
+        return self._get_statement(
+            dialect,
+            ("max_watermark", questionnaire_table_name, watermark_column),
+            lambda: self.build_max_watermark(
+                questionnaire_table_name, watermark_column
+            ),
+        )
+
+    def get_watermark(self, dialect: Dialect, watermark_table_name: str) -> TextClause:
+        return self._get_statement(
+            dialect,
+            ("get_watermark", watermark_table_name),
+            lambda: self.build_get_watermark(watermark_table_name),
+        )
+
+    def seconds_since_watermark(
+        self, dialect: Dialect, watermark_table_name: str
+    ) -> TextClause:
+        return self._get_statement(
+            dialect,
+            ("seconds_since_watermark", watermark_table_name),
+            lambda: self.build_seconds_since_watermark(watermark_table_name),
+        )
+
+    def set_watermark(self, dialect: Dialect, watermark_table_name: str) -> TextClause:
+        return self._get_statement(
+            dialect,
+            ("set_watermark", watermark_table_name),
+            lambda: self.build_set_watermark(dialect.name, watermark_table_name),
+        )
+
+    def record_row_hashes(
+        self,
+        dialect: Dialect,
+        row_hash_table_name: str,
+        changed_set_table_name: str,
+        edit_table_name: str,
+    ) -> TextClause:
+        return self._get_statement(
+            dialect,
+            (
+                "record_row_hashes",
+                row_hash_table_name,
+                changed_set_table_name,
+                edit_table_name,
+            ),
+            lambda: self.build_record_row_hashes(
+                dialect.name,
+                row_hash_table_name,
+                changed_set_table_name,
+                edit_table_name,
+            ),
+        )
+
+    def _get_statement(
+        self, dialect: Dialect, key: Hashable, build: Callable[[], Any]
+    ) -> TextClause:
+        return self._statement_cache.get_or_create(
+            (dialect.name, key), lambda: compile_statement(build(), dialect)
+        )
+
+    @classmethod
+    def build_copy_cases(
+        cls,
+        dialect_name: str,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        copy_columns: CopyColumnsModel,
+        edited_set_table_name: Optional[str] = None,
+        copy_filter: Optional[CopyFilterModel] = None,
+    ):
+        source, _ = cls.build_copy_source(
+            edit_table_name,
+            questionnaire_table_name,
+            copy_columns,
+            edited_set_table_name,
+            copy_filter,
+        )
+        edit_table = table(edit_table_name, *map(column, copy_columns.columns))
+
+        if dialect_name in ("mysql", "mariadb"):
+            mysql_insert = mysql.insert(edit_table).from_select(
+                copy_columns.columns, source
+            )
+            return mysql_insert.on_duplicate_key_update(
+                {
+                    name: mysql_insert.inserted[name]
+                    for name in copy_columns.update_columns
+                }
+            )
+        if dialect_name == "sqlite":
+            sqlite_insert = sqlite.insert(edit_table).from_select(
+                copy_columns.columns, source
+            )
+            return sqlite_insert.on_conflict_do_update(
+                index_elements=[cls.SERIAL_NUMBER],
+                set_={
+                    name: sqlite_insert.excluded[name]
+                    for name in copy_columns.update_columns
+                },
+            )
+        raise ValueError(f"Copying cases is not supported on '{dialect_name}'")
+
+    @classmethod
+    def build_count_copy_cases(
+        cls,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        copy_columns: CopyColumnsModel,
+        edited_set_table_name: Optional[str] = None,
+        copy_filter: Optional[CopyFilterModel] = None,
+    ):
+        """Counts the cases a copy writes, and how many of them already exist."""
+        source, unedited = cls.build_copy_source(
+            edit_table_name,
+            questionnaire_table_name,
+            copy_columns,
+            edited_set_table_name,
+            copy_filter,
+        )
+        copied = source.with_only_columns(
+            unedited.c[cls.SERIAL_NUMBER], maintain_column_froms=True
+        ).subquery("COPIED")
+        existing = table(edit_table_name, column(cls.SERIAL_NUMBER)).alias("EXISTING")
+        return select(
+            func.count().label("rows_to_copy"),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (
+                            existing.c[cls.SERIAL_NUMBER].is_not(None),
+                            literal_column("1"),
+                        ),
+                        else_=literal_column("0"),
+                    )
+                ),
+                literal_column("0"),
+            ).label("rows_to_update"),
+        ).select_from(
+            copied.outerjoin(
+                existing,
+                copied.c[cls.SERIAL_NUMBER] == existing.c[cls.SERIAL_NUMBER],
+            )
+        )
+
+    @classmethod
+    def build_copy_source(
+        cls,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        copy_columns: CopyColumnsModel,
+        edited_set_table_name: Optional[str] = None,
+        copy_filter: Optional[CopyFilterModel] = None,
+    ):
+        """Selects the copied columns of the unedited cases that pass the filter."""
+        if not copy_columns.columns:
+            raise ValueError(
+                f"No columns to copy from '{questionnaire_table_name}' "
+                f"to '{edit_table_name}'"
+            )
+
+        source_columns = set(copy_columns.columns) | {cls.SERIAL_NUMBER}
+        if copy_filter is not None and copy_filter.column is not None:
+            source_columns.add(copy_filter.column)
+        unedited = table(
+            questionnaire_table_name, *map(column, sorted(source_columns))
+        ).alias("UNEDITED")
+
+        if edited_set_table_name is None:
+            edited = table(
+                edit_table_name, column(cls.SERIAL_NUMBER), column(cls.EDITED)
+            ).alias("EDITED")
+            source = (
+                select(*[unedited.c[name] for name in copy_columns.columns])
+                .select_from(
+                    unedited.outerjoin(
+                        edited,
+                        unedited.c[cls.SERIAL_NUMBER] == edited.c[cls.SERIAL_NUMBER],
+                    )
+                )
+                .where(
+                    func.coalesce(edited.c[cls.EDITED], literal_column("0"))
+                    != literal_column("1")
+                )
+            )
+        else:
+            edited = table(edited_set_table_name, column(cls.SERIAL_NUMBER)).alias(
+                "EDITED"
+            )
+            source = select(*[unedited.c[name] for name in copy_columns.columns]).where(
+                ~select(literal_column("1"))
+                .where(edited.c[cls.SERIAL_NUMBER] == unedited.c[cls.SERIAL_NUMBER])
+                .exists()
+            )
+
+        if copy_filter is not None:
+            source = cls.apply_copy_filter(source, unedited, copy_filter)
+        return source, unedited
+
+    @classmethod
+    def apply_copy_filter(cls, source, unedited, copy_filter: CopyFilterModel):
+        if copy_filter.column is not None:
+            filter_column = unedited.c[copy_filter.column]
+            if copy_filter.lower_bound_parameter is not None:
+                if copy_filter.lower_bound_inclusive:
+                    source = source.where(
+                        filter_column >= bindparam(copy_filter.lower_bound_parameter)
+                    )
+                else:
+                    source = source.where(
+                        filter_column > bindparam(copy_filter.lower_bound_parameter)
+                    )
+            if copy_filter.upper_bound_parameter is not None:
+                source = source.where(
+                    filter_column <= bindparam(copy_filter.upper_bound_parameter)
+                )
+        if copy_filter.serial_number_table is not None:
+            serial_numbers = table(
+                copy_filter.serial_number_table, column(cls.SERIAL_NUMBER)
+            )
+            source = source.where(
+                unedited.c[cls.SERIAL_NUMBER].in_(
+                    select(serial_numbers.c[cls.SERIAL_NUMBER])
+                )
+            )
+        return source
+
+    @classmethod
+    def build_estimate_copy_cases(
+        cls, edit_table_name: str, questionnaire_table_name: str
+    ):
+        """Counts what a copy would do, reading only Serial_Number and QEdit_edited."""
+        unedited = table(questionnaire_table_name, column(cls.SERIAL_NUMBER)).alias(
+            "UNEDITED"
+        )
+        edited = table(
+            edit_table_name, column(cls.SERIAL_NUMBER), column(cls.EDITED)
+        ).alias("EDITED")
+        edited_case = func.coalesce(edited.c[cls.EDITED], literal_column("0")) == (
+            literal_column("1")
+        )
+
+        def count_where(condition):
+            return func.coalesce(
+                func.sum(
+                    case((condition, literal_column("1")), else_=literal_column("0"))
+                ),
+                literal_column("0"),
+            )
+
+        return select(
+            count_where(edited.c[cls.SERIAL_NUMBER].is_(None)).label("rows_to_insert"),
+            count_where(edited.c[cls.SERIAL_NUMBER].is_not(None) & ~edited_case).label(
+                "rows_to_overwrite"
+            ),
+            count_where(edited_case).label("rows_to_skip"),
+        ).select_from(
+            unedited.outerjoin(
+                edited, unedited.c[cls.SERIAL_NUMBER] == edited.c[cls.SERIAL_NUMBER]
+            )
+        )
+
+    @classmethod
+    def build_count_edited_cases(cls, edit_table_name: str):
+        edit_table = table(edit_table_name, column(cls.EDITED))
+        return (
+            select(func.count())
+            .select_from(edit_table)
+            .where(edit_table.c[cls.EDITED] == literal_column("1"))
+        )
+
+    @classmethod
+    def build_chunk_upper_bound(
+        cls, questionnaire_table_name: str, has_lower_bound: bool
+    ):
+        """Selects the last Serial_Number in the next chunk_size cases."""
+        serial_number = table(questionnaire_table_name, column(cls.SERIAL_NUMBER)).c[
+            cls.SERIAL_NUMBER
+        ]
+        # an explicit offset, as SQLite would otherwise add one with a bound value
+        chunk = (
+            select(serial_number)
+            .order_by(serial_number)
+            .limit(bindparam("chunk_size"))
+            .offset(literal_column("0"))
+        )
+        if has_lower_bound:
+            chunk = chunk.where(serial_number > bindparam("lower_bound"))
+        chunk_subquery = chunk.subquery("CHUNK")
+        return select(func.max(chunk_subquery.c[cls.SERIAL_NUMBER]))
+
+    @classmethod
+    def build_max_watermark(cls, questionnaire_table_name: str, watermark_column: str):
+        questionnaire_table = table(questionnaire_table_name, column(watermark_column))
+        return select(func.max(questionnaire_table.c[watermark_column]))
+
+    @classmethod
+    def _watermark_table(cls, watermark_table_name: str):
+        return table(
+            watermark_table_name,
+            column(cls.QUESTIONNAIRE_NAME),
+            column(cls.WATERMARK),
+            column(cls.UPDATED_AT),
+        )
+
+    @classmethod
+    def build_get_watermark(cls, watermark_table_name: str):
+        watermarks = cls._watermark_table(watermark_table_name)
+        return select(watermarks.c[cls.WATERMARK]).where(
+            watermarks.c[cls.QUESTIONNAIRE_NAME] == bindparam(cls.QUESTIONNAIRE_NAME)
+        )
+
+    @classmethod
+    def build_seconds_since_watermark(cls, watermark_table_name: str):
+        watermarks = cls._watermark_table(watermark_table_name)
+        return select(
+            func.timestampdiff(
+                literal_column("SECOND"),
+                watermarks.c[cls.UPDATED_AT],
+                func.utc_timestamp(),
+            )
+        ).where(
+            watermarks.c[cls.QUESTIONNAIRE_NAME] == bindparam(cls.QUESTIONNAIRE_NAME)
+        )
+
+    @classmethod
+    def build_set_watermark(cls, dialect_name: str, watermark_table_name: str):
+        if dialect_name not in ("mysql", "mariadb"):
+            raise ValueError(f"Watermarks are not supported on '{dialect_name}'")
+
+        watermark_insert = mysql.insert(
+            cls._watermark_table(watermark_table_name)
+        ).values(
+            {
+                cls.QUESTIONNAIRE_NAME: bindparam(cls.QUESTIONNAIRE_NAME),
+                cls.WATERMARK: bindparam(cls.WATERMARK),
+                cls.UPDATED_AT: func.utc_timestamp(),
+            }
+        )
+        return watermark_insert.on_duplicate_key_update(
+            {
+                cls.WATERMARK: watermark_insert.inserted[cls.WATERMARK],
+                cls.UPDATED_AT: watermark_insert.inserted[cls.UPDATED_AT],
+            }
+        )
+
+    @classmethod
+    def build_record_row_hashes(
+        cls,
+        dialect_name: str,
+        row_hash_table_name: str,
+        changed_set_table_name: str,
+        edit_table_name: str,
+    ):
+        """Records the hashes of the changed cases that the copy wrote.
+
+        Edited cases were not written, so their hashes are left as they were.
+        """
+        if dialect_name not in ("mysql", "mariadb"):
+            raise ValueError(f"Row hashes are not supported on '{dialect_name}'")
+
+        changed = table(
+            changed_set_table_name, column(cls.SERIAL_NUMBER), column(cls.ROW_HASH)
+        ).alias("CHANGED")
+        edited = table(
+            edit_table_name, column(cls.SERIAL_NUMBER), column(cls.EDITED)
+        ).alias("EDITED")
+        row_hashes = table(
+            row_hash_table_name, column(cls.SERIAL_NUMBER), column(cls.ROW_HASH)
+        )
+        source = (
+            select(changed.c[cls.SERIAL_NUMBER], changed.c[cls.ROW_HASH])
+            .select_from(
+                changed.join(
+                    edited,
+                    changed.c[cls.SERIAL_NUMBER] == edited.c[cls.SERIAL_NUMBER],
+                )
+            )
+            .where(
+                func.coalesce(edited.c[cls.EDITED], literal_column("0"))
+                != literal_column("1")
+            )
+        )
+        row_hash_insert = mysql.insert(row_hashes).from_select(
+            [cls.SERIAL_NUMBER, cls.ROW_HASH], source
+        )
+        return row_hash_insert.on_duplicate_key_update(
+            {cls.ROW_HASH: row_hash_insert.inserted[cls.ROW_HASH]}
+        )
+
+
+def compile_statement(statement, dialect: Dialect) -> TextClause:
+    """Compiles a Core statement for the dialect into text with named parameters.
+
+    The dialect's own parameter style is applied when the text is executed, so the
+    result runs on any driver for that database.
+    """
+    named_dialect = copy.copy(dialect)
+    named_dialect.paramstyle = "named"
+    named_dialect.positional = False
+    return text(str(statement.compile(dialect=named_dialect)))
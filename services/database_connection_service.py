@@ -1,25 +1,96 @@
+import ssl
+from typing import TYPE_CHECKING, Optional
+
 import sqlalchemy
 from sqlalchemy import Engine, URL
 
 from providers.configuration_provider import ConfigurationProvider
+from services.database_engine_registry import (
+    DatabaseEngineRegistry,
+    async_engine_registry,
+    engine_registry,
+)
+from utilities.custom_exceptions import ConfigError
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 
 class DatabaseConnectionService:
-    def __init__(self, configuration_provider: ConfigurationProvider):
+    def __init__(
+        self,
+        configuration_provider: ConfigurationProvider,
+        database_engine_registry: Optional[DatabaseEngineRegistry] = None,
+        async_database_engine_registry: Optional[DatabaseEngineRegistry] = None,
+    ):
         self._configuration_provider = configuration_provider
         self._connection_model = (
-            self._configuration_provider.get_database_connection_model()
+            self._configuration_provider.get_configuration_snapshot().database
+        )
+        self._engine_registry = database_engine_registry or engine_registry
+        self._async_engine_registry = (
+            async_database_engine_registry or async_engine_registry
         )
 
     def get_database(self) -> Engine:
-        sql_url = URL.create(
-            drivername="mysql+pymysql",
+        return self._engine_registry.get_engine(
+            self._connection_model.fingerprint, self.create_database
+        )
+
+    def get_async_database(self) -> "AsyncEngine":
+        return self._async_engine_registry.get_engine(
+            self._connection_model.fingerprint, self.create_async_database
+        )
+
+    def create_database(self) -> Engine:
+        return sqlalchemy.create_engine(
+            url=self.create_database_url("mysql+pymysql"),
+            connect_args={
+                "ssl": {"key": "blaise"},
+                "connect_timeout": self._connection_model.database_connect_timeout_seconds,
+            },
+            **self.get_pool_arguments(),
+        )
+
+    def create_async_database(self) -> "AsyncEngine":
+        try:
+            import aiomysql  # noqa: F401
+        except ImportError:
+            raise ConfigError(
+                "The aiomysql package is required when COPY_CASES_EXECUTION is 'async'"
+            )
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        # encrypt without verifying the server certificate, as PyMySQL does for
+        # the sync engine's {"key": ...} ssl argument
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+
+        return create_async_engine(
+            self.create_database_url("mysql+aiomysql"),
+            connect_args={
+                "ssl": ssl_context,
+                "connect_timeout": self._connection_model.database_connect_timeout_seconds,
+            },
+            **self.get_pool_arguments(),
+        )
+
+    def create_database_url(self, drivername: str) -> URL:
+        return URL.create(
+            drivername=drivername,
             username=self._connection_model.database_username,
             password=self._connection_model.database_password,
             host=self._connection_model.database_ip_address,
             port=self._connection_model.database_port,
             database=self._connection_model.database_name,
         )
-        return sqlalchemy.create_engine(
-            url=sql_url, connect_args={"ssl": {"key": "blaise"}}
-        )
+
+    def get_pool_arguments(self) -> dict:
+        return {
+            "pool_size": self._connection_model.database_pool_size,
+            "max_overflow": self._connection_model.database_pool_max_overflow,
+            "pool_recycle": self._connection_model.database_pool_recycle_seconds,
+            "pool_pre_ping": self._connection_model.database_pool_pre_ping,
+            "pool_timeout": self._connection_model.database_pool_timeout_seconds,
+        }
@@ -0,0 +1,53 @@
+import inspect
+import logging
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from utilities.logging import log_stage
+
+
+class DatabaseEngineRegistry:
+    """Holds a single engine (and its connection pool) for the life of the process.
+
+    Cloud Functions reuse the process between warm invocations, so keeping the
+    engine here avoids a new TCP connection and SSL handshake on every request.
+    The engine is rebuilt if the connection configuration changes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._engine: Optional[Any] = None
+        self._engine_key: Optional[Hashable] = None
+
+    def get_engine(self, engine_key: Hashable, create_engine: Callable[[], Any]) -> Any:
+        with self._lock:
+            if self._engine is not None and self._engine_key == engine_key:
+                return self._engine
+
+            if self._engine is not None:
+                logging.info("Database configuration changed, rebuilding engine")
+                self._dispose_engine(self._engine)
+
+            with log_stage("engine_creation"):
+                self._engine = create_engine()
+            self._engine_key = engine_key
+            return self._engine
+
+    def dispose(self) -> None:
+        with self._lock:
+            if self._engine is not None:
+                self._dispose_engine(self._engine)
+            self._engine = None
+            self._engine_key = None
+
+    @staticmethod
+    def _dispose_engine(engine: Any) -> None:
+        # AsyncEngine.dispose() is a coroutine; its sync_engine shares the same
+        # pool and can be disposed without an event loop
+        if inspect.iscoroutinefunction(engine.dispose):
+            engine = engine.sync_engine
+        engine.dispose()
+
+
+engine_registry = DatabaseEngineRegistry()
+async_engine_registry = DatabaseEngineRegistry()
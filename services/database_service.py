@@ -1,10 +1,39 @@
-from sqlalchemy import text, Connection, Engine
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import text, Connection, CursorResult, Dialect, Engine, TextClause
+
+from models.copy_cases_configuration_model import JoinStrategy
+from models.copy_columns_model import CopyColumnsModel
+from models.copy_filter_model import CopyFilterModel
+from models.copy_statistics_model import CopyStatisticsModel
+from models.row_count_model import RowCountModel
+from services.copy_statement_builder import CopyStatementBuilder
 from services.database_connection_service import DatabaseConnectionService
+from services.table_schema_service import TableSchemaService
+
+copy_statement_builder = CopyStatementBuilder()
+
+SERIAL_NUMBER_UPPER_BOUND = CopyFilterModel(
+    column="Serial_Number", upper_bound_parameter="upper_bound"
+)
+SERIAL_NUMBER_RANGE = CopyFilterModel(
+    column="Serial_Number",
+    lower_bound_parameter="lower_bound",
+    upper_bound_parameter="upper_bound",
+)
 
 
 class DatabaseService:
-    def __init__(self, database_connection_service: DatabaseConnectionService) -> None:
+    def __init__(
+        self,
+        database_connection_service: DatabaseConnectionService,
+        table_schema_service: Optional[TableSchemaService] = None,
+    ) -> None:
         self._database_engine: Engine = database_connection_service.get_database()
+        self._table_schema_service = table_schema_service or TableSchemaService()
 
     @property
     def database(self) -> Engine:
@@ -13,29 +42,539 @@ class DatabaseService:
     def table_exists(self, connection: Connection, table_name: str):
         return self._database_engine.dialect.has_table(connection, table_name)
 
+    def get_table_fingerprints(
+        self, connection: Connection, table_names: List[str]
+    ) -> Dict[str, str]:
+        """Fingerprints the existing tables, which also tells us which tables exist."""
+        return self._table_schema_service.get_table_fingerprints(
+            connection, table_names
+        )
+
+    def get_copy_columns(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+    ) -> CopyColumnsModel:
+        return self._table_schema_service.get_copy_columns(
+            connection, edit_table_name, questionnaire_table_name
+        )
+
     def copy_cases(
         self,
         connection: Connection,
         edit_table_name: str,
         questionnaire_table_name: str,
+        join_strategy: str = JoinStrategy.LEFT_JOIN,
+    ) -> RowCountModel:
+        with self.edited_set(
+            connection, edit_table_name, join_strategy
+        ) as edited_set_table_name:
+            return self.execute_copy(
+                connection,
+                edit_table_name,
+                questionnaire_table_name,
+                self.get_copy_columns(
+                    connection, edit_table_name, questionnaire_table_name
+                ),
+                edited_set_table_name=edited_set_table_name,
+            )
+
+    def copy_cases_chunk(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        lower_bound: Optional[Any],
+        upper_bound: Any,
+    ) -> RowCountModel:
+        copy_columns = self.get_copy_columns(
+            connection, edit_table_name, questionnaire_table_name
+        )
+        if lower_bound is None:
+            return self.execute_copy(
+                connection,
+                edit_table_name,
+                questionnaire_table_name,
+                copy_columns,
+                copy_filter=SERIAL_NUMBER_UPPER_BOUND,
+                parameters={"upper_bound": upper_bound},
+            )
+
+        return self.execute_copy(
+            connection,
+            edit_table_name,
+            questionnaire_table_name,
+            copy_columns,
+            copy_filter=SERIAL_NUMBER_RANGE,
+            parameters={"lower_bound": lower_bound, "upper_bound": upper_bound},
+        )
+
+    def copy_cases_changed_since(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        watermark_column: str,
+        lower_watermark: Any,
+        upper_watermark: Any,
+        join_strategy: str = JoinStrategy.LEFT_JOIN,
+    ) -> RowCountModel:
+        with self.edited_set(
+            connection, edit_table_name, join_strategy
+        ) as edited_set_table_name:
+            return self.execute_copy(
+                connection,
+                edit_table_name,
+                questionnaire_table_name,
+                self.get_copy_columns(
+                    connection, edit_table_name, questionnaire_table_name
+                ),
+                edited_set_table_name,
+                # cases sharing the last run's watermark may have been
+                # committed after it was read, and copying a case
+                # again only rewrites the same values
+                CopyFilterModel(
+                    column=watermark_column,
+                    lower_bound_parameter="lower_watermark",
+                    upper_bound_parameter="upper_watermark",
+                    lower_bound_inclusive=True,
+                ),
+                {
+                    "lower_watermark": lower_watermark,
+                    "upper_watermark": upper_watermark,
+                },
+            )
+
+    def copy_changed_cases(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        row_hash_table_name: str,
+        join_strategy: str = JoinStrategy.LEFT_JOIN,
+    ) -> RowCountModel:
+        """Copies only the cases whose content hash differs from the last copy.
+
+        Cases missing from the edit table are always copied, so a reinstalled
+        edit questionnaire is filled again even though its hashes are stale.
+        """
+        copy_columns = self.get_copy_columns(
+            connection, edit_table_name, questionnaire_table_name
+        )
+        row_hash = self.row_hash_expression(connection.dialect, copy_columns)
+        changed_set_table_name = f"tmp_{questionnaire_table_name}_changed"
+        # CREATE ... SELECT has no Core equivalent, so the names are quoted here
+        quote = connection.dialect.identifier_preparer.quote_identifier
+        drop_changed_set = text(
+            f"DROP TEMPORARY TABLE IF EXISTS {quote(changed_set_table_name)}"
+        )
+
+        connection.execute(drop_changed_set)
+        changed_rows = connection.execute(
+            text(
+                f"CREATE TEMPORARY TABLE {quote(changed_set_table_name)} \
+                (PRIMARY KEY (Serial_Number)) \
+                SELECT UNEDITED.Serial_Number, {row_hash} AS row_hash \
+                FROM {quote(questionnaire_table_name)} UNEDITED \
+                LEFT JOIN {quote(row_hash_table_name)} HASHED \
+                ON UNEDITED.Serial_Number = HASHED.Serial_Number \
+                LEFT JOIN {quote(edit_table_name)} EDITED \
+                ON UNEDITED.Serial_Number = EDITED.Serial_Number \
+                WHERE EDITED.Serial_Number IS NULL \
+                OR NOT HASHED.row_hash <=> {row_hash}"
+            )
+        ).rowcount
+        logging.info(
+            f"Found {max(changed_rows, 0)} new or changed cases "
+            f"in '{questionnaire_table_name}'"
+        )
+
+        try:
+            with self.edited_set(
+                connection, edit_table_name, join_strategy
+            ) as edited_set_table_name:
+                row_counts = self.execute_copy(
+                    connection,
+                    edit_table_name,
+                    questionnaire_table_name,
+                    copy_columns,
+                    edited_set_table_name,
+                    CopyFilterModel(serial_number_table=changed_set_table_name),
+                )
+
+            connection.execute(
+                copy_statement_builder.record_row_hashes(
+                    connection.dialect,
+                    row_hash_table_name,
+                    changed_set_table_name,
+                    edit_table_name,
+                )
+            )
+        finally:
+            connection.execute(drop_changed_set)
+        return row_counts
+
+    @staticmethod
+    def create_row_hash_table(
+        connection: Connection, row_hash_table_name: str, questionnaire_table_name: str
+    ):
+        # copies the questionnaire's Serial_Number type so the joins can use the key
+        quote = connection.dialect.identifier_preparer.quote_identifier
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {quote(row_hash_table_name)} \
+                (PRIMARY KEY (Serial_Number)) \
+                SELECT Serial_Number, UNHEX(MD5('')) AS row_hash \
+                FROM {quote(questionnaire_table_name)} WHERE 1 = 0"
+            )
+        )
+
+    @staticmethod
+    def row_hash_expression(dialect: Dialect, copy_columns: CopyColumnsModel) -> str:
+        # QUOTE() renders NULL as the bare word NULL, so NULL and 'NULL' differ
+        quote = dialect.identifier_preparer.quote_identifier
+        quoted_columns = ", ".join(
+            f"QUOTE(UNEDITED.{quote(column)})" for column in copy_columns.columns
+        )
+        return f"UNHEX(MD5(CONCAT_WS(',', {quoted_columns})))"
+
+    @staticmethod
+    def get_table_row_estimate(connection: Connection, table_name: str) -> int:
+        """Returns InnoDB's estimate of the table's row count without scanning it."""
+        row_estimate = connection.execute(
+            text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES \
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+            ),
+            {"table_name": table_name},
+        ).scalar()
+        return int(row_estimate or 0)
+
+    @staticmethod
+    @contextmanager
+    def named_lock(
+        connection: Connection, lock_name: str, timeout_seconds: int
+    ) -> Iterator[bool]:
+        """Holds a MySQL named lock for the block and yields whether it was acquired.
+
+        Named locks belong to the session rather than a transaction, so the lock
+        is released before the connection goes back to the pool.
+        """
+        acquired = DatabaseService.acquire_named_lock(
+            connection, lock_name, timeout_seconds
+        )
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                DatabaseService.release_named_lock(connection, lock_name)
+
+    @staticmethod
+    def acquire_named_lock(
+        connection: Connection, lock_name: str, timeout_seconds: int
+    ) -> bool:
+        # named locks are server wide, so they are scoped to this database, and
+        # MySQL limits their names to 64 characters
+        acquired = (
+            connection.execute(
+                text(
+                    "SELECT GET_LOCK(LEFT(CONCAT(DATABASE(), '.', :lock_name), 64), \
+                    :timeout_seconds)"
+                ),
+                {"lock_name": lock_name, "timeout_seconds": timeout_seconds},
+            ).scalar()
+            == 1
+        )
+        # end the implicit transaction so its read view is not held during the copy
+        connection.commit()
+        return acquired
+
+    @staticmethod
+    def release_named_lock(connection: Connection, lock_name: str) -> None:
+        try:
+            connection.execute(
+                text(
+                    "SELECT RELEASE_LOCK(LEFT(CONCAT(DATABASE(), '.', :lock_name), 64))"
+                ),
+                {"lock_name": lock_name},
+            )
+            connection.commit()
+        except Exception as e:
+            # a lock still held by a pooled connection would block every later copy
+            logging.warning(
+                f"Could not release lock '{lock_name}', discarding its connection: {e}"
+            )
+            connection.invalidate()
+
+    @staticmethod
+    @contextmanager
+    def edited_set(
+        connection: Connection, edit_table_name: str, join_strategy: str
+    ) -> Iterator[Optional[str]]:
+        """Collects the serial numbers of edited cases into an indexed temporary table.
+
+        Yields the temporary table's name, or None for the LEFT JOIN strategy.
+        Temporary tables belong to the connection, so the copy must run on the
+        same connection, and the table is dropped before it goes back to the pool.
+        """
+        if join_strategy != JoinStrategy.EDITED_SET:
+            yield None
+            return
+
+        edited_set_table_name = f"tmp_{edit_table_name}_edited"
+        quote = connection.dialect.identifier_preparer.quote_identifier
+        drop_edited_set = text(
+            f"DROP TEMPORARY TABLE IF EXISTS {quote(edited_set_table_name)}"
+        )
+        connection.execute(drop_edited_set)
+        connection.execute(
+            text(
+                f"CREATE TEMPORARY TABLE {quote(edited_set_table_name)} \
+                (PRIMARY KEY (Serial_Number)) \
+                SELECT Serial_Number FROM {quote(edit_table_name)} WHERE QEdit_edited = 1"
+            )
+        )
+        try:
+            yield edited_set_table_name
+        finally:
+            connection.execute(drop_edited_set)
+
+    @staticmethod
+    def estimate_copy_cases(
+        connection: Connection, edit_table_name: str, questionnaire_table_name: str
+    ) -> Dict[str, int]:
+        """Counts what copy_cases would do without writing anything."""
+        row = connection.execute(
+            copy_statement_builder.estimate_copy_cases(
+                connection.dialect, edit_table_name, questionnaire_table_name
+            )
+        ).one()
+        return {
+            "rows_to_insert": int(row.rows_to_insert),
+            "rows_to_overwrite": int(row.rows_to_overwrite),
+            "rows_to_skip": int(row.rows_to_skip),
+        }
+
+    def explain_copy_cases(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+    ) -> List[Dict[str, Any]]:
+        command = self.copy_cases_command(
+            connection.dialect,
+            edit_table_name,
+            questionnaire_table_name,
+            self.get_copy_columns(
+                connection, edit_table_name, questionnaire_table_name
+            ),
+        )
+        rows = connection.execute(text(f"EXPLAIN {command.text}"))
+        return [dict(row._mapping) for row in rows]
+
+    @staticmethod
+    def execute_copy(
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        copy_columns: CopyColumnsModel,
+        edited_set_table_name: Optional[str] = None,
+        copy_filter: Optional[CopyFilterModel] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> RowCountModel:
+        """Copies the cases, counting them first so the rows written can be split.
+
+        The count reads the same cases as the copy, in the same transaction.
+        """
+        case_counts = connection.execute(
+            copy_statement_builder.count_copy_cases(
+                connection.dialect,
+                edit_table_name,
+                questionnaire_table_name,
+                copy_columns,
+                edited_set_table_name,
+                copy_filter,
+            ),
+            parameters,
+        ).one()
+        return DatabaseService.get_row_counts(
+            connection.execute(
+                DatabaseService.copy_cases_command(
+                    connection.dialect,
+                    edit_table_name,
+                    questionnaire_table_name,
+                    copy_columns,
+                    edited_set_table_name,
+                    copy_filter,
+                ),
+                parameters,
+            ),
+            int(case_counts.rows_to_copy),
+            int(case_counts.rows_to_update),
+        )
+
+    @staticmethod
+    def get_row_counts(
+        result: CursorResult, rows_to_copy: int, rows_to_update: int
+    ) -> RowCountModel:
+        """Splits the rows written into inserted and updated.
+
+        MySQL reports 1 affected row per insert and 2 per update (1 when the
+        values did not change), so rows_affected alone cannot be split. The
+        cases already in the edit table are the updates and the rest are inserts.
+        Rows matching an existing Serial_Number count as updated even when none
+        of their values changed.
+        """
+        return RowCountModel(
+            rows_affected=max(result.rowcount, 0),
+            inserted=rows_to_copy - rows_to_update,
+            updated=rows_to_update,
+        )
+
+    @staticmethod
+    def get_max_watermark(
+        connection: Connection, questionnaire_table_name: str, watermark_column: str
+    ) -> Optional[datetime]:
+        return DatabaseService.to_watermark(
+            connection.execute(
+                copy_statement_builder.max_watermark(
+                    connection.dialect, questionnaire_table_name, watermark_column
+                )
+            ).scalar()
+        )
+
+    def get_copy_statistics(
+        self,
+        connection: Connection,
+        questionnaire_name: str,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        watermark_table_name: str,
+        watermark_column: str,
+    ) -> CopyStatisticsModel:
+        """Gathers what the cost model needs to choose how to copy a questionnaire.
+
+        The row estimate and last write time come from information_schema.TABLES.
+        UPDATE_TIME is not persisted by InnoDB and is NULL after a restart.
+        """
+        table_row = connection.execute(
+            text(
+                "SELECT TABLE_ROWS, TIMESTAMPDIFF(SECOND, UPDATE_TIME, NOW()) \
+                FROM information_schema.TABLES \
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+            ),
+            {"table_name": questionnaire_table_name},
+        ).one_or_none()
+        edited_rows = connection.execute(
+            copy_statement_builder.count_edited_cases(
+                connection.dialect, edit_table_name
+            )
+        ).scalar()
+        seconds_since_last_run = connection.execute(
+            copy_statement_builder.seconds_since_watermark(
+                connection.dialect, watermark_table_name
+            ),
+            {"questionnaire_name": questionnaire_name},
+        ).scalar()
+        copy_columns = self.get_copy_columns(
+            connection, edit_table_name, questionnaire_table_name
+        )
+        return CopyStatisticsModel(
+            questionnaire_rows=int(table_row[0] or 0) if table_row else 0,
+            edited_rows=int(edited_rows or 0),
+            seconds_since_last_run=seconds_since_last_run,
+            seconds_since_questionnaire_update=table_row[1] if table_row else None,
+            watermark_available=watermark_column in copy_columns.columns,
+        )
+
+    @staticmethod
+    def create_watermark_table(connection: Connection, watermark_table_name: str):
+        quote = connection.dialect.identifier_preparer.quote_identifier
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {quote(watermark_table_name)} ( \
+                questionnaire_name VARCHAR(255) NOT NULL PRIMARY KEY, \
+                watermark DATETIME(6) NULL, \
+                updated_at DATETIME NOT NULL)"
+            )
+        )
+
+    @staticmethod
+    def get_watermark(
+        connection: Connection, watermark_table_name: str, questionnaire_name: str
+    ) -> Optional[datetime]:
+        return DatabaseService.to_watermark(
+            connection.execute(
+                copy_statement_builder.get_watermark(
+                    connection.dialect, watermark_table_name
+                ),
+                {"questionnaire_name": questionnaire_name},
+            ).scalar()
+        )
+
+    @staticmethod
+    def set_watermark(
+        connection: Connection,
+        watermark_table_name: str,
+        questionnaire_name: str,
+        watermark: Any,
     ):
         connection.execute(
-            self.copy_cases_command(edit_table_name, questionnaire_table_name)
-        )
-
-    @staticmethod
-    def copy_cases_command(edit_table_name: str, questionnaire_table_name: str):
-        return text(
-            f"INSERT INTO {edit_table_name} \
-                    SELECT UNEDITED.* \
-                    FROM {questionnaire_table_name} UNEDITED \
-                    LEFT JOIN {edit_table_name}  EDITED \
-                    ON UNEDITED.Serial_Number = EDITED.Serial_Number \
-                    WHERE IFNULL(EDITED.QEdit_edited, 0) <> 1 \
-                    ON DUPLICATE KEY UPDATE \
-                    Serial_Number = VALUES(Serial_Number), \
-                    QEdit_edited = VALUES( QEdit_edited), \
-                    QEdit_LastUpdated = VALUES(QEdit_LastUpdated), \
-                    QHAdmin_HOut = VALUES(QHAdmin_HOut), \
-                    DataStream = VALUES(DataStream);"
+            copy_statement_builder.set_watermark(
+                connection.dialect, watermark_table_name
+            ),
+            {
+                "questionnaire_name": questionnaire_name,
+                "watermark": DatabaseService.to_watermark(watermark),
+            },
+        )
+
+    @staticmethod
+    def to_watermark(value: Any) -> Optional[datetime]:
+        # watermark tables created before the column became a DATETIME, and
+        # SQLite, return the watermark as text
+        if isinstance(value, str):
+            return datetime.fromisoformat(value)
+        return value
+
+    @staticmethod
+    def get_chunk_upper_bound(
+        connection: Connection,
+        questionnaire_table_name: str,
+        lower_bound: Optional[Any],
+        chunk_size: int,
+    ) -> Optional[Any]:
+        """Returns the last Serial_Number in the next chunk, or None if there is none."""
+        if lower_bound is None:
+            return connection.execute(
+                copy_statement_builder.chunk_upper_bound(
+                    connection.dialect, questionnaire_table_name, False
+                ),
+                {"chunk_size": chunk_size},
+            ).scalar()
+
+        return connection.execute(
+            copy_statement_builder.chunk_upper_bound(
+                connection.dialect, questionnaire_table_name, True
+            ),
+            {"lower_bound": lower_bound, "chunk_size": chunk_size},
+        ).scalar()
+
+    @staticmethod
+    def copy_cases_command(
+        dialect: Dialect,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+        copy_columns: CopyColumnsModel,
+        edited_set_table_name: Optional[str] = None,
+        copy_filter: Optional[CopyFilterModel] = None,
+    ) -> TextClause:
+        return copy_statement_builder.copy_cases(
+            dialect,
+            edit_table_name,
+            questionnaire_table_name,
+            copy_columns,
+            edited_set_table_name,
+            copy_filter,
         )
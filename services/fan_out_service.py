@@ -0,0 +1,134 @@
+import logging
+from typing import List, Union
+
+from models.copy_cases_configuration_model import CopyCasesConfigurationModel
+from models.copy_cases_enqueue_result_model import CopyCasesEnqueueResultModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from models.work_item_model import WorkItemModel
+from models.work_item_results_model import WorkItemResultsModel
+from services.case_service import CaseService
+from services.work_queue import WorkQueue
+from utilities.logging import log_stage
+
+
+class FanOutService:
+    """Splits a copy into one work item per questionnaire so workers can share it.
+
+    The coordinator only resolves and enqueues questionnaires, so a large survey
+    is no longer bound by a single invocation's timeout. Each worker copies one
+    questionnaire at a time. Copying a questionnaire twice leaves the edit table
+    the same, so an item redelivered after a worker died is safe to run again.
+    """
+
+    def __init__(
+        self,
+        case_service: CaseService,
+        work_queue: WorkQueue,
+        copy_cases_configuration_model: CopyCasesConfigurationModel,
+    ) -> None:
+        self._case_service = case_service
+        self._work_queue = work_queue
+        self._copy_cases_configuration = copy_cases_configuration_model
+
+    def enqueue_copy_cases(
+        self,
+        survey_types: Union[str, List[str]],
+        refresh_questionnaires: bool = False,
+    ) -> CopyCasesEnqueueResultModel:
+        survey_types, copy_plan = self._case_service.resolve_copy_plan(
+            survey_types, refresh_questionnaires
+        )
+        with log_stage(
+            "enqueue_questionnaires", questionnaire_count=len(copy_plan.copyable)
+        ) as stage_fields:
+            enqueued_count = self._work_queue.enqueue(
+                [
+                    WorkItemModel(questionnaire_name)
+                    for questionnaire_name in copy_plan.copyable
+                ]
+            )
+            stage_fields["enqueued_count"] = enqueued_count
+
+        return CopyCasesEnqueueResultModel(
+            survey_types,
+            copy_plan,
+            enqueued_count,
+            self._work_queue.pending_count(),
+        )
+
+    def process_work_items(self, max_items: int = 1) -> WorkItemResultsModel:
+        """Copies claimed questionnaires, dead-lettering the ones that cannot finish.
+
+        A questionnaire still locked on its last allowed delivery, or delivered
+        more often than allowed because its workers died, is dead-lettered and
+        reported as failed rather than redelivered forever.
+        """
+        questionnaire_results = []
+        requeued_questionnaires = []
+        max_deliveries = self._copy_cases_configuration.work_queue_max_deliveries
+        for _ in range(max_items):
+            item = self._work_queue.claim()
+            if item is None:
+                break
+
+            if item.deliveries > max_deliveries:
+                questionnaire_results.append(
+                    self.dead_letter(
+                        item, f"Not finished after {max_deliveries} deliveries"
+                    )
+                )
+                continue
+
+            # the tables may have changed since the coordinator checked them
+            result = self._case_service.try_copy_cases_for_questionnaire(
+                item.questionnaire_name, check_edit_table_exists=True
+            )
+            if (
+                result.status == QuestionnaireCopyResultModel.LOCKED
+                and item.deliveries >= max_deliveries
+            ):
+                result = self.dead_letter(
+                    item,
+                    f"Still locked by another invocation after "
+                    f"{item.deliveries} deliveries",
+                    attempts=result.attempts,
+                )
+            elif result.status == QuestionnaireCopyResultModel.LOCKED:
+                # another invocation is copying it, so leave the item claimed and
+                # let it come back after the visibility timeout instead of dropping it
+                logging.warning(
+                    f"Leaving '{item.questionnaire_name}' queued while it is locked"
+                )
+                requeued_questionnaires.append(item.questionnaire_name)
+            elif (
+                CaseService.should_requeue(result)
+                and item.deliveries <= self._copy_cases_configuration.requeue_limit
+            ):
+                logging.warning(
+                    f"Requeuing '{item.questionnaire_name}' after lock conflicts"
+                )
+                self._work_queue.release(item)
+                requeued_questionnaires.append(item.questionnaire_name)
+            elif result.failed:
+                self._work_queue.dead_letter(item, result.error or result.status)
+            else:
+                self._work_queue.acknowledge(item)
+            questionnaire_results.append(result)
+
+        return WorkItemResultsModel(
+            questionnaire_results,
+            requeued_questionnaires,
+            self._work_queue.pending_count(),
+        )
+
+    def dead_letter(
+        self, item: WorkItemModel, reason: str, attempts: int = 0
+    ) -> QuestionnaireCopyResultModel:
+        logging.error(f"Dead-lettering '{item.questionnaire_name}': {reason}")
+        self._work_queue.dead_letter(item, reason)
+        return QuestionnaireCopyResultModel(
+            item.questionnaire_name,
+            QuestionnaireCopyResultModel.FAILED,
+            error=reason,
+            attempts=attempts,
+        )
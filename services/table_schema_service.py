@@ -0,0 +1,135 @@
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, text, Connection
+from sqlalchemy.exc import NoSuchTableError
+
+from models.copy_columns_model import CopyColumnsModel
+from models.table_schema_model import TableSchemaModel
+from utilities.logging import log_stage
+from utilities.table_schema_cache import TableSchemaCache
+
+table_schema_cache = TableSchemaCache()
+
+
+class TableSchemaService:
+    """Works out which columns a copy moves, reflecting tables only when they change.
+
+    Each table's fingerprint is read once per request and compared with the cached
+    schema, so warm invocations skip reading the column list.
+    """
+
+    def __init__(self, schema_cache: Optional[TableSchemaCache] = None):
+        self._table_schema_cache = schema_cache or table_schema_cache
+        self._table_fingerprints: Dict[str, str] = {}
+        self._table_fingerprints_lock = threading.Lock()
+
+    def get_table_fingerprints(
+        self, connection: Connection, table_names: List[str]
+    ) -> Dict[str, str]:
+        table_fingerprints = self.fetch_table_fingerprints(connection, table_names)
+        with self._table_fingerprints_lock:
+            self._table_fingerprints.update(table_fingerprints)
+        return table_fingerprints
+
+    def get_copy_columns(
+        self,
+        connection: Connection,
+        edit_table_name: str,
+        questionnaire_table_name: str,
+    ) -> CopyColumnsModel:
+        table_names = [questionnaire_table_name, edit_table_name]
+        with self._table_fingerprints_lock:
+            table_fingerprints = {
+                table_name: self._table_fingerprints[table_name]
+                for table_name in table_names
+                if table_name in self._table_fingerprints
+            }
+        unknown_table_names = [
+            table_name
+            for table_name in table_names
+            if table_name not in table_fingerprints
+        ]
+        if unknown_table_names:
+            table_fingerprints.update(
+                self.get_table_fingerprints(connection, unknown_table_names)
+            )
+        for table_name in table_names:
+            # only existing tables have a fingerprint, and a schema without
+            # columns must never reach the cache
+            if table_name not in table_fingerprints:
+                raise NoSuchTableError(table_name)
+
+        table_schemas = {}
+        for table_name in table_names:
+            table_schema = self._table_schema_cache.get(
+                table_name, table_fingerprints[table_name]
+            )
+            if table_schema is not None:
+                table_schemas[table_name] = table_schema
+
+        missing_table_names = [
+            table_name for table_name in table_names if table_name not in table_schemas
+        ]
+        if missing_table_names:
+            with log_stage("schema_reflection", table_count=len(missing_table_names)):
+                for table_schema in self.fetch_table_schemas(
+                    connection, missing_table_names, table_fingerprints
+                ):
+                    self._table_schema_cache.set(table_schema)
+                    table_schemas[table_schema.table_name] = table_schema
+
+        return CopyColumnsModel.from_table_schemas(
+            table_schemas[questionnaire_table_name], table_schemas[edit_table_name]
+        )
+
+    @staticmethod
+    def fetch_table_fingerprints(
+        connection: Connection, table_names: List[str]
+    ) -> Dict[str, str]:
+        """Fingerprints each existing table's columns with a single metadata query.
+
+        Tables that do not exist are left out of the result.
+        """
+        if not table_names:
+            return {}
+
+        rows = connection.execute(
+            text(
+                "SELECT TABLE_NAME, CONCAT(COUNT(*), ':', SUM(CRC32(CONCAT_WS(':', \
+                COLUMN_NAME, COLUMN_TYPE, COLUMN_KEY, ORDINAL_POSITION)))) \
+                FROM information_schema.COLUMNS \
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :table_names \
+                GROUP BY TABLE_NAME"
+            ).bindparams(bindparam("table_names", expanding=True)),
+            {"table_names": table_names},
+        )
+        return {row[0]: str(row[1]) for row in rows}
+
+    @staticmethod
+    def fetch_table_schemas(
+        connection: Connection,
+        table_names: List[str],
+        table_fingerprints: Dict[str, str],
+    ) -> List[TableSchemaModel]:
+        rows = connection.execute(
+            text(
+                "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_KEY \
+                FROM information_schema.COLUMNS \
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :table_names \
+                ORDER BY TABLE_NAME, ORDINAL_POSITION"
+            ).bindparams(bindparam("table_names", expanding=True)),
+            {"table_names": table_names},
+        )
+
+        table_schemas = {
+            table_name: TableSchemaModel(
+                table_name, table_fingerprints[table_name], [], []
+            )
+            for table_name in table_names
+        }
+        for table_name, column_name, column_key in rows:
+            table_schemas[table_name].columns.append(column_name)
+            if column_key == "PRI":
+                table_schemas[table_name].primary_key_columns.append(column_name)
+        return list(table_schemas.values())
@@ -1,7 +1,5 @@
 import logging
 
-import flask
-
 from utilities.custom_exceptions import (
     RequestError,
 )
@@ -15,10 +13,24 @@ class ValidationService:
     def validate_request_values_are_not_empty(request):
         missing_values = []
         survey_type = request.json["survey_type"]
-        if survey_type is None or survey_type == "":
+        if isinstance(survey_type, list):
+            if not survey_type or any(
+                value is None or value == "" for value in survey_type
+            ):
+                missing_values.append("survey_type")
+        elif survey_type is None or survey_type == "":
             missing_values.append("survey_type")
 
         if missing_values:
             error_message = f"Missing required values from request: {missing_values}"
             logging.error(error_message)
             raise RequestError(error_message)
+
+        survey_types = survey_type if isinstance(survey_type, list) else [survey_type]
+        if not all(isinstance(value, str) for value in survey_types):
+            error_message = (
+                "Invalid values in request: ['survey_type'] must be a string "
+                "or a list of strings"
+            )
+            logging.error(error_message)
+            raise RequestError(error_message)
@@ -0,0 +1,437 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Double,
+    Engine,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
+
+from models.copy_cases_configuration_model import (
+    CopyCasesConfigurationModel,
+    WorkQueueBackend,
+)
+from models.work_item_model import WorkItemModel
+from utilities.custom_exceptions import ConfigError
+
+
+class WorkQueue(ABC):
+    """Holds one work item per questionnaire between the coordinator and the workers.
+
+    Enqueuing a questionnaire that is already queued is a no-op, so a coordinator
+    can be re-run safely. A claimed item stays hidden for the visibility timeout
+    and is delivered again if its worker never acknowledges it.
+    """
+
+    @abstractmethod
+    def enqueue(self, items: List[WorkItemModel]) -> int:
+        """Queues the items that are not already queued and returns how many were added."""
+
+    @abstractmethod
+    def claim(self) -> Optional[WorkItemModel]:
+        """Hides the next visible item from other workers and returns it."""
+
+    @abstractmethod
+    def acknowledge(self, item: WorkItemModel) -> None:
+        """Removes a claimed item once it no longer needs to be worked on."""
+
+    @abstractmethod
+    def release(self, item: WorkItemModel) -> None:
+        """Puts a claimed item back at the end of the queue for another delivery."""
+
+    @abstractmethod
+    def dead_letter(self, item: WorkItemModel, reason: str) -> None:
+        """Removes a claimed item that failed and keeps it with the reason for inspection."""
+
+    @abstractmethod
+    def pending_count(self) -> int:
+        """Counts the queued items, including claimed ones."""
+
+    @abstractmethod
+    def dead_letter_count(self) -> int:
+        """Counts the items that were dead-lettered."""
+
+
+class InMemoryWorkQueue(WorkQueue):
+    """A work queue for a single process, so it cannot connect separate invocations."""
+
+    def __init__(
+        self,
+        visibility_timeout_seconds: float = 600,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._visibility_timeout_seconds = visibility_timeout_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[float, WorkItemModel]]" = OrderedDict()
+        self._dead_letters: Dict[str, Tuple[WorkItemModel, str]] = {}
+
+    def enqueue(self, items: List[WorkItemModel]) -> int:
+        enqueued_count = 0
+        with self._lock:
+            for item in items:
+                if item.questionnaire_name not in self._items:
+                    self._items[item.questionnaire_name] = (self._clock(), item)
+                    enqueued_count += 1
+        return enqueued_count
+
+    def claim(self) -> Optional[WorkItemModel]:
+        with self._lock:
+            now = self._clock()
+            for questionnaire_name, (visible_at, item) in self._items.items():
+                if visible_at <= now:
+                    claimed_item = item._replace(deliveries=item.deliveries + 1)
+                    self._items[questionnaire_name] = (
+                        now + self._visibility_timeout_seconds,
+                        claimed_item,
+                    )
+                    return claimed_item
+        return None
+
+    def acknowledge(self, item: WorkItemModel) -> None:
+        with self._lock:
+            self._items.pop(item.questionnaire_name, None)
+
+    def release(self, item: WorkItemModel) -> None:
+        with self._lock:
+            if self._items.pop(item.questionnaire_name, None) is not None:
+                self._items[item.questionnaire_name] = (self._clock(), item)
+
+    def dead_letter(self, item: WorkItemModel, reason: str) -> None:
+        with self._lock:
+            self._items.pop(item.questionnaire_name, None)
+            self._dead_letters[item.questionnaire_name] = (item, reason)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def dead_letter_count(self) -> int:
+        with self._lock:
+            return len(self._dead_letters)
+
+
+class SqliteWorkQueue(WorkQueue):
+    """A work queue in a SQLite file, shared by every process that can open the file.
+
+    Claims take SQLite's write lock, so two workers can never claim the same item.
+    That only holds where the file system's locks work across every process using
+    the file. Network file systems often do not provide them.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        visibility_timeout_seconds: float = 600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._database_path = database_path
+        self._visibility_timeout_seconds = visibility_timeout_seconds
+        self._clock = clock
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS copy_cases_work_items ( \
+                questionnaire_name TEXT PRIMARY KEY, \
+                deliveries INTEGER NOT NULL, \
+                enqueued_at REAL NOT NULL, \
+                visible_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS copy_cases_dead_letters ( \
+                questionnaire_name TEXT PRIMARY KEY, \
+                deliveries INTEGER NOT NULL, \
+                reason TEXT NOT NULL, \
+                failed_at REAL NOT NULL)"
+            )
+
+    def enqueue(self, items: List[WorkItemModel]) -> int:
+        now = self._clock()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            enqueued_count = 0
+            for item in items:
+                enqueued_count += connection.execute(
+                    "INSERT OR IGNORE INTO copy_cases_work_items \
+                    (questionnaire_name, deliveries, enqueued_at, visible_at) \
+                    VALUES (?, ?, ?, ?)",
+                    (item.questionnaire_name, item.deliveries, now, now),
+                ).rowcount
+            connection.execute("COMMIT")
+        return enqueued_count
+
+    def claim(self) -> Optional[WorkItemModel]:
+        now = self._clock()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT questionnaire_name, deliveries FROM copy_cases_work_items \
+                WHERE visible_at <= ? ORDER BY enqueued_at, rowid LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+
+            claimed_item = WorkItemModel(row[0], row[1] + 1)
+            connection.execute(
+                "UPDATE copy_cases_work_items SET deliveries = ?, visible_at = ? \
+                WHERE questionnaire_name = ?",
+                (
+                    claimed_item.deliveries,
+                    now + self._visibility_timeout_seconds,
+                    claimed_item.questionnaire_name,
+                ),
+            )
+            connection.execute("COMMIT")
+        return claimed_item
+
+    def acknowledge(self, item: WorkItemModel) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "DELETE FROM copy_cases_work_items WHERE questionnaire_name = ?",
+                (item.questionnaire_name,),
+            )
+
+    def release(self, item: WorkItemModel) -> None:
+        now = self._clock()
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE copy_cases_work_items SET enqueued_at = ?, visible_at = ? \
+                WHERE questionnaire_name = ?",
+                (now, now, item.questionnaire_name),
+            )
+
+    def dead_letter(self, item: WorkItemModel, reason: str) -> None:
+        now = self._clock()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "DELETE FROM copy_cases_work_items WHERE questionnaire_name = ?",
+                (item.questionnaire_name,),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO copy_cases_dead_letters \
+                (questionnaire_name, deliveries, reason, failed_at) \
+                VALUES (?, ?, ?, ?)",
+                (item.questionnaire_name, item.deliveries, reason, now),
+            )
+            connection.execute("COMMIT")
+
+    def pending_count(self) -> int:
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM copy_cases_work_items"
+            ).fetchone()[0]
+
+    def dead_letter_count(self) -> int:
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM copy_cases_dead_letters"
+            ).fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit, with explicit transactions where a read and write must not interleave
+        return sqlite3.connect(self._database_path, timeout=30, isolation_level=None)
+
+
+class MysqlWorkQueue(WorkQueue):
+    """A work queue in tables of the database the cases are copied in.
+
+    Every instance already connects to that database, so nothing else needs to be
+    shared. Claims lock the item's row with FOR UPDATE SKIP LOCKED, so two workers
+    never claim the same item and a worker does not wait on items others are
+    claiming. SKIP LOCKED needs MySQL 8.0.
+    """
+
+    def __init__(
+        self,
+        database: Engine,
+        visibility_timeout_seconds: float = 600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._database = database
+        self._visibility_timeout_seconds = visibility_timeout_seconds
+        self._clock = clock
+        metadata = MetaData()
+        self._work_items = Table(
+            "copy_cases_work_items",
+            metadata,
+            Column("questionnaire_name", String(255), primary_key=True),
+            Column("deliveries", Integer, nullable=False),
+            Column("enqueued_at", Double, nullable=False),
+            Column("visible_at", Double, nullable=False),
+        )
+        self._dead_letters = Table(
+            "copy_cases_dead_letters",
+            metadata,
+            Column("questionnaire_name", String(255), primary_key=True),
+            Column("deliveries", Integer, nullable=False),
+            Column("reason", String(1024), nullable=False),
+            Column("failed_at", Double, nullable=False),
+        )
+        metadata.create_all(self._database)
+
+    def enqueue(self, items: List[WorkItemModel]) -> int:
+        now = self._clock()
+        enqueue_item = (
+            insert(self._work_items)
+            .prefix_with("IGNORE", dialect="mysql")
+            .prefix_with("OR IGNORE", dialect="sqlite")
+        )
+        enqueued_count = 0
+        with self._database.begin() as connection:
+            for item in items:
+                enqueued_count += connection.execute(
+                    enqueue_item,
+                    {
+                        "questionnaire_name": item.questionnaire_name,
+                        "deliveries": item.deliveries,
+                        "enqueued_at": now,
+                        "visible_at": now,
+                    },
+                ).rowcount
+        return enqueued_count
+
+    def claim(self) -> Optional[WorkItemModel]:
+        now = self._clock()
+        work_items = self._work_items
+        with self._database.begin() as connection:
+            row = connection.execute(
+                select(work_items.c.questionnaire_name, work_items.c.deliveries)
+                .where(work_items.c.visible_at <= now)
+                .order_by(work_items.c.enqueued_at, work_items.c.questionnaire_name)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).one_or_none()
+            if row is None:
+                return None
+
+            claimed_item = WorkItemModel(row.questionnaire_name, row.deliveries + 1)
+            connection.execute(
+                update(work_items)
+                .where(
+                    work_items.c.questionnaire_name == claimed_item.questionnaire_name
+                )
+                .values(
+                    deliveries=claimed_item.deliveries,
+                    visible_at=now + self._visibility_timeout_seconds,
+                )
+            )
+        return claimed_item
+
+    def acknowledge(self, item: WorkItemModel) -> None:
+        with self._database.begin() as connection:
+            connection.execute(
+                delete(self._work_items).where(
+                    self._work_items.c.questionnaire_name == item.questionnaire_name
+                )
+            )
+
+    def release(self, item: WorkItemModel) -> None:
+        now = self._clock()
+        with self._database.begin() as connection:
+            connection.execute(
+                update(self._work_items)
+                .where(self._work_items.c.questionnaire_name == item.questionnaire_name)
+                .values(enqueued_at=now, visible_at=now)
+            )
+
+    def dead_letter(self, item: WorkItemModel, reason: str) -> None:
+        now = self._clock()
+        with self._database.begin() as connection:
+            connection.execute(
+                delete(self._work_items).where(
+                    self._work_items.c.questionnaire_name == item.questionnaire_name
+                )
+            )
+            connection.execute(
+                delete(self._dead_letters).where(
+                    self._dead_letters.c.questionnaire_name == item.questionnaire_name
+                )
+            )
+            connection.execute(
+                insert(self._dead_letters),
+                {
+                    "questionnaire_name": item.questionnaire_name,
+                    "deliveries": item.deliveries,
+                    "reason": reason[:1024],
+                    "failed_at": now,
+                },
+            )
+
+    def pending_count(self) -> int:
+        return self._count(self._work_items)
+
+    def dead_letter_count(self) -> int:
+        return self._count(self._dead_letters)
+
+    def _count(self, queue_table: Table) -> int:
+        with self._database.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(queue_table)
+            ).scalar_one()
+
+
+_work_queues: Dict[Hashable, WorkQueue] = {}
+_work_queues_lock = threading.Lock()
+
+
+def get_work_queue(
+    copy_cases_configuration_model: CopyCasesConfigurationModel,
+    database: Optional[Engine] = None,
+) -> WorkQueue:
+    work_queue = copy_cases_configuration_model.work_queue
+    visibility_timeout_seconds = (
+        copy_cases_configuration_model.work_queue_visibility_timeout_seconds
+    )
+    if work_queue == WorkQueueBackend.MYSQL:
+        if database is None:
+            raise ValueError("The mysql work queue needs the database engine")
+        mysql_work_queue_key = (work_queue, database, visibility_timeout_seconds)
+        with _work_queues_lock:
+            if mysql_work_queue_key not in _work_queues:
+                _work_queues[mysql_work_queue_key] = MysqlWorkQueue(
+                    database, visibility_timeout_seconds
+                )
+            return _work_queues[mysql_work_queue_key]
+
+    if work_queue != WorkQueueBackend.SQLITE:
+        raise ConfigError(
+            f"Environment variable COPY_CASES_WORK_QUEUE must be one of: "
+            f"{list(WorkQueueBackend.BACKENDS)}"
+        )
+    # the coordinator and the workers run as separate invocations, so a queue
+    # they do not all see would drop every item the coordinator enqueues
+    if not copy_cases_configuration_model.work_queue_shared:
+        raise ConfigError(
+            "Environment variable COPY_CASES_WORK_QUEUE_SHARED must be true to fan "
+            "out, once COPY_CASES_WORK_QUEUE_PATH is on storage mounted by every "
+            "instance"
+        )
+
+    work_queue_key = (
+        work_queue,
+        copy_cases_configuration_model.work_queue_path,
+        visibility_timeout_seconds,
+    )
+    with _work_queues_lock:
+        if work_queue_key not in _work_queues:
+            _work_queues[work_queue_key] = SqliteWorkQueue(
+                copy_cases_configuration_model.work_queue_path,
+                visibility_timeout_seconds,
+            )
+        return _work_queues[work_queue_key]
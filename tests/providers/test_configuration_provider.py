@@ -265,6 +265,86 @@ class TestConfigurationProvider:
         error_message = "Environment variable DATABASE_PORT must be a number"
         assert err.value.args[0] == error_message
 
+    def test_get_database_connection_model_uses_default_pool_settings_when_not_set(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("DATABASE_NAME", "test_database_name")
+        monkeypatch.setenv("DATABASE_IP_ADDRESS", "0.0.0.0")
+        monkeypatch.setenv("DATABASE_USERNAME", "test_database_username")
+        monkeypatch.setenv("DATABASE_PASSWORD", "test_database_password")
+        monkeypatch.setenv("DATABASE_PORT", "1234")
+
+        # act
+        actual_result = service_under_test.get_database_connection_model()
+
+        # assert
+        assert actual_result.database_pool_size == 5
+        assert actual_result.database_pool_max_overflow == 2
+        assert actual_result.database_pool_recycle_seconds == 1800
+        assert actual_result.database_pool_pre_ping is True
+
+    def test_get_database_connection_model_uses_pool_settings_from_environment_variables(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("DATABASE_NAME", "test_database_name")
+        monkeypatch.setenv("DATABASE_IP_ADDRESS", "0.0.0.0")
+        monkeypatch.setenv("DATABASE_USERNAME", "test_database_username")
+        monkeypatch.setenv("DATABASE_PASSWORD", "test_database_password")
+        monkeypatch.setenv("DATABASE_PORT", "1234")
+        monkeypatch.setenv("DATABASE_POOL_SIZE", "10")
+        monkeypatch.setenv("DATABASE_POOL_MAX_OVERFLOW", "0")
+        monkeypatch.setenv("DATABASE_POOL_RECYCLE_SECONDS", "300")
+        monkeypatch.setenv("DATABASE_POOL_PRE_PING", "false")
+
+        # act
+        actual_result = service_under_test.get_database_connection_model()
+
+        # assert
+        assert actual_result.database_pool_size == 10
+        assert actual_result.database_pool_max_overflow == 0
+        assert actual_result.database_pool_recycle_seconds == 300
+        assert actual_result.database_pool_pre_ping is False
+
+    @pytest.mark.parametrize(
+        "variable_name,invalid_value,error_message",
+        [
+            (
+                "DATABASE_POOL_SIZE",
+                "five",
+                "Environment variable DATABASE_POOL_SIZE must be a number",
+            ),
+            (
+                "DATABASE_POOL_PRE_PING",
+                "maybe",
+                "Environment variable DATABASE_POOL_PRE_PING must be a boolean",
+            ),
+        ],
+    )
+    def test_get_database_connection_model_raises_config_error_when_pool_setting_is_invalid(
+        self,
+        variable_name,
+        invalid_value,
+        error_message,
+        monkeypatch,
+        service_under_test,
+    ):
+        # arrange
+        monkeypatch.setenv("DATABASE_NAME", "test_database_name")
+        monkeypatch.setenv("DATABASE_IP_ADDRESS", "0.0.0.0")
+        monkeypatch.setenv("DATABASE_USERNAME", "test_database_username")
+        monkeypatch.setenv("DATABASE_PASSWORD", "test_database_password")
+        monkeypatch.setenv("DATABASE_PORT", "1234")
+        monkeypatch.setenv(variable_name, invalid_value)
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_database_connection_model()
+
+        # assert
+        assert err.value.args[0] == error_message
+
     def test_get_blaise_connection_model_returns_expected_result_with_valid_environment_variables(
         self, monkeypatch, service_under_test
     ):
@@ -351,3 +431,396 @@ class TestConfigurationProvider:
         # assert
         error_message = "Missing environment variable: BLAISE_SERVER_PARK"
         assert err.value.args[0] == error_message
+
+    def test_get_copy_cases_configuration_model_defaults_to_one_worker(
+        self, service_under_test
+    ):
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.max_workers == 1
+
+    def test_get_copy_cases_configuration_model_uses_max_workers_from_environment_variable(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_MAX_WORKERS", "4")
+
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.max_workers == 4
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_max_workers_is_zero(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_MAX_WORKERS", "0")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        error_message = "Environment variable COPY_CASES_MAX_WORKERS must be at least 1"
+        assert err.value.args[0] == error_message
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_max_workers_exceeds_the_pool(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_MAX_WORKERS", "8")
+        monkeypatch.setenv("DATABASE_POOL_SIZE", "5")
+        monkeypatch.setenv("DATABASE_POOL_MAX_OVERFLOW", "2")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        error_message = (
+            "Environment variable COPY_CASES_MAX_WORKERS must not be more than "
+            "DATABASE_POOL_SIZE + DATABASE_POOL_MAX_OVERFLOW (7)"
+        )
+        assert err.value.args[0] == error_message
+
+    def test_get_copy_cases_configuration_model_allows_max_workers_up_to_the_pool_capacity(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_MAX_WORKERS", "12")
+        monkeypatch.setenv("DATABASE_POOL_SIZE", "10")
+        monkeypatch.setenv("DATABASE_POOL_MAX_OVERFLOW", "2")
+
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.max_workers == 12
+
+    def test_get_copy_cases_configuration_model_uses_chunk_settings_from_environment_variables(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_MODE", "chunked")
+        monkeypatch.setenv("COPY_CASES_CHUNK_SIZE", "500")
+        monkeypatch.setenv("COPY_CASES_CHUNK_PAUSE_MILLISECONDS", "50")
+
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.copy_mode == "chunked"
+        assert actual_result.chunk_size == 500
+        assert actual_result.chunk_pause_milliseconds == 50
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_copy_mode_is_unknown(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_MODE", "sideways")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        error_message = (
+            "Environment variable COPY_CASES_MODE must be one of: "
+            "['full', 'chunked', 'incremental', 'hashed', 'adaptive']"
+        )
+        assert err.value.args[0] == error_message
+
+    def test_get_blaise_connection_model_uses_questionnaire_cache_ttl_from_environment_variable(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("BLAISE_API_URL", "testBlaise.com")
+        monkeypatch.setenv("BLAISE_SERVER_PARK", "test_server_park")
+        monkeypatch.setenv("BLAISE_QUESTIONNAIRE_CACHE_TTL_SECONDS", "0")
+
+        # act
+        actual_result = service_under_test.get_blaise_connection_model()
+
+        # assert
+        assert actual_result.questionnaire_cache_ttl_seconds == 0
+
+    def test_get_copy_cases_configuration_model_uses_async_execution_from_environment_variable(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_EXECUTION", "async")
+
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.execution_mode == "async"
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_async_execution_is_used_with_chunked_mode(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_EXECUTION", "async")
+        monkeypatch.setenv("COPY_CASES_MODE", "chunked")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        error_message = (
+            "Environment variable COPY_CASES_EXECUTION 'async' only supports "
+            "COPY_CASES_MODE 'full'"
+        )
+        assert err.value.args[0] == error_message
+
+    def test_get_copy_cases_configuration_model_uses_join_strategy_from_environment_variables(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_JOIN_STRATEGY", "edited_set")
+        monkeypatch.setenv("COPY_CASES_EDITED_SET_MIN_ROWS", "1000")
+
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.join_strategy == "edited_set"
+        assert actual_result.edited_set_min_rows == 1000
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_join_strategy_is_unknown(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_JOIN_STRATEGY", "hash_join")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        error_message = (
+            "Environment variable COPY_CASES_JOIN_STRATEGY must be one of: "
+            "['auto', 'left_join', 'edited_set']"
+        )
+        assert err.value.args[0] == error_message
+
+    def test_get_copy_cases_configuration_model_uses_retry_settings_from_environment_variables(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_RETRY_ATTEMPTS", "5")
+        monkeypatch.setenv("COPY_CASES_RETRY_BASE_DELAY_MILLISECONDS", "250")
+        monkeypatch.setenv("COPY_CASES_RETRY_MAX_DELAY_MILLISECONDS", "4000")
+        monkeypatch.setenv("COPY_CASES_REQUEUE_LIMIT", "0")
+
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.retry_attempts == 5
+        assert actual_result.retry_base_delay_milliseconds == 250
+        assert actual_result.retry_max_delay_milliseconds == 4000
+        assert actual_result.requeue_limit == 0
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_retry_attempts_is_less_than_1(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_RETRY_ATTEMPTS", "0")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert (
+            err.value.args[0]
+            == "Environment variable COPY_CASES_RETRY_ATTEMPTS must be at least 1"
+        )
+
+    def test_get_profiling_configuration_model_is_off_by_default(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.delenv("PROFILING_MODE", raising=False)
+
+        # act
+        actual_result = service_under_test.get_profiling_configuration_model()
+
+        # assert
+        assert actual_result.mode == "off"
+        assert actual_result.should_profile({"profile": True}) is False
+
+    @pytest.mark.parametrize(
+        "profiling_mode, request_json, expected_result",
+        [
+            ("on", {}, True),
+            ("request", {}, False),
+            ("request", {"profile": "yes"}, False),
+            ("request", {"profile": True}, True),
+        ],
+    )
+    def test_get_profiling_configuration_model_profiles_when_enabled_or_requested(
+        self,
+        monkeypatch,
+        service_under_test,
+        profiling_mode,
+        request_json,
+        expected_result,
+    ):
+        # arrange
+        monkeypatch.setenv("PROFILING_MODE", profiling_mode)
+        monkeypatch.setenv("PROFILING_TOP_COUNT", "5")
+
+        # act
+        actual_result = service_under_test.get_profiling_configuration_model()
+
+        # assert
+        assert actual_result.top_count == 5
+        assert actual_result.should_profile(request_json) is expected_result
+
+    def test_get_profiling_configuration_model_raises_config_error_when_mode_is_unknown(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("PROFILING_MODE", "always")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_profiling_configuration_model()
+
+        # assert
+        assert err.value.args[0] == (
+            "Environment variable PROFILING_MODE must be one of: "
+            "['off', 'on', 'request']"
+        )
+
+    @pytest.fixture
+    def valid_environment(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_NAME", "test_database_name")
+        monkeypatch.setenv("DATABASE_IP_ADDRESS", "0.0.0.0")
+        monkeypatch.setenv("DATABASE_USERNAME", "test_database_username")
+        monkeypatch.setenv("DATABASE_PASSWORD", "test_database_password")
+        monkeypatch.setenv("DATABASE_PORT", "1234")
+        monkeypatch.setenv("BLAISE_API_URL", "testBlaise.com")
+        monkeypatch.setenv("BLAISE_SERVER_PARK", "test_server_park")
+
+    def test_get_configuration_snapshot_reads_the_environment_once(
+        self, monkeypatch, valid_environment, service_under_test
+    ):
+        # arrange
+        first_snapshot = service_under_test.get_configuration_snapshot()
+        monkeypatch.setenv("COPY_CASES_MAX_WORKERS", "8")
+
+        # act
+        second_snapshot = service_under_test.get_configuration_snapshot()
+
+        # assert
+        assert second_snapshot is first_snapshot
+        assert second_snapshot.copy_cases.max_workers == 1
+        assert second_snapshot.database.database_port == 1234
+        assert second_snapshot.blaise.blaise_server_park == "test_server_park"
+
+    def test_get_configuration_snapshot_is_immutable(
+        self, valid_environment, service_under_test
+    ):
+        # arrange
+        configuration_snapshot = service_under_test.get_configuration_snapshot()
+
+        # act
+        with pytest.raises(AttributeError):
+            configuration_snapshot.copy_cases.chunk_size = 10
+
+        # assert
+        assert configuration_snapshot.copy_cases.chunk_size == 1000
+
+    def test_get_configuration_snapshot_fingerprint_changes_with_any_setting(
+        self, monkeypatch, valid_environment
+    ):
+        # arrange
+        first_fingerprint = (
+            ConfigurationProvider().get_configuration_snapshot().fingerprint
+        )
+        monkeypatch.setenv("DATABASE_POOL_TIMEOUT_SECONDS", "5")
+
+        # act
+        second_fingerprint = (
+            ConfigurationProvider().get_configuration_snapshot().fingerprint
+        )
+
+        # assert
+        assert first_fingerprint != second_fingerprint
+        assert (
+            ConfigurationProvider().get_configuration_snapshot().fingerprint
+            == second_fingerprint
+        )
+
+    def test_get_configuration_snapshot_does_not_cache_an_invalid_environment(
+        self, monkeypatch, valid_environment, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_MODE", "everything")
+        with pytest.raises(ConfigError):
+            service_under_test.get_configuration_snapshot()
+        monkeypatch.setenv("COPY_CASES_MODE", "chunked")
+
+        # act
+        configuration_snapshot = service_under_test.get_configuration_snapshot()
+
+        # assert
+        assert configuration_snapshot.copy_cases.copy_mode == "chunked"
+
+    def test_get_copy_cases_configuration_model_uses_work_queue_settings_from_environment_variables(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_WORK_QUEUE", "sqlite")
+        monkeypatch.setenv("COPY_CASES_WORK_QUEUE_PATH", "/mnt/queue/queue.sqlite3")
+        monkeypatch.setenv("COPY_CASES_WORK_QUEUE_VISIBILITY_TIMEOUT_SECONDS", "120")
+        monkeypatch.setenv("COPY_CASES_WORK_QUEUE_SHARED", "true")
+        monkeypatch.setenv("COPY_CASES_WORK_QUEUE_MAX_DELIVERIES", "3")
+
+        # act
+        actual_result = service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert actual_result.work_queue == "sqlite"
+        assert actual_result.work_queue_path == "/mnt/queue/queue.sqlite3"
+        assert actual_result.work_queue_visibility_timeout_seconds == 120
+        assert actual_result.work_queue_shared is True
+        assert actual_result.work_queue_max_deliveries == 3
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_work_queue_max_deliveries_is_zero(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_WORK_QUEUE_MAX_DELIVERIES", "0")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert err.value.args[0] == (
+            "Environment variable COPY_CASES_WORK_QUEUE_MAX_DELIVERIES must be at least 1"
+        )
+
+    def test_get_copy_cases_configuration_model_raises_config_error_when_work_queue_is_unknown(
+        self, monkeypatch, service_under_test
+    ):
+        # arrange
+        monkeypatch.setenv("COPY_CASES_WORK_QUEUE", "pubsub")
+
+        # act
+        with pytest.raises(ConfigError) as err:
+            service_under_test.get_copy_cases_configuration_model()
+
+        # assert
+        assert err.value.args[0] == (
+            "Environment variable COPY_CASES_WORK_QUEUE must be one of: "
+            "['mysql', 'sqlite']"
+        )
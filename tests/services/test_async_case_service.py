@@ -0,0 +1,227 @@
+import asyncio
+import threading
+from unittest.mock import ANY, AsyncMock, MagicMock, Mock, call
+
+import pytest
+
+from models.copy_cases_configuration_model import CopyCasesConfigurationModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from models.row_count_model import RowCountModel
+from services.async_case_service import AsyncCaseService
+from utilities.custom_exceptions import BlaiseError
+from utilities.questionnaire_index import QuestionnaireIndex
+
+
+class TestAsyncCaseService:
+
+    @pytest.fixture()
+    def mock_connection(self):
+        # the copy opens its transactions on the questionnaire's connection
+        return MagicMock()
+
+    @pytest.fixture()
+    def mock_async_database_service(self, mock_connection):
+        async_database_service = MagicMock()
+        async_database_service.database.connect.return_value.__aenter__.return_value = (
+            mock_connection
+        )
+        async_database_service.get_table_fingerprints = AsyncMock(
+            return_value=dict.fromkeys(
+                [
+                    "LMS2101_AA1_Form",
+                    "LMS2101_AA1_EDIT_Form",
+                    "LMS2101_BB1_Form",
+                    "LMS2101_BB1_EDIT_Form",
+                    "LMS2101_CC1_Form",
+                ],
+                "12:345",
+            )
+        )
+        async_database_service.get_table_row_estimate = AsyncMock(return_value=100)
+        async_database_service.acquire_named_lock = AsyncMock(return_value=True)
+        async_database_service.release_named_lock = AsyncMock()
+        async_database_service.copy_cases = AsyncMock(
+            return_value=RowCountModel(rows_affected=3, inserted=1, updated=1)
+        )
+        return async_database_service
+
+    @pytest.fixture()
+    def mock_blaise_service(self):
+        blaise_service = Mock()
+        blaise_service.get_questionnaire_index.return_value = QuestionnaireIndex(
+            [
+                {"name": "LMS2101_AA1"},
+                {"name": "LMS2101_BB1"},
+                {"name": "LMS2101_CC1"},
+                {"name": "FRS2101"},
+            ]
+        )
+        return blaise_service
+
+    @pytest.fixture()
+    def service_under_test(
+        self, mock_async_database_service, mock_blaise_service
+    ) -> AsyncCaseService:
+        return AsyncCaseService(
+            mock_async_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(max_workers=2, execution_mode="async"),
+        )
+
+    def test_copy_cases_copies_every_copyable_questionnaire_for_the_survey_type(
+        self,
+        service_under_test,
+        mock_async_database_service,
+        mock_blaise_service,
+        mock_connection,
+    ):
+        # act
+        result = asyncio.run(
+            service_under_test.copy_cases("LMS", refresh_questionnaires=True)
+        )
+
+        # assert
+        mock_blaise_service.get_questionnaire_index.assert_called_once_with(True)
+        mock_async_database_service.get_table_fingerprints.assert_awaited_once()
+        assert mock_async_database_service.copy_cases.await_args_list == [
+            call(
+                mock_connection,
+                "LMS2101_AA1_EDIT_Form",
+                "LMS2101_AA1_Form",
+                join_strategy="left_join",
+            ),
+            call(
+                mock_connection,
+                "LMS2101_BB1_EDIT_Form",
+                "LMS2101_BB1_Form",
+                join_strategy="left_join",
+            ),
+        ]
+        assert result.copy_plan.copyable == ["LMS2101_AA1", "LMS2101_BB1"]
+        assert result.copy_plan.missing_edit_table == ["LMS2101_CC1"]
+        assert result.failed_questionnaires == []
+
+    def test_copy_cases_fetches_questionnaires_while_the_connection_is_opening(
+        self, service_under_test, mock_async_database_service, mock_blaise_service
+    ):
+        # arrange
+        fetch_started = threading.Event()
+        fetch_started_while_connecting = []
+
+        def get_questionnaire_index(_):
+            fetch_started.set()
+            return QuestionnaireIndex([{"name": "LMS2101_AA1"}])
+
+        async def open_connection(*_):
+            fetch_started_while_connecting.append(
+                await asyncio.to_thread(fetch_started.wait, 1)
+            )
+            return MagicMock()
+
+        mock_blaise_service.get_questionnaire_index.side_effect = (
+            get_questionnaire_index
+        )
+        mock_async_database_service.database.connect.return_value.__aenter__.side_effect = (
+            open_connection
+        )
+
+        # act
+        asyncio.run(service_under_test.copy_cases("LMS"))
+
+        # assert
+        assert fetch_started_while_connecting[0] is True
+
+    def test_copy_cases_gives_the_connection_back_when_the_questionnaire_fetch_fails(
+        self, service_under_test, mock_async_database_service, mock_blaise_service
+    ):
+        # arrange
+        mock_blaise_service.get_questionnaire_index.side_effect = BlaiseError(
+            "Error getting questionnaires"
+        )
+
+        # act
+        with pytest.raises(BlaiseError):
+            asyncio.run(service_under_test.copy_cases("LMS"))
+
+        # assert
+        mock_async_database_service.database.connect.return_value.__aexit__.assert_awaited_once()
+
+    def test_copy_cases_carries_on_and_returns_a_failed_result_when_a_questionnaire_errors(
+        self, service_under_test, mock_async_database_service
+    ):
+        # arrange
+        mock_async_database_service.copy_cases.side_effect = [
+            Exception("lock wait timeout"),
+            RowCountModel(rows_affected=1),
+        ]
+
+        # act
+        result = asyncio.run(service_under_test.copy_cases(["LMS"]))
+
+        # assert
+        statuses = {
+            questionnaire_result.questionnaire_name: questionnaire_result.status
+            for questionnaire_result in result.questionnaire_results
+        }
+        assert statuses == {
+            "LMS2101_AA1": QuestionnaireCopyResultModel.FAILED,
+            "LMS2101_BB1": QuestionnaireCopyResultModel.COPIED,
+            "LMS2101_CC1": QuestionnaireCopyResultModel.MISSING_EDIT_TABLE,
+        }
+
+    def test_copy_cases_runs_no_more_copies_at_once_than_max_workers(
+        self, service_under_test, mock_async_database_service, mock_blaise_service
+    ):
+        # arrange
+        mock_blaise_service.get_questionnaire_index.return_value = QuestionnaireIndex(
+            [{"name": f"LMS2101_{index}"} for index in range(6)]
+        )
+        mock_async_database_service.get_table_fingerprints.return_value = {
+            f"LMS2101_{index}{suffix}": "12:345"
+            for index in range(6)
+            for suffix in ("_Form", "_EDIT_Form")
+        }
+        running_copies = 0
+        most_running_copies = 0
+
+        async def copy_cases(*_, **__):
+            nonlocal running_copies, most_running_copies
+            running_copies += 1
+            most_running_copies = max(most_running_copies, running_copies)
+            await asyncio.sleep(0.01)
+            running_copies -= 1
+            return RowCountModel()
+
+        mock_async_database_service.copy_cases.side_effect = copy_cases
+
+        # act
+        asyncio.run(service_under_test.copy_cases("LMS"))
+
+        # assert
+        assert mock_async_database_service.copy_cases.await_count == 6
+        assert most_running_copies == 2
+
+    def test_copy_cases_skips_questionnaires_locked_by_another_invocation(
+        self, service_under_test, mock_async_database_service
+    ):
+        # arrange
+        mock_async_database_service.acquire_named_lock.side_effect = (
+            lambda connection, lock_name, timeout_seconds: lock_name
+            != "copy_cases_to_edit.LMS2101_AA1"
+        )
+
+        # act
+        result = asyncio.run(service_under_test.copy_cases("LMS"))
+
+        # assert
+        assert [
+            (questionnaire_result.questionnaire_name, questionnaire_result.status)
+            for questionnaire_result in result.questionnaire_results[:2]
+        ] == [
+            ("LMS2101_AA1", QuestionnaireCopyResultModel.LOCKED),
+            ("LMS2101_BB1", QuestionnaireCopyResultModel.COPIED),
+        ]
+        assert mock_async_database_service.copy_cases.await_count == 1
+        mock_async_database_service.release_named_lock.assert_awaited_once_with(
+            ANY, "copy_cases_to_edit.LMS2101_BB1"
+        )
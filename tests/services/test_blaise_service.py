@@ -2,11 +2,13 @@ import logging
 from unittest import mock
 from unittest.mock import Mock
 
-import blaise_restapi
 import pytest
+import requests
 
-from services.blaise_service import BlaiseService
+from models.blaise_connection_model import BlaiseConnectionModel
+from services.blaise_service import BlaiseService, SessionRestApiClient
 from utilities.custom_exceptions import BlaiseError
+from utilities.ttl_cache import TtlCache
 
 
 class TestBlaiseService:
@@ -48,13 +50,21 @@ class TestBlaiseService:
 
     @pytest.fixture()
     def mock_configuration_provider(self):
-        return Mock()
+        mock_configuration_provider = Mock()
+        mock_configuration_provider.get_configuration_snapshot.return_value.blaise = (
+            BlaiseConnectionModel(
+                blaise_api_url="blaise-api",
+                blaise_server_park="gusty",
+                questionnaire_cache_ttl_seconds=60,
+            )
+        )
+        return mock_configuration_provider
 
     @pytest.fixture()
     def blaise_service(self, mock_configuration_provider) -> BlaiseService:
-        return BlaiseService(mock_configuration_provider)
+        return BlaiseService(mock_configuration_provider, TtlCache())
 
-    @mock.patch.object(blaise_restapi.Client, "get_all_questionnaires_for_server_park")
+    @mock.patch.object(SessionRestApiClient, "get_all_questionnaires_for_server_park")
     def test_get_questionnaires_returns_a_list_of_dictionaries_containing_questionnaire_info(
         self,
         _mock_rest_api_client_get_all_questionnaires_for_server_park,
@@ -85,7 +95,7 @@ class TestBlaiseService:
         assert result[1]["id"] == mock_case_2["id"]
         assert result[1]["serverParkName"] == mock_case_2["serverParkName"]
 
-    @mock.patch.object(blaise_restapi.Client, "get_all_questionnaires_for_server_park")
+    @mock.patch.object(SessionRestApiClient, "get_all_questionnaires_for_server_park")
     def test_get_questionnaire_logs_the_correct_information(
         self,
         _mock_rest_api_client_get_all_questionnaires_for_server_park,
@@ -111,7 +121,7 @@ class TestBlaiseService:
             "Got questionnaires",
         ) in caplog.record_tuples
 
-    @mock.patch.object(blaise_restapi.Client, "get_all_questionnaires_for_server_park")
+    @mock.patch.object(SessionRestApiClient, "get_all_questionnaires_for_server_park")
     def test_get_questionnaire_logs_error_and_raises_blaise_questionnaire_error_exception(
         self,
         mock_rest_api_client_get_all_questionnaires_for_server_park,
@@ -129,7 +139,7 @@ class TestBlaiseService:
 
         # Assert
         error_message = (
-            "Exception caught in get_questionnaires(). "
+            "Exception caught in get_questionnaire_index(). "
             "Error getting questionnaires: DFS had to end their sale"
         )
         assert err.value.args[0] == error_message
@@ -138,3 +148,116 @@ class TestBlaiseService:
             logging.ERROR,
             error_message,
         ) in caplog.record_tuples
+
+    @mock.patch.object(SessionRestApiClient, "get_all_questionnaires_for_server_park")
+    def test_get_questionnaires_only_calls_the_rest_api_once_while_cached(
+        self,
+        _mock_rest_api_client_get_all_questionnaires_for_server_park,
+        blaise_service,
+        mock_case_1,
+    ):
+        # Arrange
+        _mock_rest_api_client_get_all_questionnaires_for_server_park.return_value = [
+            mock_case_1
+        ]
+
+        # Act
+        first_result = blaise_service.get_questionnaires()
+        second_result = blaise_service.get_questionnaires()
+
+        # Assert
+        assert first_result == second_result
+        _mock_rest_api_client_get_all_questionnaires_for_server_park.assert_called_once_with(
+            "gusty"
+        )
+
+    @mock.patch.object(SessionRestApiClient, "get_all_questionnaires_for_server_park")
+    def test_get_questionnaire_index_is_built_once_and_reused_while_cached(
+        self,
+        _mock_rest_api_client_get_all_questionnaires_for_server_park,
+        blaise_service,
+        mock_case_1,
+        mock_case_2,
+    ):
+        # Arrange
+        _mock_rest_api_client_get_all_questionnaires_for_server_park.return_value = [
+            mock_case_2,
+            mock_case_1,
+        ]
+
+        # Act
+        first_index = blaise_service.get_questionnaire_index()
+        second_index = blaise_service.get_questionnaire_index()
+
+        # Assert
+        assert second_index is first_index
+        assert [
+            questionnaire["name"] for questionnaire in second_index.resolve(["FRS"])
+        ] == ["FRS2504A", "FRS2505A"]
+
+    @mock.patch.object(SessionRestApiClient, "get_all_questionnaires_for_server_park")
+    def test_get_questionnaires_calls_the_rest_api_again_when_refresh_is_requested(
+        self,
+        _mock_rest_api_client_get_all_questionnaires_for_server_park,
+        blaise_service,
+        mock_case_1,
+        mock_case_2,
+    ):
+        # Arrange
+        _mock_rest_api_client_get_all_questionnaires_for_server_park.side_effect = [
+            [mock_case_1],
+            [mock_case_1, mock_case_2],
+        ]
+
+        # Act
+        blaise_service.get_questionnaires()
+        result = blaise_service.get_questionnaires(refresh=True)
+
+        # Assert
+        assert len(result) == 2
+        assert (
+            _mock_rest_api_client_get_all_questionnaires_for_server_park.call_count == 2
+        )
+
+    def test_blaise_service_reuses_the_rest_api_client_across_instances(
+        self, mock_configuration_provider
+    ):
+        # Act
+        first_service = BlaiseService(mock_configuration_provider, TtlCache())
+        second_service = BlaiseService(mock_configuration_provider, TtlCache())
+
+        # Assert
+        assert first_service.restapi_client is second_service.restapi_client
+
+    def test_blaise_service_reuses_the_rest_api_session_across_instances(
+        self, mock_configuration_provider
+    ):
+        # Act
+        first_service = BlaiseService(mock_configuration_provider, TtlCache())
+        second_service = BlaiseService(mock_configuration_provider, TtlCache())
+
+        # Assert
+        assert isinstance(first_service.restapi_client.session, requests.Session)
+        assert first_service.restapi_client.session is (
+            second_service.restapi_client.session
+        )
+
+    def test_session_rest_api_client_gets_questionnaires_through_its_session(
+        self, mock_case_1
+    ):
+        # Arrange
+        mock_session = Mock()
+        mock_session.get.return_value.json.return_value = [mock_case_1]
+        client = SessionRestApiClient("http://blaise-api", mock_session)
+
+        # Act
+        first_result = client.get_all_questionnaires_for_server_park("gusty")
+        second_result = client.get_all_questionnaires_for_server_park("gusty")
+
+        # Assert
+        assert first_result == second_result == [mock_case_1]
+        assert mock_session.get.call_count == 2
+        mock_session.get.assert_called_with(
+            "http://blaise-api/api/v2/serverparks/gusty/questionnaires"
+        )
+        mock_session.get.return_value.raise_for_status.assert_called()
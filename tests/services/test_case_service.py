@@ -1,13 +1,24 @@
+import logging
 from contextlib import contextmanager
 from unittest.mock import Mock, patch, call, MagicMock, ANY
 
+import pymysql
 import pytest
+from sqlalchemy.exc import OperationalError
 
+from models.copy_cases_configuration_model import CopyCasesConfigurationModel, CopyMode
+from models.copy_cost_estimate_model import CopyCostEstimateModel
+from models.copy_statistics_model import CopyStatisticsModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from models.row_count_model import RowCountModel
 from providers.configuration_provider import ConfigurationProvider
 from services.blaise_service import BlaiseService
 from services.case_service import CaseService
 from services.database_connection_service import DatabaseConnectionService
 from services.database_service import DatabaseService
+from utilities.metrics import metrics
+from utilities.questionnaire_index import QuestionnaireIndex
+from utilities.retry_policy import RetryPolicy
 
 
 @contextmanager
@@ -22,11 +33,29 @@ def does_not_raise(expected_exception):
         raise AssertionError(f"An unexpected exception {error} raised.")
 
 
+def lock_error(error_code: int) -> OperationalError:
+    return OperationalError(
+        "INSERT INTO ...", {}, pymysql.err.OperationalError(error_code, "lock error")
+    )
+
+
+@contextmanager
+def lock_always_acquired(*_, **__):
+    yield True
+
+
 class TestCaseService:
 
+    @pytest.fixture(autouse=True)
+    def questionnaire_lock(self):
+        # the named lock has its own tests below
+        with patch.object(CaseService, "questionnaire_lock", lock_always_acquired):
+            yield
+
     @pytest.fixture()
     def mock_database_connection_service_provider(self) -> DatabaseConnectionService:
-        return Mock()
+        # MagicMock, so the engine's connections work as context managers
+        return MagicMock()
 
     @pytest.fixture()
     def mock_database_service(
@@ -102,12 +131,16 @@ class TestCaseService:
         assert result[0]["name"] == "FRS2504A"
         assert result[1]["name"] == "FRS2505A"
 
-    @patch.object(BlaiseService, "get_questionnaires")
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "get_table_fingerprints")
+    @patch.object(BlaiseService, "get_questionnaire_index")
     @patch.object(CaseService, "copy_cases_for_questionnaire")
     def test_copy_cases_has_calls_for_all_expected_questionnaires(
         self,
         _mock_copy_cases_for_questionnaire,
-        _mock_get_questionnaires,
+        _mock_get_questionnaire_index,
+        _mock_get_table_fingerprints,
+        _mock_database,
         service_under_test,
     ):
         # arrange
@@ -122,16 +155,277 @@ class TestCaseService:
             {"name": "LCF2505A_EDIT", "id": "4569"},
         ]
 
-        _mock_get_questionnaires.return_value = mock_cases
+        _mock_get_questionnaire_index.return_value = QuestionnaireIndex(mock_cases)
+        _mock_get_table_fingerprints.return_value = dict.fromkeys(
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+                "FRS2505A_Form",
+                "FRS2505A_EDIT_Form",
+            ],
+            "12:345",
+        )
 
         # act
         service_under_test.copy_cases("FRS")
 
         # assert
         assert _mock_copy_cases_for_questionnaire.call_count == 2
-        _mock_copy_cases_for_questionnaire.assert_has_calls(
-            [call("FRS2504A"), call("FRS2505A")]
+        assert _mock_copy_cases_for_questionnaire.call_args_list == [
+            call(ANY, "FRS2504A", check_edit_table_exists=False),
+            call(ANY, "FRS2505A", check_edit_table_exists=False),
+        ]
+
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "get_table_fingerprints")
+    @patch.object(BlaiseService, "get_questionnaire_index")
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_copy_cases_resolves_a_list_of_survey_types_with_one_questionnaire_fetch(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        _mock_get_questionnaire_index,
+        _mock_get_table_fingerprints,
+        _mock_database,
+        service_under_test,
+    ):
+        # arrange
+        _mock_get_questionnaire_index.return_value = QuestionnaireIndex(
+            [
+                {"name": "FRS2504A", "id": "1232"},
+                {"name": "FRS2504A_EDIT", "id": "1233"},
+                {"name": "LCF2504A", "id": "3456"},
+                {"name": "LCF2504A_EDIT", "id": "3457"},
+                {"name": "OPN2504A", "id": "5678"},
+            ]
+        )
+        _mock_get_table_fingerprints.return_value = dict.fromkeys(
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+                "LCF2504A_Form",
+                "LCF2504A_EDIT_Form",
+            ],
+            "12:345",
+        )
+
+        # act
+        result = service_under_test.copy_cases(["LCF", "FRS", "FRS2504A"])
+
+        # assert
+        assert _mock_get_questionnaire_index.call_count == 1
+        assert _mock_copy_cases_for_questionnaire.call_args_list == [
+            call(ANY, "FRS2504A", check_edit_table_exists=False),
+            call(ANY, "LCF2504A", check_edit_table_exists=False),
+        ]
+        assert _mock_copy_cases_for_questionnaire.call_count == 2
+        assert result.survey_types == ["LCF", "FRS", "FRS2504A"]
+
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "get_table_fingerprints")
+    def test_get_copy_plan_checks_every_table_in_one_lookup(
+        self,
+        _mock_get_table_fingerprints,
+        _mock_database,
+        service_under_test,
+    ):
+        # arrange
+        _mock_get_table_fingerprints.return_value = dict.fromkeys(
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+                "FRS2505A_Form",
+            ],
+            "12:345",
+        )
+
+        # act
+        result = service_under_test.get_copy_plan(["FRS2504A", "FRS2505A", "FRS2506A"])
+
+        # assert
+        _mock_get_table_fingerprints.assert_called_once_with(
+            ANY,
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+                "FRS2505A_Form",
+                "FRS2505A_EDIT_Form",
+                "FRS2506A_Form",
+                "FRS2506A_EDIT_Form",
+            ],
+        )
+        assert result.copyable == ["FRS2504A"]
+        assert result.missing_edit_table == ["FRS2505A"]
+        assert result.missing_questionnaire_table == ["FRS2506A"]
+
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "get_table_fingerprints")
+    @patch.object(BlaiseService, "get_questionnaire_index")
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_copy_cases_returns_the_plan_and_only_copies_copyable_questionnaires(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        _mock_get_questionnaire_index,
+        _mock_get_table_fingerprints,
+        _mock_database,
+        service_under_test,
+    ):
+        # arrange
+        _mock_get_questionnaire_index.return_value = QuestionnaireIndex(
+            [
+                {"name": "FRS2504A", "id": "1232"},
+                {"name": "FRS2504A_EDIT", "id": "1233"},
+                {"name": "FRS2505A", "id": "2344"},
+            ]
+        )
+        _mock_get_table_fingerprints.return_value = dict.fromkeys(
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+                "FRS2505A_Form",
+            ],
+            "12:345",
+        )
+        _mock_copy_cases_for_questionnaire.return_value = QuestionnaireCopyResultModel(
+            "FRS2504A",
+            QuestionnaireCopyResultModel.COPIED,
+            row_counts=RowCountModel(3, inserted=1, updated=1),
+        )
+
+        # act
+        result = service_under_test.copy_cases("FRS")
+
+        # assert
+        _mock_copy_cases_for_questionnaire.assert_called_once_with(
+            ANY, "FRS2504A", check_edit_table_exists=False
+        )
+        assert result.to_dict()["plan"] == {
+            "copyable": ["FRS2504A"],
+            "missing_edit_table": ["FRS2505A"],
+            "missing_questionnaire_table": [],
+        }
+        assert result.to_dict()["totals"]["copied"] == 1
+        assert result.to_dict()["totals"]["missing_edit_table"] == 1
+        assert result.to_dict()["totals"]["rows_affected"] == 3
+        assert (
+            result.questionnaire_results[1].status
+            == QuestionnaireCopyResultModel.MISSING_EDIT_TABLE
+        )
+
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "get_table_fingerprints")
+    @patch.object(BlaiseService, "get_questionnaire_index")
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_copy_cases_carries_on_and_returns_a_failed_result_when_a_questionnaire_errors(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        _mock_get_questionnaire_index,
+        _mock_get_table_fingerprints,
+        _mock_database,
+        service_under_test,
+        caplog,
+    ):
+        # arrange
+        _mock_get_questionnaire_index.return_value = QuestionnaireIndex(
+            [
+                {"name": "FRS2504A", "id": "1232"},
+                {"name": "FRS2505A", "id": "2344"},
+            ]
+        )
+        _mock_get_table_fingerprints.return_value = dict.fromkeys(
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+                "FRS2505A_Form",
+                "FRS2505A_EDIT_Form",
+            ],
+            "12:345",
+        )
+        _mock_copy_cases_for_questionnaire.side_effect = [
+            Exception("Lock wait timeout exceeded"),
+            QuestionnaireCopyResultModel(
+                "FRS2505A", QuestionnaireCopyResultModel.COPIED
+            ),
+        ]
+
+        # act
+        result = service_under_test.copy_cases("FRS").questionnaire_results
+
+        # assert
+        assert _mock_copy_cases_for_questionnaire.call_count == 2
+        assert result[0].questionnaire_name == "FRS2504A"
+        assert result[0].status == QuestionnaireCopyResultModel.FAILED
+        assert result[0].error == "Lock wait timeout exceeded"
+        assert result[1].questionnaire_name == "FRS2505A"
+        assert result[1].status == QuestionnaireCopyResultModel.COPIED
+        assert (
+            "root",
+            40,
+            "Error copying cases for 'FRS2504A': Lock wait timeout exceeded",
+        ) in caplog.record_tuples
+
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "get_table_fingerprints")
+    @patch.object(BlaiseService, "get_questionnaire_index")
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_copy_cases_copies_every_questionnaire_when_running_concurrently(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        _mock_get_questionnaire_index,
+        _mock_get_table_fingerprints,
+        _mock_database,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(max_workers=4),
+        )
+        _mock_get_questionnaire_index.return_value = QuestionnaireIndex(
+            [
+                {"name": "FRS2504A", "id": "1232"},
+                {"name": "FRS2505A", "id": "2344"},
+                {"name": "FRS2506A", "id": "3456"},
+            ]
         )
+        _mock_get_table_fingerprints.return_value = dict.fromkeys(
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+                "FRS2505A_Form",
+                "FRS2505A_EDIT_Form",
+                "FRS2506A_Form",
+                "FRS2506A_EDIT_Form",
+            ],
+            "12:345",
+        )
+        _mock_copy_cases_for_questionnaire.side_effect = (
+            lambda _, questionnaire_name, check_edit_table_exists: (
+                QuestionnaireCopyResultModel(
+                    questionnaire_name, QuestionnaireCopyResultModel.COPIED
+                )
+            )
+        )
+
+        # act
+        with metrics.invocation() as invocation_registry:
+            result = service_under_test.copy_cases("FRS").questionnaire_results
+            invocation_metrics = invocation_registry.snapshot()
+
+        # assert
+        assert _mock_copy_cases_for_questionnaire.call_count == 3
+        assert [questionnaire.questionnaire_name for questionnaire in result] == [
+            "FRS2504A",
+            "FRS2505A",
+            "FRS2506A",
+        ]
+        # the worker threads record against the invocation that started them
+        assert {
+            "name": "questionnaire_copies",
+            "labels": {"status": "copied"},
+            "value": 3,
+        } in invocation_metrics["counters"]
 
     @patch.object(DatabaseService, "table_exists")
     @patch.object(DatabaseService, "database")
@@ -148,12 +442,19 @@ class TestCaseService:
         _mock_table_exists.return_value = True
 
         # act
-        service_under_test.copy_cases_for_questionnaire("FRS2504A")
+        service_under_test.copy_cases_for_questionnaire(MagicMock(), "FRS2504A")
 
         # assert
         assert _mock_copy_cases.call_count == 1
         _mock_copy_cases.assert_has_calls(
-            [call(ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form")]
+            [
+                call(
+                    ANY,
+                    "FRS2504A_EDIT_Form",
+                    "FRS2504A_Form",
+                    join_strategy="left_join",
+                )
+            ]
         )
 
     @patch.object(DatabaseService, "table_exists")
@@ -172,7 +473,7 @@ class TestCaseService:
         _mock_table_exists.return_value = False
 
         # act
-        service_under_test.copy_cases_for_questionnaire("FRS2504A")
+        service_under_test.copy_cases_for_questionnaire(MagicMock(), "FRS2504A")
 
         # assert
         error_message = "Edit questionnaire missing for: 'FRS2504A'"
@@ -198,7 +499,773 @@ class TestCaseService:
         _mock_table_exists.return_value = False
 
         # act
-        service_under_test.copy_cases_for_questionnaire("FRS2504A")
+        result = service_under_test.copy_cases_for_questionnaire(
+            MagicMock(), "FRS2504A"
+        )
+
+        # assert
+        assert _mock_copy_cases.call_count == 0
+        assert result.status == QuestionnaireCopyResultModel.MISSING_EDIT_TABLE
+
+    @patch.object(DatabaseService, "get_chunk_upper_bound")
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "copy_cases_chunk")
+    def test_copy_cases_in_chunks_copies_each_chunk_until_no_rows_are_left(
+        self,
+        _mock_copy_cases_chunk,
+        _mock_database,
+        _mock_get_chunk_upper_bound,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="chunked", chunk_size=2),
+        )
+        _mock_get_chunk_upper_bound.side_effect = [2, 4, None]
+        _mock_copy_cases_chunk.side_effect = [
+            RowCountModel(rows_affected=3, inserted=1, updated=1),
+            RowCountModel(rows_affected=2, inserted=2, updated=0),
+        ]
+
+        # act
+        result = service_under_test.copy_cases_in_chunks(
+            MagicMock(), "FRS2504A_EDIT_Form", "FRS2504A_Form"
+        )
+
+        # assert
+        assert result.to_dict() == {
+            "rows_affected": 5,
+            "rows_inserted": 3,
+            "rows_updated": 1,
+        }
+        _mock_get_chunk_upper_bound.assert_has_calls(
+            [
+                call(ANY, "FRS2504A_Form", None, 2),
+                call(ANY, "FRS2504A_Form", 2, 2),
+                call(ANY, "FRS2504A_Form", 4, 2),
+            ]
+        )
+        _mock_copy_cases_chunk.assert_has_calls(
+            [
+                call(ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form", None, 2),
+                call(ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form", 2, 4),
+            ]
+        )
+
+    @patch.object(DatabaseService, "table_exists")
+    @patch.object(DatabaseService, "database")
+    @patch.object(CaseService, "copy_cases_in_chunks")
+    def test_copy_cases_for_questionnaire_copies_in_chunks_when_chunked_mode_is_configured(
+        self,
+        _mock_copy_cases_in_chunks,
+        _mock_database,
+        _mock_table_exists,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="chunked"),
+        )
+        _mock_table_exists.return_value = True
+
+        # act
+        result = service_under_test.copy_cases_for_questionnaire(
+            MagicMock(), "FRS2504A"
+        )
+
+        # assert
+        _mock_copy_cases_in_chunks.assert_called_once_with(
+            ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form"
+        )
+        assert result.status == QuestionnaireCopyResultModel.COPIED
+
+    @patch.object(DatabaseService, "set_watermark")
+    @patch.object(DatabaseService, "copy_cases_changed_since")
+    @patch.object(DatabaseService, "copy_cases")
+    @patch.object(DatabaseService, "get_max_watermark")
+    @patch.object(DatabaseService, "get_watermark")
+    @patch.object(DatabaseService, "create_watermark_table")
+    @patch.object(DatabaseService, "table_exists")
+    @patch.object(DatabaseService, "database")
+    def test_copy_cases_incrementally_only_copies_cases_changed_since_the_watermark(
+        self,
+        _mock_database,
+        _mock_table_exists,
+        _mock_create_watermark_table,
+        _mock_get_watermark,
+        _mock_get_max_watermark,
+        _mock_copy_cases,
+        _mock_copy_cases_changed_since,
+        _mock_set_watermark,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="incremental"),
+        )
+        _mock_table_exists.return_value = True
+        _mock_get_watermark.return_value = "2024-05-01 12:00:00"
+        _mock_get_max_watermark.return_value = "2024-05-07 12:00:00"
+
+        # act
+        result = service_under_test.copy_cases_for_questionnaire(
+            MagicMock(), "FRS2504A"
+        )
+
+        # assert
+        assert result.status == QuestionnaireCopyResultModel.COPIED
+        assert _mock_copy_cases.call_count == 0
+        _mock_copy_cases_changed_since.assert_called_once_with(
+            ANY,
+            "FRS2504A_EDIT_Form",
+            "FRS2504A_Form",
+            "QEdit_LastUpdated",
+            "2024-05-01 12:00:00",
+            "2024-05-07 12:00:00",
+            join_strategy="left_join",
+        )
+        _mock_set_watermark.assert_called_once_with(
+            ANY, "copy_cases_watermark", "FRS2504A", "2024-05-07 12:00:00"
+        )
+
+    @patch.object(DatabaseService, "set_watermark")
+    @patch.object(DatabaseService, "copy_cases_changed_since")
+    @patch.object(DatabaseService, "copy_cases")
+    @patch.object(DatabaseService, "get_max_watermark")
+    @patch.object(DatabaseService, "get_watermark")
+    @patch.object(DatabaseService, "create_watermark_table")
+    @patch.object(DatabaseService, "table_exists")
+    @patch.object(DatabaseService, "database")
+    def test_copy_cases_incrementally_copies_everything_when_there_is_no_watermark(
+        self,
+        _mock_database,
+        _mock_table_exists,
+        _mock_create_watermark_table,
+        _mock_get_watermark,
+        _mock_get_max_watermark,
+        _mock_copy_cases,
+        _mock_copy_cases_changed_since,
+        _mock_set_watermark,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="incremental"),
+        )
+        _mock_table_exists.return_value = True
+        _mock_get_watermark.return_value = None
+        _mock_get_max_watermark.return_value = "2024-05-07 12:00:00"
+
+        # act
+        service_under_test.copy_cases_for_questionnaire(MagicMock(), "FRS2504A")
+
+        # assert
+        _mock_copy_cases.assert_called_once_with(
+            ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form", join_strategy="left_join"
+        )
+        assert _mock_copy_cases_changed_since.call_count == 0
+        _mock_set_watermark.assert_called_once_with(
+            ANY, "copy_cases_watermark", "FRS2504A", "2024-05-07 12:00:00"
+        )
+
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "copy_cases")
+    def test_copy_cases_for_questionnaire_logs_a_copy_stage_with_row_counts(
+        self,
+        _mock_copy_cases,
+        _mock_database,
+        service_under_test,
+        caplog,
+    ):
+        # arrange
+        _mock_copy_cases.return_value = RowCountModel(
+            rows_affected=7, inserted=3, updated=2
+        )
+
+        # act
+        with caplog.at_level(logging.INFO):
+            service_under_test.copy_cases_for_questionnaire(
+                MagicMock(), "FRS2504A", check_edit_table_exists=False
+            )
+
+        # assert
+        stage_fields = [
+            record.json_fields
+            for record in caplog.records
+            if getattr(record, "json_fields", {}).get("stage") == "copy_questionnaire"
+        ][0]
+        assert stage_fields["questionnaire_name"] == "FRS2504A"
+        assert stage_fields["copy_mode"] == "full"
+        assert stage_fields["rows_affected"] == 7
+        assert stage_fields["rows_inserted"] == 3
+        assert stage_fields["rows_updated"] == 2
+
+    @patch.object(DatabaseService, "explain_copy_cases")
+    @patch.object(DatabaseService, "estimate_copy_cases")
+    @patch.object(DatabaseService, "copy_cases")
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "get_table_fingerprints")
+    @patch.object(BlaiseService, "get_questionnaire_index")
+    def test_estimate_copy_cases_returns_estimates_without_copying(
+        self,
+        _mock_get_questionnaire_index,
+        _mock_get_table_fingerprints,
+        _mock_database,
+        _mock_copy_cases,
+        _mock_estimate_copy_cases,
+        _mock_explain_copy_cases,
+        service_under_test,
+    ):
+        # arrange
+        _mock_get_questionnaire_index.return_value = QuestionnaireIndex(
+            [
+                {"name": "FRS2504A", "id": "1232"},
+                {"name": "FRS2504A_EDIT", "id": "1233"},
+            ]
+        )
+        _mock_get_table_fingerprints.return_value = dict.fromkeys(
+            [
+                "FRS2504A_Form",
+                "FRS2504A_EDIT_Form",
+            ],
+            "12:345",
+        )
+        _mock_estimate_copy_cases.return_value = {
+            "rows_to_insert": 10,
+            "rows_to_overwrite": 5,
+            "rows_to_skip": 2,
+        }
+        _mock_explain_copy_cases.return_value = [{"table": "UNEDITED", "rows": 17}]
+
+        # act
+        result = service_under_test.estimate_copy_cases("FRS", explain=True)
+
+        # assert
+        assert _mock_copy_cases.call_count == 0
+        assert result.to_dict()["dry_run"] is True
+        assert result.to_dict()["estimates"] == [
+            {
+                "questionnaire_name": "FRS2504A",
+                "rows_to_insert": 10,
+                "rows_to_overwrite": 5,
+                "rows_to_skip": 2,
+                "explain_plan": [{"table": "UNEDITED", "rows": 17}],
+            }
+        ]
+
+    @pytest.mark.parametrize(
+        "row_estimate,expected_join_strategy",
+        [(49999, "left_join"), (50000, "edited_set"), (2000000, "edited_set")],
+    )
+    @patch.object(DatabaseService, "get_table_row_estimate")
+    def test_get_join_strategy_uses_the_edited_set_for_large_questionnaires(
+        self,
+        _mock_get_table_row_estimate,
+        row_estimate,
+        expected_join_strategy,
+        service_under_test,
+    ):
+        # arrange
+        _mock_get_table_row_estimate.return_value = row_estimate
+
+        # act
+        result = service_under_test.get_join_strategy(Mock(), "FRS2504A_Form")
+
+        # assert
+        assert result == expected_join_strategy
+        _mock_get_table_row_estimate.assert_called_once_with(ANY, "FRS2504A_Form")
+
+    @patch.object(DatabaseService, "get_table_row_estimate")
+    def test_get_join_strategy_does_not_estimate_rows_when_a_strategy_is_configured(
+        self,
+        _mock_get_table_row_estimate,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(join_strategy="edited_set"),
+        )
+
+        # act
+        result = service_under_test.get_join_strategy(Mock(), "FRS2504A_Form")
+
+        # assert
+        assert result == "edited_set"
+        assert _mock_get_table_row_estimate.call_count == 0
+
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_copy_cases_requeues_a_questionnaire_that_keeps_hitting_lock_conflicts(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(requeue_limit=1),
+            RetryPolicy(max_attempts=2, sleep=Mock()),
+        )
+        copied_order = []
+
+        def copy_cases_for_questionnaire(_, questionnaire_name, **__):
+            copied_order.append(questionnaire_name)
+            if questionnaire_name == "FRS2504A" and copied_order.count("FRS2504A") < 3:
+                raise lock_error(1213)
+            return QuestionnaireCopyResultModel(
+                questionnaire_name, QuestionnaireCopyResultModel.COPIED
+            )
+
+        _mock_copy_cases_for_questionnaire.side_effect = copy_cases_for_questionnaire
+
+        # act
+        results = service_under_test._copy_questionnaires(["FRS2504A", "FRS2505A"])
+
+        # assert
+        assert copied_order == ["FRS2504A", "FRS2504A", "FRS2505A", "FRS2504A"]
+        assert [(result.status, result.attempts) for result in results] == [
+            (QuestionnaireCopyResultModel.COPIED, 3),
+            (QuestionnaireCopyResultModel.COPIED, 1),
+        ]
+
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_try_copy_cases_for_questionnaire_adds_to_the_previous_attempts_and_duration(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        service_under_test,
+    ):
+        # arrange
+        _mock_copy_cases_for_questionnaire.side_effect = Exception("table is broken")
+        previous_result = QuestionnaireCopyResultModel(
+            "FRS2504A",
+            QuestionnaireCopyResultModel.FAILED,
+            attempts=2,
+            duration_ms=1500.0,
+        )
+
+        # act
+        result = service_under_test.try_copy_cases_for_questionnaire(
+            "FRS2504A", previous_result
+        )
+
+        # assert
+        assert result.to_dict()["status"] == QuestionnaireCopyResultModel.FAILED
+        assert result.to_dict()["error"] == "table is broken"
+        assert result.to_dict()["attempts"] == 3
+        assert result.to_dict()["duration_ms"] >= 1500.0
+
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_try_copy_cases_for_questionnaire_records_only_this_tries_metrics(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        service_under_test,
+    ):
+        # arrange
+        metrics.reset()
+        _mock_copy_cases_for_questionnaire.return_value = QuestionnaireCopyResultModel(
+            "FRS2504A",
+            QuestionnaireCopyResultModel.COPIED,
+            row_counts=RowCountModel(rows_affected=14, inserted=6, updated=4),
+        )
+        previous_result = QuestionnaireCopyResultModel(
+            "FRS2504A", QuestionnaireCopyResultModel.FAILED, attempts=3
+        )
+
+        # act
+        service_under_test.try_copy_cases_for_questionnaire("FRS2504A", previous_result)
+
+        # assert
+        counters = {
+            counter["name"]: counter["value"]
+            for counter in metrics.snapshot()["counters"]
+        }
+        assert counters == {
+            "questionnaire_copies": 1,
+            "questionnaire_copy_attempts": 1,
+            "rows_copied": 10,
+            "rows_inserted": 6,
+            "rows_updated": 4,
+        }
+        metrics.reset()
+
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_copy_cases_does_not_requeue_errors_that_are_not_lock_conflicts(
+        self,
+        _mock_copy_cases_for_questionnaire,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(requeue_limit=1),
+            RetryPolicy(max_attempts=3, sleep=Mock()),
+        )
+        _mock_copy_cases_for_questionnaire.side_effect = lock_error(1146)
+
+        # act
+        results = service_under_test._copy_questionnaires(["FRS2504A"])
+
+        # assert
+        assert _mock_copy_cases_for_questionnaire.call_count == 1
+        assert results[0].status == QuestionnaireCopyResultModel.FAILED
+        assert results[0].attempts == 1
+        assert results[0].retryable is False
+
+    @patch.object(DatabaseService, "get_chunk_upper_bound")
+    @patch.object(DatabaseService, "database")
+    @patch.object(DatabaseService, "copy_cases_chunk")
+    def test_copy_cases_in_chunks_retries_only_the_chunk_that_hit_a_lock_conflict(
+        self,
+        _mock_copy_cases_chunk,
+        _mock_database,
+        _mock_get_chunk_upper_bound,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="chunked", chunk_size=2),
+            RetryPolicy(max_attempts=3, sleep=Mock()),
+        )
+        _mock_get_chunk_upper_bound.side_effect = [2, 4, 4, None]
+        _mock_copy_cases_chunk.side_effect = [
+            RowCountModel(rows_affected=2),
+            lock_error(1205),
+            RowCountModel(rows_affected=2),
+        ]
+
+        # act
+        result = service_under_test.copy_cases_in_chunks(
+            MagicMock(), "FRS2504A_EDIT_Form", "FRS2504A_Form"
+        )
+
+        # assert
+        assert result.rows_affected == 4
+        _mock_copy_cases_chunk.assert_has_calls(
+            [
+                call(ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form", None, 2),
+                call(ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form", 2, 4),
+                call(ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form", 2, 4),
+            ]
+        )
+
+    @patch.object(DatabaseService, "get_table_row_estimate")
+    @patch.object(DatabaseService, "copy_changed_cases")
+    @patch.object(DatabaseService, "create_row_hash_table")
+    @patch.object(DatabaseService, "database")
+    def test_copy_cases_for_questionnaire_only_copies_changed_cases_in_hashed_mode(
+        self,
+        _mock_database,
+        _mock_create_row_hash_table,
+        _mock_copy_changed_cases,
+        _mock_get_table_row_estimate,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="hashed"),
+        )
+        _mock_get_table_row_estimate.return_value = 10
+        _mock_copy_changed_cases.return_value = RowCountModel(rows_affected=1)
+
+        # act
+        result = service_under_test.copy_cases_for_questionnaire(
+            MagicMock(), "FRS2504A", check_edit_table_exists=False
+        )
+
+        # assert
+        assert result.status == QuestionnaireCopyResultModel.COPIED
+        _mock_create_row_hash_table.assert_called_once_with(
+            ANY, "FRS2504A_RowHash", "FRS2504A_Form"
+        )
+        _mock_copy_changed_cases.assert_called_once_with(
+            ANY,
+            "FRS2504A_EDIT_Form",
+            "FRS2504A_Form",
+            "FRS2504A_RowHash",
+            join_strategy="left_join",
+        )
+
+    @patch.object(DatabaseService, "set_watermark")
+    @patch.object(DatabaseService, "copy_cases")
+    @patch.object(DatabaseService, "get_max_watermark")
+    @patch.object(DatabaseService, "get_copy_statistics")
+    @patch.object(DatabaseService, "create_watermark_table")
+    @patch.object(DatabaseService, "database")
+    def test_copy_cases_for_questionnaire_copies_in_full_and_sets_the_watermark_in_adaptive_mode_on_a_first_run(
+        self,
+        _mock_database,
+        _mock_create_watermark_table,
+        _mock_get_copy_statistics,
+        _mock_get_max_watermark,
+        _mock_copy_cases,
+        _mock_set_watermark,
+        mock_database_service,
+        mock_blaise_service,
+        caplog,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="adaptive"),
+        )
+        _mock_get_copy_statistics.return_value = CopyStatisticsModel(
+            questionnaire_rows=100, edited_rows=10, watermark_available=True
+        )
+        _mock_get_max_watermark.return_value = "2024-05-07 12:00:00"
+        _mock_copy_cases.return_value = RowCountModel(
+            rows_affected=90, inserted=90, updated=0
+        )
+
+        # act
+        with caplog.at_level(logging.INFO):
+            result = service_under_test.copy_cases_for_questionnaire(
+                MagicMock(), "FRS2504A", check_edit_table_exists=False
+            )
+
+        # assert
+        assert result.status == QuestionnaireCopyResultModel.COPIED
+        _mock_copy_cases.assert_called_once_with(
+            ANY, "FRS2504A_EDIT_Form", "FRS2504A_Form", join_strategy="left_join"
+        )
+        _mock_set_watermark.assert_called_once_with(
+            ANY, "copy_cases_watermark", "FRS2504A", "2024-05-07 12:00:00"
+        )
+        stage_fields = [
+            record.json_fields
+            for record in caplog.records
+            if getattr(record, "json_fields", {}).get("stage") == "copy_questionnaire"
+        ][0]
+        assert stage_fields["copy_mode"] == "adaptive"
+        assert stage_fields["copy_strategy"] == "full"
+        assert stage_fields["predicted_rows_written"] == 90
+        assert stage_fields["actual_rows_written"] == 90
+        assert set(stage_fields["estimated_costs"]) == {"full", "chunked"}
+
+    @patch.object(DatabaseService, "set_watermark")
+    @patch.object(DatabaseService, "copy_cases_changed_since")
+    @patch.object(DatabaseService, "copy_cases")
+    @patch.object(DatabaseService, "get_max_watermark")
+    @patch.object(DatabaseService, "get_watermark")
+    @patch.object(DatabaseService, "get_copy_statistics")
+    @patch.object(DatabaseService, "create_watermark_table")
+    @patch.object(DatabaseService, "database")
+    def test_copy_cases_for_questionnaire_copies_incrementally_in_adaptive_mode_when_few_cases_changed(
+        self,
+        _mock_database,
+        _mock_create_watermark_table,
+        _mock_get_copy_statistics,
+        _mock_get_watermark,
+        _mock_get_max_watermark,
+        _mock_copy_cases,
+        _mock_copy_cases_changed_since,
+        _mock_set_watermark,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="adaptive"),
+        )
+        _mock_get_copy_statistics.return_value = CopyStatisticsModel(
+            questionnaire_rows=50000,
+            edited_rows=100,
+            seconds_since_last_run=3600,
+            seconds_since_questionnaire_update=60,
+            watermark_available=True,
+        )
+        _mock_get_watermark.return_value = "2024-05-01 12:00:00"
+        _mock_get_max_watermark.return_value = "2024-05-07 12:00:00"
+        _mock_copy_cases_changed_since.return_value = RowCountModel(rows_affected=4)
+
+        # act
+        service_under_test.copy_cases_for_questionnaire(
+            MagicMock(), "FRS2504A", check_edit_table_exists=False
+        )
 
         # assert
         assert _mock_copy_cases.call_count == 0
+        _mock_copy_cases_changed_since.assert_called_once_with(
+            ANY,
+            "FRS2504A_EDIT_Form",
+            "FRS2504A_Form",
+            "QEdit_LastUpdated",
+            "2024-05-01 12:00:00",
+            "2024-05-07 12:00:00",
+            join_strategy="left_join",
+        )
+        # only the incremental copy moves the watermark on
+        _mock_set_watermark.assert_called_once()
+
+    @patch.object(DatabaseService, "copy_cases_chunk")
+    @patch.object(DatabaseService, "get_chunk_upper_bound")
+    @patch.object(DatabaseService, "get_copy_statistics")
+    @patch.object(DatabaseService, "create_watermark_table")
+    @patch.object(DatabaseService, "database")
+    def test_try_copy_cases_for_questionnaire_does_not_retry_chunks_again_when_adaptive_mode_chooses_chunked(
+        self,
+        _mock_database,
+        _mock_create_watermark_table,
+        _mock_get_copy_statistics,
+        _mock_get_chunk_upper_bound,
+        _mock_copy_cases_chunk,
+        mock_database_service,
+        mock_blaise_service,
+    ):
+        # arrange
+        mock_copy_cost_model = Mock()
+        mock_copy_cost_model.choose_strategy.return_value = CopyCostEstimateModel(
+            "chunked", rows_read=100, rows_written=100, statements=1, cost=1.0
+        )
+        mock_copy_cost_model.estimate_costs.return_value = []
+        service_under_test = CaseService(
+            mock_database_service,
+            mock_blaise_service,
+            CopyCasesConfigurationModel(copy_mode="adaptive"),
+            RetryPolicy(max_attempts=3, sleep=Mock()),
+            mock_copy_cost_model,
+        )
+        _mock_get_copy_statistics.return_value = CopyStatisticsModel(
+            questionnaire_rows=100, edited_rows=0, watermark_available=False
+        )
+        _mock_get_chunk_upper_bound.return_value = 2
+        _mock_copy_cases_chunk.side_effect = lock_error(1213)
+
+        # act
+        result = service_under_test.try_copy_cases_for_questionnaire("FRS2504A")
+
+        # assert
+        assert result.status == QuestionnaireCopyResultModel.FAILED
+        assert result.attempts == 3
+        assert _mock_copy_cases_chunk.call_count == 3
+        assert _mock_get_copy_statistics.call_count == 1
+
+    def test_get_copy_strategies_has_a_strategy_for_every_copy_mode(
+        self, service_under_test
+    ):
+        # act
+        copy_strategies = service_under_test.get_copy_strategies()
+
+        # assert
+        assert set(copy_strategies) == set(CopyMode.MODES)
+
+
+class TestCaseServiceQuestionnaireLocks:
+
+    @pytest.fixture()
+    def mock_database_service(self) -> Mock:
+        mock_database_service = Mock()
+        mock_database_service.database = MagicMock()
+        return mock_database_service
+
+    @staticmethod
+    def named_lock_returning(lock_acquired: bool):
+        @contextmanager
+        def named_lock(connection, lock_name, timeout_seconds):
+            yield lock_acquired
+
+        return Mock(side_effect=named_lock)
+
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_try_copy_cases_for_questionnaire_copies_while_holding_the_questionnaire_lock(
+        self, _mock_copy_cases_for_questionnaire, mock_database_service, caplog
+    ):
+        # arrange
+        mock_database_service.named_lock = self.named_lock_returning(True)
+        _mock_copy_cases_for_questionnaire.return_value = QuestionnaireCopyResultModel(
+            "FRS2504A", QuestionnaireCopyResultModel.COPIED
+        )
+        service_under_test = CaseService(
+            mock_database_service, Mock(), CopyCasesConfigurationModel()
+        )
+
+        # act
+        with caplog.at_level(logging.INFO):
+            result = service_under_test.try_copy_cases_for_questionnaire("FRS2504A")
+
+        # assert
+        connection = mock_database_service.database.connect().__enter__()
+        mock_database_service.named_lock.assert_called_once_with(
+            connection, "copy_cases_to_edit.FRS2504A", 0
+        )
+        _mock_copy_cases_for_questionnaire.assert_called_once_with(
+            connection, "FRS2504A", check_edit_table_exists=False
+        )
+        assert result.status == QuestionnaireCopyResultModel.COPIED
+        lock_stage = next(
+            record.json_fields
+            for record in caplog.records
+            if getattr(record, "json_fields", {}).get("stage") == "questionnaire_lock"
+        )
+        assert lock_stage["acquired"] is True
+        assert lock_stage["duration_ms"] >= 0
+
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_try_copy_cases_for_questionnaire_skips_a_questionnaire_locked_by_another_invocation(
+        self, _mock_copy_cases_for_questionnaire, mock_database_service
+    ):
+        # arrange
+        mock_database_service.named_lock = self.named_lock_returning(False)
+        service_under_test = CaseService(
+            mock_database_service,
+            Mock(),
+            CopyCasesConfigurationModel(lock_timeout_seconds=5),
+        )
+
+        # act
+        result = service_under_test.try_copy_cases_for_questionnaire("FRS2504A")
+
+        # assert
+        mock_database_service.named_lock.assert_called_once_with(
+            ANY, "copy_cases_to_edit.FRS2504A", 5
+        )
+        _mock_copy_cases_for_questionnaire.assert_not_called()
+        assert result.status == QuestionnaireCopyResultModel.LOCKED
+        assert result.failed is False
+
+    @patch.object(CaseService, "copy_cases_for_questionnaire")
+    def test_try_copy_cases_for_questionnaire_does_not_lock_when_locks_are_disabled(
+        self, _mock_copy_cases_for_questionnaire, mock_database_service
+    ):
+        # arrange
+        _mock_copy_cases_for_questionnaire.return_value = QuestionnaireCopyResultModel(
+            "FRS2504A", QuestionnaireCopyResultModel.COPIED
+        )
+        service_under_test = CaseService(
+            mock_database_service,
+            Mock(),
+            CopyCasesConfigurationModel(questionnaire_locks=False),
+        )
+
+        # act
+        result = service_under_test.try_copy_cases_for_questionnaire("FRS2504A")
+
+        # assert
+        mock_database_service.named_lock.assert_not_called()
+        assert result.status == QuestionnaireCopyResultModel.COPIED
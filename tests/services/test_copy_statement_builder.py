@@ -0,0 +1,172 @@
+import pytest
+import sqlalchemy
+from sqlalchemy import text
+
+from models.copy_columns_model import CopyColumnsModel
+from models.copy_filter_model import CopyFilterModel
+from services.copy_statement_builder import CopyStatementBuilder
+from utilities.lru_cache import LruCache
+
+
+class TestCopyStatementBuilder:
+
+    @pytest.fixture()
+    def database_engine(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        with engine.begin() as connection:
+            for table_name in ("FRS2504A_Form", "FRS2504A_EDIT_Form"):
+                connection.execute(
+                    text(
+                        f"CREATE TABLE {table_name} (Serial_Number INTEGER PRIMARY KEY, "
+                        "QEdit_edited INTEGER, QHAdmin_HOut TEXT)"
+                    )
+                )
+            connection.execute(
+                text(
+                    "INSERT INTO FRS2504A_Form VALUES "
+                    "(1, 0, '110'), (2, 0, '110'), (3, 0, '110'), (4, 0, '110')"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO FRS2504A_EDIT_Form VALUES (2, 1, '310'), (3, 0, '310')"
+                )
+            )
+        return engine
+
+    @pytest.fixture()
+    def builder_under_test(self) -> CopyStatementBuilder:
+        return CopyStatementBuilder(LruCache(16))
+
+    @pytest.fixture()
+    def copy_columns(self) -> CopyColumnsModel:
+        return CopyColumnsModel(
+            ["Serial_Number", "QEdit_edited", "QHAdmin_HOut"],
+            ["QEdit_edited", "QHAdmin_HOut"],
+        )
+
+    @staticmethod
+    def get_edit_cases(connection):
+        return connection.execute(
+            text("SELECT * FROM FRS2504A_EDIT_Form ORDER BY Serial_Number")
+        ).all()
+
+    @pytest.mark.parametrize("edited_set_table_name", [None, "tmp_edited"])
+    def test_copy_cases_copies_unedited_cases_on_sqlite(
+        self, builder_under_test, copy_columns, database_engine, edited_set_table_name
+    ):
+        # act
+        with database_engine.begin() as connection:
+            if edited_set_table_name is not None:
+                connection.execute(
+                    text(
+                        "CREATE TEMPORARY TABLE tmp_edited AS SELECT Serial_Number "
+                        "FROM FRS2504A_EDIT_Form WHERE QEdit_edited = 1"
+                    )
+                )
+            connection.execute(
+                builder_under_test.copy_cases(
+                    connection.dialect,
+                    "FRS2504A_EDIT_Form",
+                    "FRS2504A_Form",
+                    copy_columns,
+                    edited_set_table_name,
+                )
+            )
+            result = self.get_edit_cases(connection)
+
+        # assert
+        assert result == [(1, 0, "110"), (2, 1, "310"), (3, 0, "110"), (4, 0, "110")]
+
+    def test_copy_cases_binds_the_filter_bounds(
+        self, builder_under_test, copy_columns, database_engine
+    ):
+        # act
+        with database_engine.begin() as connection:
+            connection.execute(
+                builder_under_test.copy_cases(
+                    connection.dialect,
+                    "FRS2504A_EDIT_Form",
+                    "FRS2504A_Form",
+                    copy_columns,
+                    copy_filter=CopyFilterModel(
+                        column="Serial_Number",
+                        lower_bound_parameter="lower_bound",
+                        upper_bound_parameter="upper_bound",
+                    ),
+                ),
+                {"lower_bound": 2, "upper_bound": 3},
+            )
+            result = self.get_edit_cases(connection)
+
+        # assert
+        assert result == [(2, 1, "310"), (3, 0, "110")]
+
+    def test_copy_cases_is_compiled_once_per_table_pair(
+        self, builder_under_test, copy_columns, database_engine, monkeypatch
+    ):
+        # arrange
+        build_count = 0
+        build_copy_cases = CopyStatementBuilder.build_copy_cases
+
+        def counting_build_copy_cases(*args):
+            nonlocal build_count
+            build_count += 1
+            return build_copy_cases(*args)
+
+        monkeypatch.setattr(
+            builder_under_test, "build_copy_cases", counting_build_copy_cases
+        )
+
+        # act
+        for edit_table_name, questionnaire_table_name in [
+            ("FRS2504A_EDIT_Form", "FRS2504A_Form"),
+            ("FRS2504A_EDIT_Form", "FRS2504A_Form"),
+            ("LMS2504A_EDIT_Form", "LMS2504A_Form"),
+        ]:
+            builder_under_test.copy_cases(
+                database_engine.dialect,
+                edit_table_name,
+                questionnaire_table_name,
+                copy_columns,
+            )
+
+        # assert
+        assert build_count == 2
+
+    def test_estimate_copy_cases_runs_on_sqlite(
+        self, builder_under_test, database_engine
+    ):
+        # act
+        with database_engine.connect() as connection:
+            result = connection.execute(
+                builder_under_test.estimate_copy_cases(
+                    connection.dialect, "FRS2504A_EDIT_Form", "FRS2504A_Form"
+                )
+            ).one()
+
+        # assert
+        assert tuple(result) == (2, 1, 1)
+
+    def test_count_edited_cases_runs_on_sqlite(
+        self, builder_under_test, database_engine
+    ):
+        # act
+        with database_engine.connect() as connection:
+            result = connection.execute(
+                builder_under_test.count_edited_cases(
+                    connection.dialect, "FRS2504A_EDIT_Form"
+                )
+            ).scalar()
+
+        # assert
+        assert result == 1
+
+    def test_copy_cases_rejects_an_unsupported_dialect(
+        self, builder_under_test, copy_columns
+    ):
+        # act & assert
+        with pytest.raises(ValueError, match="not supported on 'postgresql'"):
+            builder_under_test.build_copy_cases(
+                "postgresql", "FRS2504A_EDIT_Form", "FRS2504A_Form", copy_columns
+            )
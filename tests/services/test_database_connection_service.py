@@ -1,3 +1,4 @@
+import sys
 from unittest.mock import call, patch, Mock
 import pytest
 import sqlalchemy
@@ -5,6 +6,8 @@ from sqlalchemy import URL
 
 from models.database_connection_model import DatabaseConnectionModel
 from services.database_connection_service import DatabaseConnectionService
+from services.database_engine_registry import DatabaseEngineRegistry
+from utilities.custom_exceptions import ConfigError
 
 
 class TestDatabaseConnectionFunctionality:
@@ -23,14 +26,22 @@ class TestDatabaseConnectionFunctionality:
     def mock_configuration_provider(self):
         return Mock()
 
+    @pytest.fixture()
+    def database_engine_registry(self) -> DatabaseEngineRegistry:
+        return DatabaseEngineRegistry()
+
     @pytest.fixture()
     def service_under_test(
-        self, mock_configuration_provider, connection_model
+        self, mock_configuration_provider, connection_model, database_engine_registry
     ) -> DatabaseConnectionService:
-        mock_configuration_provider.get_database_connection_model.return_value = (
+        mock_configuration_provider.get_configuration_snapshot.return_value.database = (
             connection_model
         )
-        return DatabaseConnectionService(mock_configuration_provider)
+        return DatabaseConnectionService(
+            mock_configuration_provider,
+            database_engine_registry,
+            DatabaseEngineRegistry(),
+        )
 
     @patch.object(sqlalchemy, "create_engine")
     def test_get_database_uses_the_connection_model_database_url_and_connector_to_create_an_engine(
@@ -51,5 +62,115 @@ class TestDatabaseConnectionFunctionality:
 
         # assert
         mock_engine.assert_has_calls(
-            [call(url=expected_url, connect_args={"ssl": {"key": "blaise"}})]
+            [
+                call(
+                    url=expected_url,
+                    connect_args={"ssl": {"key": "blaise"}, "connect_timeout": 10},
+                    pool_size=5,
+                    max_overflow=2,
+                    pool_recycle=1800,
+                    pool_pre_ping=True,
+                    pool_timeout=30,
+                )
+            ]
+        )
+
+    @patch.object(sqlalchemy, "create_engine")
+    def test_get_database_reuses_the_engine_across_service_instances(
+        self,
+        mock_engine,
+        mock_configuration_provider,
+        database_engine_registry,
+        service_under_test,
+    ):
+        # arrange
+        second_service = DatabaseConnectionService(
+            mock_configuration_provider, database_engine_registry
+        )
+
+        # act
+        first_engine = service_under_test.get_database()
+        second_engine = second_service.get_database()
+
+        # assert
+        assert mock_engine.call_count == 1
+        assert first_engine is second_engine
+
+    @patch("sqlalchemy.ext.asyncio.create_async_engine")
+    def test_get_async_database_creates_an_aiomysql_engine_with_the_same_pool_settings(
+        self, mock_create_async_engine, service_under_test, connection_model
+    ):
+        # arrange
+        expected_url = URL.create(
+            drivername="mysql+aiomysql",
+            username=connection_model.database_username,
+            password=connection_model.database_password,
+            host=connection_model.database_ip_address,
+            port=connection_model.database_port,
+            database=connection_model.database_name,
+        )
+
+        # act
+        with patch.dict(sys.modules, {"aiomysql": Mock()}):
+            service_under_test.get_async_database()
+            service_under_test.get_async_database()
+
+        # assert
+        mock_create_async_engine.assert_called_once()
+        args, kwargs = mock_create_async_engine.call_args
+        assert args == (expected_url,)
+        assert kwargs["pool_size"] == 5
+        assert kwargs["max_overflow"] == 2
+        assert kwargs["pool_recycle"] == 1800
+        assert kwargs["pool_pre_ping"] is True
+        assert kwargs["pool_timeout"] == 30
+        assert kwargs["connect_args"]["ssl"].check_hostname is False
+        assert kwargs["connect_args"]["connect_timeout"] == 10
+
+    @patch.object(sqlalchemy, "create_engine")
+    def test_get_database_rebuilds_the_engine_when_the_connection_fingerprint_changes(
+        self,
+        mock_engine,
+        mock_configuration_provider,
+        connection_model,
+        database_engine_registry,
+        service_under_test,
+    ):
+        # arrange
+        service_under_test.get_database()
+        changed_configuration_provider = Mock()
+        changed_configuration_provider.get_configuration_snapshot.return_value.database = connection_model._replace(
+            database_pool_size=10
+        )
+
+        # act
+        DatabaseConnectionService(
+            changed_configuration_provider, database_engine_registry
+        ).get_database()
+
+        # assert
+        assert mock_engine.call_count == 2
+        assert mock_engine.return_value.dispose.call_count == 1
+
+    def test_connection_model_is_immutable_and_keeps_the_password_out_of_its_repr(
+        self, connection_model
+    ):
+        # act
+        with pytest.raises(AttributeError):
+            connection_model.database_pool_size = 10
+
+        # assert
+        assert "test_password" not in repr(connection_model)
+
+    def test_get_async_database_raises_config_error_when_aiomysql_is_not_installed(
+        self, service_under_test
+    ):
+        # act
+        with patch.dict(sys.modules, {"aiomysql": None}):
+            with pytest.raises(ConfigError) as err:
+                service_under_test.get_async_database()
+
+        # assert
+        assert err.value.args[0] == (
+            "The aiomysql package is required when COPY_CASES_EXECUTION is 'async'"
         )
@@ -0,0 +1,59 @@
+from unittest.mock import Mock
+
+import pytest
+
+from services.database_engine_registry import DatabaseEngineRegistry
+
+
+class TestDatabaseEngineRegistry:
+
+    @pytest.fixture()
+    def registry_under_test(self) -> DatabaseEngineRegistry:
+        return DatabaseEngineRegistry()
+
+    def test_get_engine_creates_the_engine_once_for_the_same_key(
+        self, registry_under_test
+    ):
+        # arrange
+        mock_create_engine = Mock()
+
+        # act
+        first_engine = registry_under_test.get_engine(("blaise",), mock_create_engine)
+        second_engine = registry_under_test.get_engine(("blaise",), mock_create_engine)
+
+        # assert
+        assert mock_create_engine.call_count == 1
+        assert first_engine is second_engine
+
+    def test_get_engine_disposes_and_rebuilds_the_engine_when_the_key_changes(
+        self, registry_under_test
+    ):
+        # arrange
+        old_engine = Mock()
+        new_engine = Mock()
+        mock_create_engine = Mock(side_effect=[old_engine, new_engine])
+
+        # act
+        registry_under_test.get_engine(("blaise", 3306), mock_create_engine)
+        result = registry_under_test.get_engine(("blaise", 3307), mock_create_engine)
+
+        # assert
+        assert result is new_engine
+        assert mock_create_engine.call_count == 2
+        old_engine.dispose.assert_called_once()
+
+    def test_dispose_disposes_the_engine_and_forces_a_rebuild(
+        self, registry_under_test
+    ):
+        # arrange
+        engine = Mock()
+        mock_create_engine = Mock(return_value=engine)
+        registry_under_test.get_engine(("blaise",), mock_create_engine)
+
+        # act
+        registry_under_test.dispose()
+        registry_under_test.get_engine(("blaise",), mock_create_engine)
+
+        # assert
+        engine.dispose.assert_called_once()
+        assert mock_create_engine.call_count == 2
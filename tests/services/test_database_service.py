@@ -0,0 +1,543 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+import sqlalchemy
+from sqlalchemy import text
+from sqlalchemy.dialects import mysql
+
+from models.copy_columns_model import CopyColumnsModel
+from models.copy_statistics_model import CopyStatisticsModel
+from services.database_service import DatabaseService, SERIAL_NUMBER_UPPER_BOUND
+
+
+class TestDatabaseService:
+
+    @pytest.fixture()
+    def database_engine(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE FRS2504A_Form "
+                    "(Serial_Number INTEGER PRIMARY KEY, QEdit_LastUpdated TEXT)"
+                )
+            )
+            for serial_number in range(1, 8):
+                connection.execute(
+                    text(
+                        "INSERT INTO FRS2504A_Form "
+                        "VALUES (:serial_number, :last_updated)"
+                    ),
+                    {
+                        "serial_number": serial_number,
+                        "last_updated": f"2024-05-0{serial_number} 12:00:00",
+                    },
+                )
+        return engine
+
+    @pytest.fixture()
+    def service_under_test(self, database_engine) -> DatabaseService:
+        mock_database_connection_service = Mock()
+        mock_database_connection_service.get_database.return_value = database_engine
+        return DatabaseService(mock_database_connection_service)
+
+    def test_get_chunk_upper_bound_walks_the_table_in_chunks(
+        self, service_under_test, database_engine
+    ):
+        # arrange
+        upper_bounds = []
+        lower_bound = None
+
+        # act
+        with database_engine.connect() as connection:
+            while True:
+                lower_bound = service_under_test.get_chunk_upper_bound(
+                    connection, "FRS2504A_Form", lower_bound, 3
+                )
+                if lower_bound is None:
+                    break
+                upper_bounds.append(lower_bound)
+
+        # assert
+        assert upper_bounds == [3, 6, 7]
+
+    def test_copy_cases_command_adds_the_additional_filter_after_the_edited_check(
+        self,
+    ):
+        # act
+        command = DatabaseService.copy_cases_command(
+            mysql.dialect(),
+            "FRS2504A_EDIT_Form",
+            "FRS2504A_Form",
+            CopyColumnsModel(["Serial_Number", "QHAdmin_HOut"], ["QHAdmin_HOut"]),
+            copy_filter=SERIAL_NUMBER_UPPER_BOUND,
+        )
+
+        # assert
+        assert (
+            "WHERE coalesce(`EDITED`.`QEdit_edited`, 0) != 1 "
+            "AND `UNEDITED`.`Serial_Number` <= :upper_bound"
+        ) in " ".join(str(command).split())
+        assert "upper_bound" in command.compile().params
+
+    def test_get_max_watermark_returns_the_latest_change_marker(
+        self, service_under_test, database_engine
+    ):
+        # act
+        with database_engine.connect() as connection:
+            result = service_under_test.get_max_watermark(
+                connection, "FRS2504A_Form", "QEdit_LastUpdated"
+            )
+
+        # assert
+        assert result == datetime(2024, 5, 7, 12, 0, 0)
+
+    def test_get_copy_statistics_gathers_what_the_cost_model_needs(
+        self, service_under_test
+    ):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.dialect = mysql.dialect()
+        mock_connection.execute.side_effect = [
+            Mock(one_or_none=Mock(return_value=(5000, 120))),
+            Mock(scalar=Mock(return_value=40)),
+            Mock(scalar=Mock(return_value=3600)),
+        ]
+        service_under_test.get_copy_columns = Mock(
+            return_value=CopyColumnsModel(
+                ["Serial_Number", "QEdit_LastUpdated"], ["Serial_Number"]
+            )
+        )
+
+        # act
+        result = service_under_test.get_copy_statistics(
+            mock_connection,
+            "FRS2504A",
+            "FRS2504A_EDIT_Form",
+            "FRS2504A_Form",
+            "copy_cases_watermark",
+            "QEdit_LastUpdated",
+        )
+
+        # assert
+        assert result == CopyStatisticsModel(
+            questionnaire_rows=5000,
+            edited_rows=40,
+            seconds_since_last_run=3600,
+            seconds_since_questionnaire_update=120,
+            watermark_available=True,
+        )
+        watermark_statement, parameters = mock_connection.execute.call_args.args
+        assert " ".join(str(watermark_statement).split()) == (
+            "SELECT timestampdiff(SECOND, copy_cases_watermark.updated_at, "
+            "utc_timestamp()) AS timestampdiff_1 FROM copy_cases_watermark "
+            "WHERE copy_cases_watermark.questionnaire_name = :questionnaire_name"
+        )
+        assert parameters == {"questionnaire_name": "FRS2504A"}
+
+    def test_get_watermark_returns_none_for_a_questionnaire_that_has_not_been_copied(
+        self, service_under_test, database_engine
+    ):
+        # act
+        with database_engine.begin() as connection:
+            service_under_test.create_watermark_table(
+                connection, "copy_cases_watermark"
+            )
+            result = service_under_test.get_watermark(
+                connection, "copy_cases_watermark", "FRS2504A"
+            )
+
+        # assert
+        assert result is None
+
+    def test_set_watermark_binds_the_watermark_as_a_datetime(self, service_under_test):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.dialect = mysql.dialect()
+
+        # act
+        service_under_test.set_watermark(
+            mock_connection,
+            "copy_cases_watermark",
+            "FRS2504A",
+            "2024-05-07 12:00:00.250000",
+        )
+
+        # assert
+        _, parameters = mock_connection.execute.call_args.args
+        assert parameters == {
+            "questionnaire_name": "FRS2504A",
+            "watermark": datetime(2024, 5, 7, 12, 0, 0, 250000),
+        }
+
+    @pytest.mark.parametrize(
+        "value,expected_watermark",
+        [
+            (None, None),
+            ("2024-05-07 12:00:00", datetime(2024, 5, 7, 12, 0, 0)),
+            (datetime(2024, 5, 7, 12, 0, 0), datetime(2024, 5, 7, 12, 0, 0)),
+        ],
+    )
+    def test_to_watermark_reads_watermarks_stored_as_text(
+        self, value, expected_watermark
+    ):
+        # act
+        result = DatabaseService.to_watermark(value)
+
+        # assert
+        assert result == expected_watermark
+
+    def test_copy_cases_changed_since_filters_on_the_watermark_column(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.dialect = mysql.dialect()
+        mock_connection.execute.return_value.rowcount = 0
+        mock_connection.execute.return_value.one.return_value = Mock(
+            rows_to_copy=0, rows_to_update=0
+        )
+        mock_table_schema_service = Mock()
+        mock_table_schema_service.get_copy_columns.return_value = CopyColumnsModel(
+            ["Serial_Number", "QEdit_LastUpdated"], ["QEdit_LastUpdated"]
+        )
+
+        # act
+        DatabaseService(Mock(), mock_table_schema_service).copy_cases_changed_since(
+            mock_connection,
+            "FRS2504A_EDIT_Form",
+            "FRS2504A_Form",
+            "QEdit_LastUpdated",
+            "2024-05-01 12:00:00",
+            "2024-05-07 12:00:00",
+        )
+
+        # assert
+        command, parameters = mock_connection.execute.call_args.args
+        assert (
+            "AND `UNEDITED`.`QEdit_LastUpdated` >= :lower_watermark "
+            "AND `UNEDITED`.`QEdit_LastUpdated` <= :upper_watermark"
+        ) in " ".join(str(command).split())
+        assert parameters == {
+            "lower_watermark": "2024-05-01 12:00:00",
+            "upper_watermark": "2024-05-07 12:00:00",
+        }
+
+    def test_copy_cases_command_moves_only_the_given_columns(self):
+        # arrange
+        copy_columns = CopyColumnsModel(
+            ["Serial_Number", "QEdit_edited", "QHAdmin_HOut"],
+            ["QEdit_edited", "QHAdmin_HOut"],
+        )
+
+        # act
+        command = DatabaseService.copy_cases_command(
+            mysql.dialect(), "FRS2504A_EDIT_Form", "FRS2504A_Form", copy_columns
+        )
+
+        # assert
+        statement = " ".join(str(command).split())
+        assert (
+            "INSERT INTO `FRS2504A_EDIT_Form` "
+            "(`Serial_Number`, `QEdit_edited`, `QHAdmin_HOut`)"
+        ) in statement
+        assert (
+            "SELECT `UNEDITED`.`Serial_Number`, `UNEDITED`.`QEdit_edited`, "
+            "`UNEDITED`.`QHAdmin_HOut`"
+        ) in statement
+        assert "*" not in statement
+        assert statement.endswith(
+            "ON DUPLICATE KEY UPDATE `QEdit_edited` = VALUES(`QEdit_edited`), "
+            "`QHAdmin_HOut` = VALUES(`QHAdmin_HOut`)"
+        )
+
+    def test_copy_cases_command_filters_against_the_edited_set_instead_of_joining(
+        self,
+    ):
+        # act
+        command = DatabaseService.copy_cases_command(
+            mysql.dialect(),
+            "FRS2504A_EDIT_Form",
+            "FRS2504A_Form",
+            CopyColumnsModel(["Serial_Number", "QHAdmin_HOut"], ["QHAdmin_HOut"]),
+            edited_set_table_name="tmp_FRS2504A_EDIT_Form_edited",
+        )
+
+        # assert
+        statement = " ".join(str(command).split())
+        assert "JOIN" not in statement
+        assert (
+            "WHERE NOT (EXISTS (SELECT 1 FROM `tmp_FRS2504A_EDIT_Form_edited` AS `EDITED`"
+        ) in statement
+
+    def test_copy_cases_command_quotes_table_names(self):
+        # act
+        command = DatabaseService.copy_cases_command(
+            mysql.dialect(),
+            "FRS`2504A_EDIT_Form",
+            "FRS`2504A_Form",
+            CopyColumnsModel(["Serial_Number", "QHAdmin_HOut"], ["QHAdmin_HOut"]),
+        )
+
+        # assert
+        assert "INSERT INTO `FRS``2504A_EDIT_Form`" in str(command)
+        assert "FROM `FRS``2504A_Form` AS `UNEDITED`" in str(command)
+
+    def test_copy_cases_command_reuses_the_statement_for_the_same_tables(self):
+        # arrange
+        copy_columns = CopyColumnsModel(
+            ["Serial_Number", "QHAdmin_HOut"], ["QHAdmin_HOut"]
+        )
+
+        # act
+        first_command = DatabaseService.copy_cases_command(
+            mysql.dialect(), "LMS2504A_EDIT_Form", "LMS2504A_Form", copy_columns
+        )
+        second_command = DatabaseService.copy_cases_command(
+            mysql.dialect(), "LMS2504A_EDIT_Form", "LMS2504A_Form", copy_columns
+        )
+
+        # assert
+        assert second_command is first_command
+
+    def test_edited_set_creates_and_drops_an_indexed_temporary_table(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.dialect = mysql.dialect()
+
+        # act
+        with DatabaseService.edited_set(
+            mock_connection, "FRS2504A_EDIT_Form", "edited_set"
+        ) as edited_set_table_name:
+            statements_while_open = [
+                str(statement.args[0])
+                for statement in mock_connection.execute.call_args_list
+            ]
+
+        # assert
+        assert edited_set_table_name == "tmp_FRS2504A_EDIT_Form_edited"
+        assert "CREATE TEMPORARY TABLE `tmp_FRS2504A_EDIT_Form_edited`" in (
+            statements_while_open[-1]
+        )
+        assert "PRIMARY KEY (Serial_Number)" in statements_while_open[-1]
+        assert "FROM `FRS2504A_EDIT_Form` WHERE QEdit_edited = 1" in (
+            statements_while_open[-1]
+        )
+        assert str(mock_connection.execute.call_args.args[0]) == (
+            "DROP TEMPORARY TABLE IF EXISTS `tmp_FRS2504A_EDIT_Form_edited`"
+        )
+
+    def test_edited_set_does_nothing_for_the_left_join_strategy(self):
+        # arrange
+        mock_connection = Mock()
+
+        # act
+        with DatabaseService.edited_set(
+            mock_connection, "FRS2504A_EDIT_Form", "left_join"
+        ) as edited_set_table_name:
+            pass
+
+        # assert
+        assert edited_set_table_name is None
+        assert mock_connection.execute.call_count == 0
+
+    def test_named_lock_acquires_and_releases_the_lock_around_the_block(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.execute.return_value.scalar.return_value = 1
+
+        # act
+        with DatabaseService.named_lock(
+            mock_connection, "copy_cases_to_edit.FRS2504A", 0
+        ) as lock_acquired:
+            statements_while_held = [
+                str(statement.args[0])
+                for statement in mock_connection.execute.call_args_list
+            ]
+
+        # assert
+        assert lock_acquired is True
+        assert len(statements_while_held) == 1
+        assert "GET_LOCK" in statements_while_held[0]
+        assert "RELEASE_LOCK" in str(mock_connection.execute.call_args.args[0])
+        assert mock_connection.execute.call_args.args[1] == {
+            "lock_name": "copy_cases_to_edit.FRS2504A"
+        }
+        assert mock_connection.commit.call_count == 2
+
+    def test_named_lock_does_not_release_a_lock_held_by_another_session(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.execute.return_value.scalar.return_value = 0
+
+        # act
+        with DatabaseService.named_lock(
+            mock_connection, "copy_cases_to_edit.FRS2504A", 0
+        ) as lock_acquired:
+            pass
+
+        # assert
+        assert lock_acquired is False
+        assert mock_connection.execute.call_count == 1
+
+    def test_named_lock_discards_the_connection_when_the_release_fails(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.execute.side_effect = [
+            Mock(scalar=Mock(return_value=1)),
+            Exception("Lost connection to MySQL server"),
+        ]
+
+        # act
+        with DatabaseService.named_lock(
+            mock_connection, "copy_cases_to_edit.FRS2504A", 0
+        ):
+            pass
+
+        # assert
+        mock_connection.invalidate.assert_called_once()
+
+    def test_row_hash_expression_quotes_every_copied_column(self):
+        # act
+        result = DatabaseService.row_hash_expression(
+            mysql.dialect(),
+            CopyColumnsModel(["Serial_Number", "QHAdmin_HOut"], ["QHAdmin_HOut"]),
+        )
+
+        # assert
+        assert result == (
+            "UNHEX(MD5(CONCAT_WS(',', QUOTE(UNEDITED.`Serial_Number`), "
+            "QUOTE(UNEDITED.`QHAdmin_HOut`))))"
+        )
+
+    def test_copy_changed_cases_only_copies_and_records_changed_cases(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.dialect = mysql.dialect()
+        mock_connection.execute.return_value.rowcount = 2
+        mock_connection.execute.return_value.one.return_value = Mock(
+            rows_to_copy=2, rows_to_update=1
+        )
+        mock_table_schema_service = Mock()
+        mock_table_schema_service.get_copy_columns.return_value = CopyColumnsModel(
+            ["Serial_Number", "QHAdmin_HOut"], ["QHAdmin_HOut"]
+        )
+
+        # act
+        result = DatabaseService(Mock(), mock_table_schema_service).copy_changed_cases(
+            mock_connection, "FRS2504A_EDIT_Form", "FRS2504A_Form", "FRS2504A_RowHash"
+        )
+
+        # assert
+        statements = [
+            " ".join(str(statement.args[0]).split())
+            for statement in mock_connection.execute.call_args_list
+        ]
+        assert len(statements) == 6
+        assert statements[1].startswith(
+            "CREATE TEMPORARY TABLE `tmp_FRS2504A_Form_changed`"
+        )
+        assert "LEFT JOIN `FRS2504A_RowHash` HASHED" in statements[1]
+        assert "WHERE EDITED.Serial_Number IS NULL OR NOT HASHED.row_hash <=>" in (
+            statements[1]
+        )
+        assert (
+            "AND `UNEDITED`.`Serial_Number` IN (SELECT "
+            "`tmp_FRS2504A_Form_changed`.`Serial_Number` FROM `tmp_FRS2504A_Form_changed`)"
+        ) in statements[3]
+        assert statements[2].startswith("SELECT count(*) AS rows_to_copy")
+        assert statements[4].startswith(
+            "INSERT INTO `FRS2504A_RowHash` (`Serial_Number`, row_hash) "
+            "SELECT `CHANGED`.`Serial_Number`, `CHANGED`.row_hash "
+            "FROM `tmp_FRS2504A_Form_changed` AS `CHANGED` "
+            "INNER JOIN `FRS2504A_EDIT_Form` AS `EDITED`"
+        )
+        assert "WHERE coalesce(`EDITED`.`QEdit_edited`, 0) != 1" in statements[4]
+        assert statements[5] == (
+            "DROP TEMPORARY TABLE IF EXISTS `tmp_FRS2504A_Form_changed`"
+        )
+        assert result.to_dict() == {
+            "rows_affected": 2,
+            "rows_inserted": 1,
+            "rows_updated": 1,
+        }
+
+    def test_get_row_counts_splits_the_copied_cases_into_inserted_and_updated(self):
+        # arrange
+        mock_result = Mock(spec=["rowcount"])
+        mock_result.rowcount = 14
+
+        # act
+        result = DatabaseService.get_row_counts(mock_result, 10, 4)
+
+        # assert
+        assert result.to_dict() == {
+            "rows_affected": 14,
+            "rows_inserted": 6,
+            "rows_updated": 4,
+        }
+
+    def test_execute_copy_counts_inserted_and_updated_cases(self, database_engine):
+        # arrange
+        with database_engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE FRS2504A_EDIT_Form "
+                    "(Serial_Number INTEGER PRIMARY KEY, QEdit_LastUpdated TEXT, "
+                    "QEdit_edited INTEGER)"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO FRS2504A_EDIT_Form VALUES "
+                    "(1, 'old', 0), (2, 'old', 1), (3, 'old', NULL)"
+                )
+            )
+
+        # act
+        with database_engine.begin() as connection:
+            result = DatabaseService.execute_copy(
+                connection,
+                "FRS2504A_EDIT_Form",
+                "FRS2504A_Form",
+                CopyColumnsModel(
+                    ["Serial_Number", "QEdit_LastUpdated"], ["QEdit_LastUpdated"]
+                ),
+                copy_filter=SERIAL_NUMBER_UPPER_BOUND,
+                parameters={"upper_bound": 5},
+            )
+
+        # assert
+        assert result.inserted == 2
+        assert result.updated == 2
+        assert result.rows_written == 4
+
+    def test_estimate_copy_cases_counts_rows_to_insert_overwrite_and_skip(
+        self, service_under_test, database_engine
+    ):
+        # arrange
+        with database_engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE FRS2504A_EDIT_Form "
+                    "(Serial_Number INTEGER PRIMARY KEY, QEdit_edited INTEGER)"
+                )
+            )
+            connection.execute(
+                text(
+                    "INSERT INTO FRS2504A_EDIT_Form VALUES "
+                    "(1, 1), (2, 0), (3, NULL), (4, 1)"
+                )
+            )
+
+        # act
+        with database_engine.connect() as connection:
+            result = service_under_test.estimate_copy_cases(
+                connection, "FRS2504A_EDIT_Form", "FRS2504A_Form"
+            )
+
+        # assert
+        assert result == {
+            "rows_to_insert": 3,
+            "rows_to_overwrite": 2,
+            "rows_to_skip": 2,
+        }
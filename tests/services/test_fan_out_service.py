@@ -0,0 +1,206 @@
+from typing import Iterator
+from unittest.mock import ANY, MagicMock, Mock, patch
+
+import pymysql
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from models.copy_cases_configuration_model import CopyCasesConfigurationModel
+from models.copy_plan_model import CopyPlanModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from models.work_item_model import WorkItemModel
+from services.case_service import CaseService
+from services.fan_out_service import FanOutService
+from services.work_queue import InMemoryWorkQueue
+from utilities.retry_policy import RetryPolicy
+
+
+def lock_error(error_code: int) -> OperationalError:
+    return OperationalError(
+        "INSERT INTO ...", {}, pymysql.err.OperationalError(error_code, "lock error")
+    )
+
+
+class TestFanOutService:
+
+    @pytest.fixture()
+    def work_queue(self) -> InMemoryWorkQueue:
+        return InMemoryWorkQueue()
+
+    @pytest.fixture()
+    def case_service(self) -> Iterator[CaseService]:
+        case_service = CaseService(
+            MagicMock(),
+            Mock(),
+            CopyCasesConfigurationModel(questionnaire_locks=False),
+            RetryPolicy(max_attempts=1),
+        )
+        with patch.object(
+            case_service,
+            "resolve_copy_plan",
+            return_value=(
+                ["FRS"],
+                CopyPlanModel(["FRS2504A", "FRS2505A"], ["FRS2506A"], []),
+            ),
+        ):
+            yield case_service
+
+    @pytest.fixture()
+    def service_under_test(self, case_service, work_queue) -> FanOutService:
+        return FanOutService(
+            case_service, work_queue, CopyCasesConfigurationModel(requeue_limit=1)
+        )
+
+    def test_enqueue_copy_cases_queues_one_item_per_copyable_questionnaire(
+        self, service_under_test, work_queue
+    ):
+        # act
+        first_result = service_under_test.enqueue_copy_cases("FRS")
+        second_result = service_under_test.enqueue_copy_cases("FRS")
+
+        # assert
+        assert first_result.to_dict()["enqueued"] == 2
+        assert first_result.to_dict()["plan"]["missing_edit_table"] == ["FRS2506A"]
+        assert second_result.to_dict()["enqueued"] == 0
+        assert second_result.to_dict()["already_queued"] == 2
+        assert work_queue.pending_count() == 2
+
+    def test_process_work_items_copies_and_acknowledges_the_queued_questionnaires(
+        self, service_under_test, case_service, work_queue
+    ):
+        # arrange
+        service_under_test.enqueue_copy_cases("FRS")
+
+        # act
+        with patch.object(
+            case_service,
+            "copy_cases_for_questionnaire",
+            side_effect=lambda _, questionnaire_name, **__: QuestionnaireCopyResultModel(
+                questionnaire_name, QuestionnaireCopyResultModel.COPIED
+            ),
+        ) as copy_cases_for_questionnaire:
+            first_results = service_under_test.process_work_items()
+            second_results = service_under_test.process_work_items(max_items=5)
+
+        # assert
+        copy_cases_for_questionnaire.assert_any_call(
+            ANY, "FRS2504A", check_edit_table_exists=True
+        )
+        assert [
+            result.questionnaire_name for result in first_results.questionnaire_results
+        ] == ["FRS2504A"]
+        assert first_results.pending_count == 1
+        assert [
+            result.questionnaire_name for result in second_results.questionnaire_results
+        ] == ["FRS2505A"]
+        assert second_results.failed_questionnaires == []
+        assert work_queue.pending_count() == 0
+
+    def test_process_work_items_requeues_lock_conflicts_until_the_requeue_limit(
+        self, service_under_test, case_service, work_queue
+    ):
+        # arrange
+        service_under_test.enqueue_copy_cases("FRS")
+
+        # act
+        with patch.object(
+            case_service,
+            "copy_cases_for_questionnaire",
+            side_effect=lock_error(1213),
+        ):
+            first_results = service_under_test.process_work_items(max_items=2)
+            second_results = service_under_test.process_work_items(max_items=2)
+
+        # assert
+        assert first_results.requeued_questionnaires == ["FRS2504A", "FRS2505A"]
+        assert first_results.failed_questionnaires == []
+        assert second_results.requeued_questionnaires == []
+        assert second_results.failed_questionnaires == ["FRS2504A", "FRS2505A"]
+        assert work_queue.pending_count() == 0
+        assert work_queue.dead_letter_count() == 2
+
+    def test_process_work_items_leaves_locked_questionnaires_claimed_on_the_queue(
+        self, service_under_test, case_service, work_queue
+    ):
+        # arrange
+        service_under_test.enqueue_copy_cases("FRS")
+
+        # act
+        with patch.object(
+            case_service,
+            "try_copy_cases_for_questionnaire",
+            side_effect=lambda questionnaire_name, **__: CaseService.questionnaire_locked_result(
+                questionnaire_name
+            ),
+        ):
+            results = service_under_test.process_work_items(max_items=2)
+
+        # assert
+        assert results.requeued_questionnaires == ["FRS2504A", "FRS2505A"]
+        assert work_queue.pending_count() == 2
+        assert work_queue.claim() is None
+
+    def test_process_work_items_dead_letters_questionnaires_still_locked_on_the_last_delivery(
+        self, case_service, work_queue
+    ):
+        # arrange
+        service_under_test = FanOutService(
+            case_service,
+            work_queue,
+            CopyCasesConfigurationModel(work_queue_max_deliveries=1),
+        )
+        service_under_test.enqueue_copy_cases("FRS")
+
+        # act
+        with patch.object(
+            case_service,
+            "try_copy_cases_for_questionnaire",
+            side_effect=lambda questionnaire_name, **__: CaseService.questionnaire_locked_result(
+                questionnaire_name
+            ),
+        ):
+            results = service_under_test.process_work_items(max_items=2)
+
+        # assert
+        assert results.requeued_questionnaires == []
+        assert results.failed_questionnaires == ["FRS2504A", "FRS2505A"]
+        assert results.questionnaire_results[0].error == (
+            "Still locked by another invocation after 1 deliveries"
+        )
+        assert work_queue.pending_count() == 0
+        assert work_queue.dead_letter_count() == 2
+
+    def test_process_work_items_dead_letters_questionnaires_delivered_too_often_without_copying(
+        self, case_service, work_queue
+    ):
+        # arrange
+        service_under_test = FanOutService(
+            case_service,
+            work_queue,
+            CopyCasesConfigurationModel(work_queue_max_deliveries=1),
+        )
+        work_queue.enqueue([WorkItemModel("FRS2504A", deliveries=1)])
+
+        # act
+        with patch.object(
+            case_service, "try_copy_cases_for_questionnaire"
+        ) as try_copy_cases_for_questionnaire:
+            results = service_under_test.process_work_items()
+
+        # assert
+        try_copy_cases_for_questionnaire.assert_not_called()
+        assert results.failed_questionnaires == ["FRS2504A"]
+        assert results.questionnaire_results[0].error == (
+            "Not finished after 1 deliveries"
+        )
+        assert work_queue.pending_count() == 0
+        assert work_queue.dead_letter_count() == 1
+
+    def test_process_work_items_returns_no_results_when_the_queue_is_empty(
+        self, service_under_test
+    ):
+        # act
+        results = service_under_test.process_work_items()
+
+        # assert
+        assert results.to_dict() == {"questionnaires": [], "requeued": [], "pending": 0}
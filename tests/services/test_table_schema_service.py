@@ -0,0 +1,198 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy.exc import NoSuchTableError
+
+from models.table_schema_model import TableSchemaModel
+from services.table_schema_service import TableSchemaService
+from utilities.table_schema_cache import TableSchemaCache
+
+
+class TestTableSchemaService:
+
+    @pytest.fixture()
+    def service_under_test(self) -> TableSchemaService:
+        return TableSchemaService(TableSchemaCache())
+
+    @pytest.fixture()
+    def table_schemas(self):
+        return [
+            TableSchemaModel(
+                "FRS2504A_Form",
+                "3:111",
+                ["Serial_Number", "QEdit_edited", "QHAdmin_HOut"],
+                ["Serial_Number"],
+            ),
+            TableSchemaModel(
+                "FRS2504A_EDIT_Form",
+                "4:222",
+                ["Serial_Number", "QEdit_edited", "QHAdmin_HOut", "QEdit_Notes"],
+                ["Serial_Number"],
+            ),
+        ]
+
+    def test_fetch_table_fingerprints_looks_up_all_tables_in_one_query(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.execute.return_value = [("FRS2504A_Form", "3:111")]
+
+        # act
+        result = TableSchemaService.fetch_table_fingerprints(
+            mock_connection, ["FRS2504A_Form", "FRS2504A_EDIT_Form"]
+        )
+
+        # assert
+        assert result == {"FRS2504A_Form": "3:111"}
+        assert mock_connection.execute.call_count == 1
+        command, parameters = mock_connection.execute.call_args.args
+        assert "information_schema.COLUMNS" in str(command)
+        assert parameters == {"table_names": ["FRS2504A_Form", "FRS2504A_EDIT_Form"]}
+
+    def test_fetch_table_fingerprints_does_not_query_when_there_are_no_tables(self):
+        # arrange
+        mock_connection = Mock()
+
+        # act
+        result = TableSchemaService.fetch_table_fingerprints(mock_connection, [])
+
+        # assert
+        assert result == {}
+        assert mock_connection.execute.call_count == 0
+
+    def test_fetch_table_schemas_groups_columns_and_primary_keys_by_table(self):
+        # arrange
+        mock_connection = Mock()
+        mock_connection.execute.return_value = [
+            ("FRS2504A_EDIT_Form", "Serial_Number", "PRI"),
+            ("FRS2504A_EDIT_Form", "QEdit_edited", ""),
+            ("FRS2504A_Form", "Serial_Number", "PRI"),
+        ]
+
+        # act
+        result = TableSchemaService.fetch_table_schemas(
+            mock_connection,
+            ["FRS2504A_Form", "FRS2504A_EDIT_Form"],
+            {"FRS2504A_Form": "1:111", "FRS2504A_EDIT_Form": "2:222"},
+        )
+
+        # assert
+        assert [
+            (schema.table_name, schema.fingerprint, schema.columns) for schema in result
+        ] == [
+            ("FRS2504A_Form", "1:111", ["Serial_Number"]),
+            ("FRS2504A_EDIT_Form", "2:222", ["Serial_Number", "QEdit_edited"]),
+        ]
+        assert result[1].primary_key_columns == ["Serial_Number"]
+
+    @patch.object(TableSchemaService, "fetch_table_schemas")
+    @patch.object(TableSchemaService, "fetch_table_fingerprints")
+    def test_get_copy_columns_maps_only_the_shared_columns(
+        self,
+        _mock_fetch_table_fingerprints,
+        _mock_fetch_table_schemas,
+        service_under_test,
+        table_schemas,
+    ):
+        # arrange
+        _mock_fetch_table_fingerprints.return_value = {
+            "FRS2504A_Form": "3:111",
+            "FRS2504A_EDIT_Form": "4:222",
+        }
+        _mock_fetch_table_schemas.return_value = table_schemas
+
+        # act
+        result = service_under_test.get_copy_columns(
+            Mock(), "FRS2504A_EDIT_Form", "FRS2504A_Form"
+        )
+
+        # assert
+        assert result.columns == ["Serial_Number", "QEdit_edited", "QHAdmin_HOut"]
+        assert result.update_columns == ["QEdit_edited", "QHAdmin_HOut"]
+
+    @patch.object(TableSchemaService, "fetch_table_schemas")
+    @patch.object(TableSchemaService, "fetch_table_fingerprints")
+    def test_get_copy_columns_only_reflects_tables_once_while_their_fingerprints_match(
+        self,
+        _mock_fetch_table_fingerprints,
+        _mock_fetch_table_schemas,
+        service_under_test,
+        table_schemas,
+    ):
+        # arrange
+        _mock_fetch_table_fingerprints.return_value = {
+            "FRS2504A_Form": "3:111",
+            "FRS2504A_EDIT_Form": "4:222",
+        }
+        _mock_fetch_table_schemas.return_value = table_schemas
+        mock_connection = Mock()
+
+        # act
+        service_under_test.get_table_fingerprints(
+            mock_connection, ["FRS2504A_Form", "FRS2504A_EDIT_Form"]
+        )
+        service_under_test.get_copy_columns(
+            mock_connection, "FRS2504A_EDIT_Form", "FRS2504A_Form"
+        )
+        service_under_test.get_copy_columns(
+            mock_connection, "FRS2504A_EDIT_Form", "FRS2504A_Form"
+        )
+
+        # assert
+        assert _mock_fetch_table_fingerprints.call_count == 1
+        assert _mock_fetch_table_schemas.call_count == 1
+
+    @patch.object(TableSchemaService, "fetch_table_schemas")
+    @patch.object(TableSchemaService, "fetch_table_fingerprints")
+    def test_get_copy_columns_reflects_a_table_again_when_its_fingerprint_changes(
+        self,
+        _mock_fetch_table_fingerprints,
+        _mock_fetch_table_schemas,
+        table_schemas,
+    ):
+        # arrange
+        table_schema_cache = TableSchemaCache()
+        for table_schema in table_schemas:
+            table_schema_cache.set(table_schema)
+        _mock_fetch_table_fingerprints.return_value = {
+            "FRS2504A_Form": "3:111",
+            "FRS2504A_EDIT_Form": "5:999",
+        }
+        _mock_fetch_table_schemas.return_value = [
+            TableSchemaModel(
+                "FRS2504A_EDIT_Form",
+                "5:999",
+                ["Serial_Number", "QEdit_edited"],
+                ["Serial_Number"],
+            )
+        ]
+
+        # act
+        result = TableSchemaService(table_schema_cache).get_copy_columns(
+            Mock(), "FRS2504A_EDIT_Form", "FRS2504A_Form"
+        )
+
+        # assert
+        _mock_fetch_table_schemas.assert_called_once()
+        assert _mock_fetch_table_schemas.call_args.args[1] == ["FRS2504A_EDIT_Form"]
+        assert result.columns == ["Serial_Number", "QEdit_edited"]
+        assert table_schema_cache.get("FRS2504A_EDIT_Form", "5:999") is not None
+
+    @patch.object(TableSchemaService, "fetch_table_schemas")
+    @patch.object(TableSchemaService, "fetch_table_fingerprints")
+    def test_get_copy_columns_raises_for_a_missing_table_without_caching_it(
+        self,
+        _mock_fetch_table_fingerprints,
+        _mock_fetch_table_schemas,
+        service_under_test,
+    ):
+        # arrange
+        _mock_fetch_table_fingerprints.return_value = {"FRS2504A_Form": "3:111"}
+
+        # act & assert
+        with pytest.raises(NoSuchTableError) as err:
+            service_under_test.get_copy_columns(
+                Mock(), "FRS2504A_EDIT_Form", "FRS2504A_Form"
+            )
+
+        assert str(err.value) == "FRS2504A_EDIT_Form"
+        _mock_fetch_table_schemas.assert_not_called()
@@ -69,3 +69,60 @@ class TestValidationService:
             40,
             error_message,
         ) in caplog.record_tuples
+
+    def test_validate_request_values_are_not_empty_does_not_raise_an_exception_when_given_a_list_of_survey_types(
+        self,
+    ):
+        # arrange
+        validation_service = ValidationService()
+        mock_request = flask.Request.from_values(json={"survey_type": ["FRS", "LCF"]})
+
+        # assert
+        with does_not_raise(RequestError):
+            validation_service.validate_request_values_are_not_empty(mock_request)
+
+    @pytest.mark.parametrize(
+        "survey_type",
+        [[], ["FRS", ""], [None]],
+    )
+    def test_validate_request_values_are_not_empty_raises_request_error_when_survey_type_list_has_missing_values(
+        self, survey_type
+    ):
+        # arrange
+        validation_service = ValidationService()
+        mock_request = flask.Request.from_values(json={"survey_type": survey_type})
+
+        # act
+        with pytest.raises(RequestError) as err:
+            validation_service.validate_request_values_are_not_empty(mock_request)
+
+        # assert
+        error_message = "Missing required values from request: ['survey_type']"
+        assert err.value.args[0] == error_message
+
+    @pytest.mark.parametrize(
+        "survey_type",
+        [123, ["FRS", 123], [["FRS"]], {"survey_type": "FRS"}],
+    )
+    def test_validate_request_values_are_not_empty_logs_and_raises_request_error_when_survey_type_is_not_a_string(
+        self, survey_type, caplog
+    ):
+        # arrange
+        validation_service = ValidationService()
+        mock_request = flask.Request.from_values(json={"survey_type": survey_type})
+
+        # act
+        with pytest.raises(RequestError) as err:
+            validation_service.validate_request_values_are_not_empty(mock_request)
+
+        # assert
+        error_message = (
+            "Invalid values in request: ['survey_type'] must be a string "
+            "or a list of strings"
+        )
+        assert err.value.args[0] == error_message
+        assert (
+            "root",
+            40,
+            error_message,
+        ) in caplog.record_tuples
@@ -0,0 +1,212 @@
+import pytest
+import sqlalchemy
+
+from models.copy_cases_configuration_model import CopyCasesConfigurationModel
+from models.work_item_model import WorkItemModel
+from services.work_queue import (
+    InMemoryWorkQueue,
+    MysqlWorkQueue,
+    SqliteWorkQueue,
+    get_work_queue,
+)
+from utilities.custom_exceptions import ConfigError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture(params=["memory", "sqlite", "mysql"])
+def work_queue(request, tmp_path, clock):
+    if request.param == "mysql":
+        # the queue is built from SQLAlchemy Core, so SQLite can stand in for MySQL
+        return MysqlWorkQueue(
+            sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'work_queue.db'}"),
+            visibility_timeout_seconds=60,
+            clock=clock,
+        )
+    if request.param == "sqlite":
+        return SqliteWorkQueue(
+            str(tmp_path / "work_queue.sqlite3"),
+            visibility_timeout_seconds=60,
+            clock=clock,
+        )
+    return InMemoryWorkQueue(visibility_timeout_seconds=60, clock=clock)
+
+
+class TestWorkQueue:
+
+    def test_enqueue_skips_questionnaires_that_are_already_queued(self, work_queue):
+        # arrange
+        work_queue.enqueue([WorkItemModel("FRS2504A")])
+
+        # act
+        enqueued_count = work_queue.enqueue(
+            [WorkItemModel("FRS2504A"), WorkItemModel("FRS2505A")]
+        )
+
+        # assert
+        assert enqueued_count == 1
+        assert work_queue.pending_count() == 2
+
+    def test_claim_returns_items_in_order_and_hides_them_from_other_workers(
+        self, work_queue, clock
+    ):
+        # arrange
+        work_queue.enqueue([WorkItemModel("FRS2504A")])
+        clock.now += 1
+        work_queue.enqueue([WorkItemModel("FRS2505A")])
+
+        # act
+        first_item = work_queue.claim()
+        second_item = work_queue.claim()
+        third_item = work_queue.claim()
+
+        # assert
+        assert first_item == WorkItemModel("FRS2504A", deliveries=1)
+        assert second_item == WorkItemModel("FRS2505A", deliveries=1)
+        assert third_item is None
+
+    def test_claim_redelivers_an_item_that_was_never_acknowledged(
+        self, work_queue, clock
+    ):
+        # arrange
+        work_queue.enqueue([WorkItemModel("FRS2504A")])
+        work_queue.claim()
+        clock.now += 61
+
+        # act
+        item = work_queue.claim()
+
+        # assert
+        assert item == WorkItemModel("FRS2504A", deliveries=2)
+
+    def test_acknowledge_removes_the_item(self, work_queue):
+        # arrange
+        work_queue.enqueue([WorkItemModel("FRS2504A")])
+        item = work_queue.claim()
+
+        # act
+        work_queue.acknowledge(item)
+
+        # assert
+        assert work_queue.pending_count() == 0
+        assert work_queue.claim() is None
+
+    def test_release_puts_the_item_behind_the_others(self, work_queue, clock):
+        # arrange
+        work_queue.enqueue([WorkItemModel("FRS2504A"), WorkItemModel("FRS2505A")])
+        item = work_queue.claim()
+        clock.now += 1
+
+        # act
+        work_queue.release(item)
+
+        # assert
+        assert work_queue.claim().questionnaire_name == "FRS2505A"
+        assert work_queue.claim() == WorkItemModel("FRS2504A", deliveries=2)
+
+    def test_dead_letter_removes_the_item_and_keeps_it_apart(self, work_queue):
+        # arrange
+        work_queue.enqueue([WorkItemModel("FRS2504A"), WorkItemModel("FRS2505A")])
+        item = work_queue.claim()
+
+        # act
+        work_queue.dead_letter(item, "Still locked")
+
+        # assert
+        assert work_queue.pending_count() == 1
+        assert work_queue.dead_letter_count() == 1
+        assert work_queue.claim().questionnaire_name == "FRS2505A"
+        assert work_queue.claim() is None
+
+
+class TestSqliteWorkQueue:
+
+    def test_the_queue_is_shared_by_every_instance_using_the_file(self, tmp_path):
+        # arrange
+        database_path = str(tmp_path / "work_queue.sqlite3")
+        SqliteWorkQueue(database_path).enqueue([WorkItemModel("FRS2504A")])
+
+        # act
+        item = SqliteWorkQueue(database_path).claim()
+
+        # assert
+        assert item.questionnaire_name == "FRS2504A"
+
+
+class TestMysqlWorkQueue:
+
+    def test_the_queue_is_shared_by_every_instance_using_the_database(self, tmp_path):
+        # arrange
+        database = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'work_queue.db'}")
+        MysqlWorkQueue(database).enqueue([WorkItemModel("FRS2504A")])
+
+        # act
+        item = MysqlWorkQueue(database).claim()
+
+        # assert
+        assert item.questionnaire_name == "FRS2504A"
+
+
+class TestGetWorkQueue:
+
+    def test_get_work_queue_reuses_the_mysql_queue_for_the_same_database(
+        self, tmp_path
+    ):
+        # arrange
+        database = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'work_queue.db'}")
+
+        # act
+        mysql_work_queue = get_work_queue(CopyCasesConfigurationModel(), database)
+
+        # assert
+        assert isinstance(mysql_work_queue, MysqlWorkQueue)
+        assert get_work_queue(CopyCasesConfigurationModel(), database) is (
+            mysql_work_queue
+        )
+
+    def test_get_work_queue_reuses_the_queue_for_the_same_configuration(self, tmp_path):
+        # arrange
+        sqlite_configuration = CopyCasesConfigurationModel(
+            work_queue="sqlite",
+            work_queue_path=str(tmp_path / "work_queue.sqlite3"),
+            work_queue_shared=True,
+        )
+
+        # act
+        sqlite_work_queue = get_work_queue(sqlite_configuration)
+
+        # assert
+        assert isinstance(sqlite_work_queue, SqliteWorkQueue)
+        assert get_work_queue(sqlite_configuration) is sqlite_work_queue
+
+    def test_get_work_queue_raises_config_error_for_an_unknown_queue(self):
+        # act & assert
+        with pytest.raises(ConfigError) as err:
+            get_work_queue(CopyCasesConfigurationModel(work_queue="memory"))
+
+        assert "COPY_CASES_WORK_QUEUE must be one of" in str(err.value)
+
+    def test_get_work_queue_raises_config_error_when_the_sqlite_file_is_not_shared(
+        self, tmp_path
+    ):
+        # act & assert
+        with pytest.raises(ConfigError) as err:
+            get_work_queue(
+                CopyCasesConfigurationModel(
+                    work_queue="sqlite",
+                    work_queue_path=str(tmp_path / "work_queue.sqlite3"),
+                )
+            )
+
+        assert "COPY_CASES_WORK_QUEUE_SHARED must be true" in str(err.value)
@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+
+from main import copy_cases_response
+from models.copy_cases_result_model import CopyCasesResultModel
+from models.copy_plan_model import CopyPlanModel
+from models.questionnaire_copy_result_model import QuestionnaireCopyResultModel
+from models.row_count_model import RowCountModel
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestMain:
+
+    def test_importing_main_does_not_load_database_rest_or_logging_libraries(self):
+        # arrange
+        heavy_modules = [
+            "sqlalchemy",
+            "pymysql",
+            "blaise_restapi",
+            "flask",
+            "google.cloud.logging",
+            "tracemalloc",
+            "utilities.profiling",
+        ]
+
+        # act
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, main; "
+                f"print([m for m in {heavy_modules!r} if m in sys.modules])",
+            ],
+            cwd=REPOSITORY_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        # assert
+        assert completed.stdout.strip() == "[]"
+
+    def test_copy_cases_response_returns_the_per_questionnaire_results_when_a_questionnaire_fails(
+        self,
+    ):
+        # arrange
+        copy_cases_result = CopyCasesResultModel(
+            ["FRS"],
+            CopyPlanModel(["FRS2504A", "FRS2505A"], [], []),
+            [
+                QuestionnaireCopyResultModel(
+                    "FRS2504A",
+                    QuestionnaireCopyResultModel.COPIED,
+                    row_counts=RowCountModel(4, inserted=2, updated=1),
+                    duration_ms=12.5,
+                ),
+                QuestionnaireCopyResultModel(
+                    "FRS2505A",
+                    QuestionnaireCopyResultModel.FAILED,
+                    "Deadlock found",
+                    attempts=3,
+                    retryable=True,
+                    duration_ms=40.0,
+                ),
+            ],
+            duration_ms=60.0,
+        )
+
+        # act
+        response, status_code = copy_cases_response(copy_cases_result)
+
+        # assert
+        assert status_code == 500
+        assert response["message"] == (
+            "Error copying cases to edit for questionnaires: ['FRS2505A']"
+        )
+        assert response["questionnaires"][1] == {
+            "questionnaire_name": "FRS2505A",
+            "status": "failed",
+            "rows_affected": 0,
+            "rows_inserted": None,
+            "rows_updated": None,
+            "attempts": 3,
+            "retryable": True,
+            "duration_ms": 40.0,
+            "error": "Deadlock found",
+        }
+        assert response["totals"] == {
+            "questionnaires": 2,
+            "copied": 1,
+            "missing_edit_table": 0,
+            "missing_questionnaire_table": 0,
+            "failed": 1,
+            "locked": 0,
+            "rows_affected": 4,
+            "rows_inserted": 2,
+            "rows_updated": 1,
+            "duration_ms": 60.0,
+        }
@@ -0,0 +1,123 @@
+import pytest
+
+from models.copy_statistics_model import CopyStatisticsModel
+from utilities.copy_cost_model import CopyCostModel
+
+
+class TestCopyCostModel:
+
+    @pytest.fixture()
+    def copy_cost_model(self) -> CopyCostModel:
+        return CopyCostModel(chunk_size=1000, change_window_seconds=100000)
+
+    def test_estimate_changed_rows_counts_every_row_when_there_is_no_previous_run(
+        self, copy_cost_model
+    ):
+        # arrange
+        statistics = CopyStatisticsModel(questionnaire_rows=500, edited_rows=0)
+
+        # act
+        result = copy_cost_model.estimate_changed_rows(statistics)
+
+        # assert
+        assert result == 500
+
+    def test_estimate_changed_rows_is_zero_when_the_table_has_not_changed_since_the_last_run(
+        self, copy_cost_model
+    ):
+        # arrange
+        statistics = CopyStatisticsModel(
+            questionnaire_rows=500,
+            edited_rows=0,
+            seconds_since_last_run=3600,
+            seconds_since_questionnaire_update=7200,
+        )
+
+        # act
+        result = copy_cost_model.estimate_changed_rows(statistics)
+
+        # assert
+        assert result == 0
+
+    def test_estimate_changed_rows_scales_with_the_time_since_the_last_run(
+        self, copy_cost_model
+    ):
+        # arrange
+        statistics = CopyStatisticsModel(
+            questionnaire_rows=500,
+            edited_rows=0,
+            seconds_since_last_run=10000,
+            seconds_since_questionnaire_update=60,
+        )
+
+        # act
+        result = copy_cost_model.estimate_changed_rows(statistics)
+
+        # assert
+        assert result == 50
+
+    def test_estimate_costs_leaves_out_incremental_without_a_watermark(
+        self, copy_cost_model
+    ):
+        # arrange
+        statistics = CopyStatisticsModel(
+            questionnaire_rows=500, edited_rows=0, seconds_since_last_run=60
+        )
+
+        # act
+        result = copy_cost_model.estimate_costs(statistics)
+
+        # assert
+        assert [estimate.strategy for estimate in result] == ["full", "chunked"]
+
+    @pytest.mark.parametrize(
+        "statistics, expected_strategy",
+        [
+            (CopyStatisticsModel(questionnaire_rows=0, edited_rows=0), "full"),
+            (CopyStatisticsModel(questionnaire_rows=500, edited_rows=20), "full"),
+            (CopyStatisticsModel(questionnaire_rows=200000, edited_rows=0), "chunked"),
+            (
+                CopyStatisticsModel(
+                    questionnaire_rows=200000,
+                    edited_rows=0,
+                    seconds_since_last_run=600,
+                    seconds_since_questionnaire_update=60,
+                ),
+                "chunked",
+            ),
+            (
+                CopyStatisticsModel(
+                    questionnaire_rows=200000,
+                    edited_rows=0,
+                    seconds_since_last_run=600,
+                    seconds_since_questionnaire_update=60,
+                    watermark_available=True,
+                ),
+                "incremental",
+            ),
+        ],
+    )
+    def test_choose_strategy_picks_the_cheapest_strategy(
+        self, copy_cost_model, statistics, expected_strategy
+    ):
+        # act
+        result = copy_cost_model.choose_strategy(statistics)
+
+        # assert
+        assert result.strategy == expected_strategy
+        assert result.cost == min(
+            estimate.cost for estimate in copy_cost_model.estimate_costs(statistics)
+        )
+
+    def test_choose_strategy_predicts_the_unedited_rows_are_written_in_full(
+        self, copy_cost_model
+    ):
+        # arrange
+        statistics = CopyStatisticsModel(questionnaire_rows=500, edited_rows=20)
+
+        # act
+        result = copy_cost_model.choose_strategy(statistics)
+
+        # assert
+        assert result.rows_written == 480
+        assert result.to_dict()["strategy"] == "full"
@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+from utilities.event_loop import get_event_loop, run_coroutine
+
+
+class TestEventLoop:
+
+    def test_run_coroutine_returns_the_result_of_the_coroutine(self):
+        # arrange
+        async def add(first, second):
+            await asyncio.sleep(0)
+            return first + second
+
+        # act
+        actual_result = run_coroutine(add(1, 2))
+
+        # assert
+        assert actual_result == 3
+
+    def test_run_coroutine_uses_the_same_background_loop_on_every_call(self):
+        # arrange
+        async def current_loop_and_thread():
+            return asyncio.get_running_loop(), threading.current_thread()
+
+        # act
+        first_loop, first_thread = run_coroutine(current_loop_and_thread())
+        second_loop, second_thread = run_coroutine(current_loop_and_thread())
+
+        # assert
+        assert first_loop is second_loop is get_event_loop()
+        assert first_thread is second_thread
+        assert first_thread is not threading.current_thread()
@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+from utilities.logging import log_stage
+
+
+class TestLogStage:
+
+    def test_log_stage_logs_the_duration_and_added_fields(self, caplog):
+        # act
+        with caplog.at_level(logging.INFO):
+            with log_stage("copy_questionnaire", questionnaire_name="FRS2504A") as (
+                stage_fields
+            ):
+                stage_fields["rows_affected"] = 12
+
+        # assert
+        record = caplog.records[-1]
+        assert record.message.startswith("Stage 'copy_questionnaire' took ")
+        assert record.json_fields["stage"] == "copy_questionnaire"
+        assert record.json_fields["questionnaire_name"] == "FRS2504A"
+        assert record.json_fields["rows_affected"] == 12
+        assert record.json_fields["outcome"] == "success"
+        assert record.json_fields["duration_ms"] >= 0
+
+    def test_log_stage_logs_an_error_outcome_and_reraises(self, caplog):
+        # act
+        with caplog.at_level(logging.INFO):
+            with pytest.raises(ValueError):
+                with log_stage("questionnaire_fetch"):
+                    raise ValueError("REST API unavailable")
+
+        # assert
+        assert caplog.records[-1].json_fields["outcome"] == "error"
@@ -0,0 +1,56 @@
+import pytest
+
+from utilities.lru_cache import LruCache
+
+
+class TestLruCache:
+
+    def test_set_drops_the_least_recently_used_entry_when_full(self):
+        # arrange
+        cache_under_test = LruCache(2)
+        cache_under_test.set("FRS2504A", 1)
+        cache_under_test.set("LMS2504A", 2)
+        cache_under_test.get("FRS2504A")
+
+        # act
+        cache_under_test.set("OPN2504A", 3)
+
+        # assert
+        assert cache_under_test.get("LMS2504A") is None
+        assert cache_under_test.get("FRS2504A") == 1
+        assert cache_under_test.get("OPN2504A") == 3
+        assert len(cache_under_test) == 2
+
+    def test_get_or_create_only_creates_a_missing_value(self):
+        # arrange
+        cache_under_test = LruCache(2)
+        created = []
+
+        def create():
+            created.append("FRS2504A")
+            return "statement"
+
+        # act
+        first_result = cache_under_test.get_or_create("FRS2504A", create)
+        second_result = cache_under_test.get_or_create("FRS2504A", create)
+
+        # assert
+        assert first_result == second_result == "statement"
+        assert created == ["FRS2504A"]
+
+    def test_invalidate_without_a_key_clears_every_entry(self):
+        # arrange
+        cache_under_test = LruCache(2)
+        cache_under_test.set("FRS2504A", 1)
+        cache_under_test.set("LMS2504A", 2)
+
+        # act
+        cache_under_test.invalidate()
+
+        # assert
+        assert len(cache_under_test) == 0
+
+    def test_max_size_must_be_at_least_one(self):
+        # act & assert
+        with pytest.raises(ValueError):
+            LruCache(0)
@@ -0,0 +1,178 @@
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from utilities.metrics import log_metrics, metrics, MetricsRegistry, record_invocation
+
+
+class TestMetricsRegistry:
+
+    @pytest.fixture()
+    def mock_exporter(self) -> Mock:
+        return Mock()
+
+    @pytest.fixture()
+    def registry_under_test(self, mock_exporter) -> MetricsRegistry:
+        return MetricsRegistry(mock_exporter)
+
+    def test_increment_adds_up_counters_with_the_same_labels(self, registry_under_test):
+        # act
+        registry_under_test.increment("questionnaire_copies", status="copied")
+        registry_under_test.increment("questionnaire_copies", 2, status="copied")
+        registry_under_test.increment("questionnaire_copies", status="failed")
+
+        # assert
+        assert registry_under_test.snapshot()["counters"] == [
+            {
+                "name": "questionnaire_copies",
+                "labels": {"status": "copied"},
+                "value": 3,
+            },
+            {
+                "name": "questionnaire_copies",
+                "labels": {"status": "failed"},
+                "value": 1,
+            },
+        ]
+
+    def test_set_gauge_keeps_the_latest_value(self, registry_under_test):
+        # act
+        registry_under_test.set_gauge("copy_plan_questionnaires", 4)
+        registry_under_test.set_gauge("copy_plan_questionnaires", 2)
+
+        # assert
+        assert registry_under_test.snapshot()["gauges"] == [
+            {"name": "copy_plan_questionnaires", "labels": {}, "value": 2}
+        ]
+
+    def test_observe_counts_values_into_fixed_buckets(self, registry_under_test):
+        # act
+        for value in (5, 10, 11, 250):
+            registry_under_test.observe(
+                "questionnaire_copy_duration_ms", value, buckets=(10, 100)
+            )
+
+        # assert
+        assert registry_under_test.snapshot()["histograms"][0]["value"] == {
+            "buckets": {"10": 2, "100": 1, "+Inf": 1},
+            "count": 4,
+            "sum": 276,
+        }
+
+    def test_flush_exports_everything_once_and_starts_again(
+        self, registry_under_test, mock_exporter
+    ):
+        # arrange
+        registry_under_test.increment("rows_copied", 10)
+
+        # act
+        registry_under_test.flush()
+        registry_under_test.flush()
+
+        # assert
+        mock_exporter.assert_called_once()
+        assert mock_exporter.call_args.args[0]["counters"] == [
+            {"name": "rows_copied", "labels": {}, "value": 10}
+        ]
+        assert registry_under_test.snapshot() == {
+            "counters": [],
+            "gauges": [],
+            "histograms": [],
+        }
+
+    def test_flush_does_not_raise_when_the_exporter_fails(
+        self, registry_under_test, mock_exporter, caplog
+    ):
+        # arrange
+        mock_exporter.side_effect = Exception("exporter unavailable")
+        registry_under_test.increment("rows_copied", 10)
+
+        # act
+        registry_under_test.flush()
+
+        # assert
+        assert "Could not export metrics: exporter unavailable" in caplog.text
+
+    def test_increment_is_safe_from_concurrent_threads(self, registry_under_test):
+        # arrange
+        def increment_many():
+            for _ in range(1000):
+                registry_under_test.increment("rows_copied")
+
+        threads = [threading.Thread(target=increment_many) for _ in range(8)]
+
+        # act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # assert
+        assert registry_under_test.snapshot()["counters"][0]["value"] == 8000
+
+    def test_record_invocation_counts_the_status_code_and_flushes(self):
+        # arrange
+        mock_exporter = Mock()
+        copy_cases_to_edit = record_invocation("copy_cases_to_edit")(
+            lambda request: ("Successfully copied cases to edit", 200)
+        )
+        metrics.reset()
+        metrics.set_exporter(mock_exporter)
+
+        # act
+        try:
+            result = copy_cases_to_edit(Mock())
+        finally:
+            metrics.set_exporter(log_metrics)
+
+        # assert
+        assert result == ("Successfully copied cases to edit", 200)
+        exported_metrics = mock_exporter.call_args.args[0]
+        assert exported_metrics["counters"] == [
+            {
+                "name": "invocations",
+                "labels": {"function": "copy_cases_to_edit", "status_code": "200"},
+                "value": 1,
+            }
+        ]
+        assert exported_metrics["histograms"][0]["name"] == "invocation_duration_ms"
+
+    def test_record_invocation_flushes_only_each_invocations_own_metrics(self):
+        # arrange
+        mock_exporter = Mock()
+        both_started = threading.Barrier(2)
+
+        def copy_cases(survey_type):
+            metrics.increment("questionnaire_copies", survey_type=survey_type)
+            both_started.wait(timeout=5)
+            return "Successfully copied cases to edit", 200
+
+        copy_cases_to_edit = record_invocation("copy_cases_to_edit")(copy_cases)
+        metrics.set_exporter(mock_exporter)
+        threads = [
+            threading.Thread(target=copy_cases_to_edit, args=(survey_type,))
+            for survey_type in ("FRS", "LCF")
+        ]
+
+        # act
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            metrics.set_exporter(log_metrics)
+
+        # assert
+        assert mock_exporter.call_count == 2
+        exported_survey_types = sorted(
+            tuple(
+                counter["labels"]["survey_type"]
+                for counter in call.args[0]["counters"]
+                if counter["name"] == "questionnaire_copies"
+            )
+            for call in mock_exporter.call_args_list
+        )
+        assert exported_survey_types == [("FRS",), ("LCF",)]
+        assert metrics.snapshot()["counters"] == []
@@ -0,0 +1,99 @@
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+
+from utilities.profiling import StackSampler, profile
+
+
+def allocate_rows():
+    return [{"Serial_Number": serial_number} for serial_number in range(20000)]
+
+
+class TestStackSampler:
+
+    def test_sample_counts_the_stacks_of_other_threads(self):
+        # arrange
+        sampler = StackSampler()
+        started = threading.Event()
+        finished = threading.Event()
+
+        def work_in_worker():
+            started.set()
+            while not finished.is_set():
+                pass
+
+        worker = threading.Thread(target=work_in_worker)
+        worker.start()
+        started.wait()
+
+        # act
+        sampler.sample()
+        finished.set()
+        worker.join()
+
+        # assert
+        assert sampler.sample_count >= 1
+        assert any(
+            StackSampler.format_frame_key(frame_key).endswith("(work_in_worker)")
+            for frame_key in sampler.total_samples
+        )
+        assert sampler.get_hot_functions(top_count=1)[0]["self_samples"] >= 1
+
+    def test_sample_skips_threads_parked_in_a_wait(self):
+        # arrange
+        sampler = StackSampler()
+        started = threading.Event()
+        finished = threading.Event()
+
+        def wait_in_worker():
+            started.set()
+            finished.wait()
+
+        worker = threading.Thread(target=wait_in_worker)
+        worker.start()
+        started.wait()
+        while not StackSampler.is_waiting(sys._current_frames()[worker.ident]):
+            time.sleep(0.001)
+
+        # act
+        sampler.sample()
+        finished.set()
+        worker.join()
+
+        # assert
+        assert not any(
+            StackSampler.format_frame_key(frame_key).endswith("(wait_in_worker)")
+            for frame_key in sampler.total_samples
+        )
+
+
+class TestProfile:
+
+    def test_profile_logs_hot_functions_and_top_allocations(self, caplog):
+        # act
+        with caplog.at_level(logging.INFO):
+            with profile("copy_cases_to_edit", top_count=3):
+                rows = allocate_rows()
+
+        # assert
+        record = caplog.records[-1]
+        assert record.message.startswith("Profile of 'copy_cases_to_edit' over ")
+        assert record.json_fields["stage"] == "profile"
+        assert record.json_fields["profiled"] == "copy_cases_to_edit"
+        assert record.json_fields["peak_memory_kb"] > 0
+        assert len(record.json_fields["top_allocations"]) <= 3
+        assert any(
+            "test_profiling.py" in allocation["location"]
+            for allocation in record.json_fields["top_allocations"]
+        )
+        assert len(rows) == 20000
+
+    def test_profile_leaves_tracemalloc_as_it_found_it(self):
+        # act
+        with profile("copy_cases_to_edit"):
+            pass
+
+        # assert
+        assert tracemalloc.is_tracing() is False
@@ -0,0 +1,70 @@
+import pytest
+
+from utilities.questionnaire_index import QuestionnaireIndex
+
+
+class TestQuestionnaireIndex:
+
+    @pytest.fixture()
+    def index_under_test(self) -> QuestionnaireIndex:
+        return QuestionnaireIndex(
+            [
+                {"name": "LCF2505A", "id": "4568"},
+                {"name": "FRS2505A_EDIT", "id": "2345"},
+                {"name": "FRS2504A", "id": "1232"},
+                {"name": "LCF2504A_EDIT", "id": "3457"},
+                {"name": "FRS2505A", "id": "2344"},
+                {"name": "FRS2504A_EDIT", "id": "1233"},
+                {"name": "LCF2504A", "id": "3456"},
+            ]
+        )
+
+    @pytest.mark.parametrize(
+        "prefix,expected_names",
+        [
+            ("FRS", ["FRS2504A", "FRS2505A"]),
+            ("FRS2505A", ["FRS2505A"]),
+            ("LCF", ["LCF2504A", "LCF2505A"]),
+            ("OPN", []),
+        ],
+    )
+    def test_find_by_prefix_returns_main_questionnaires_in_name_order(
+        self, prefix, expected_names, index_under_test
+    ):
+        # act
+        result = index_under_test.find_by_prefix(prefix)
+
+        # assert
+        assert [questionnaire["name"] for questionnaire in result] == expected_names
+
+    def test_resolve_combines_survey_types_without_duplicates(self, index_under_test):
+        # act
+        result = index_under_test.resolve(["LCF2504A", "FRS", "FRS2504A", "LCF"])
+
+        # assert
+        assert [questionnaire["name"] for questionnaire in result] == [
+            "FRS2504A",
+            "FRS2505A",
+            "LCF2504A",
+            "LCF2505A",
+        ]
+
+    @pytest.mark.parametrize(
+        "questionnaire_name,expected_edit_questionnaire_name",
+        [
+            ("FRS2504A", "FRS2504A_EDIT"),
+            ("LCF2504A", "LCF2504A_EDIT"),
+            ("LCF2505A", None),
+        ],
+    )
+    def test_get_edit_questionnaire_name_pairs_a_questionnaire_with_its_edit_questionnaire(
+        self,
+        questionnaire_name,
+        expected_edit_questionnaire_name,
+        index_under_test,
+    ):
+        # act
+        result = index_under_test.get_edit_questionnaire_name(questionnaire_name)
+
+        # assert
+        assert result == expected_edit_questionnaire_name
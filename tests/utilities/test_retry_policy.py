@@ -0,0 +1,137 @@
+import asyncio
+from unittest.mock import Mock
+
+import pymysql
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from utilities.retry_policy import RetryExhaustedError, RetryPolicy
+
+
+def lock_error(error_code: int) -> OperationalError:
+    return OperationalError(
+        "INSERT INTO ...", {}, pymysql.err.OperationalError(error_code, "lock error")
+    )
+
+
+class TestRetryPolicy:
+
+    @pytest.fixture()
+    def mock_sleep(self):
+        return Mock()
+
+    @pytest.fixture()
+    def retry_policy(self, mock_sleep) -> RetryPolicy:
+        return RetryPolicy(
+            max_attempts=3,
+            base_delay_seconds=0.1,
+            max_delay_seconds=0.3,
+            sleep=mock_sleep,
+            random_fraction=lambda: 0.5,
+        )
+
+    @pytest.mark.parametrize(
+        "error,expected_result",
+        [
+            (lock_error(1213), True),
+            (lock_error(1205), True),
+            (lock_error(1146), False),
+            (ValueError("not a database error"), False),
+            (Exception(), False),
+            (RetryExhaustedError("FRS2504A", 3, lock_error(1213)), True),
+        ],
+    )
+    def test_is_retryable_only_accepts_deadlocks_and_lock_wait_timeouts(
+        self, error, expected_result
+    ):
+        # act
+        result = RetryPolicy.is_retryable(error)
+
+        # assert
+        assert result is expected_result
+
+    def test_get_delay_seconds_backs_off_exponentially_up_to_the_maximum(
+        self, retry_policy
+    ):
+        # act
+        delays = [retry_policy.get_delay_seconds(attempt) for attempt in (1, 2, 3)]
+
+        # assert
+        assert delays == pytest.approx([0.05, 0.1, 0.15])
+
+    def test_call_retries_lock_conflicts_and_returns_the_attempts_taken(
+        self, retry_policy, mock_sleep
+    ):
+        # arrange
+        unit = Mock(side_effect=[lock_error(1213), lock_error(1205), "copied"])
+
+        # act
+        result, attempts = retry_policy.call("FRS2504A", unit)
+
+        # assert
+        assert result == "copied"
+        assert attempts == 3
+        assert mock_sleep.call_count == 2
+
+    def test_call_raises_with_the_attempts_taken_once_attempts_run_out(
+        self, retry_policy
+    ):
+        # arrange
+        unit = Mock(side_effect=lock_error(1213))
+
+        # act
+        with pytest.raises(RetryExhaustedError) as err:
+            retry_policy.call("FRS2504A", unit)
+
+        # assert
+        assert unit.call_count == 3
+        assert err.value.attempts == 3
+        assert isinstance(err.value.__cause__, OperationalError)
+        assert str(err.value) == str(err.value.__cause__)
+
+    def test_call_does_not_retry_an_error_a_nested_call_already_gave_up_on(
+        self, retry_policy
+    ):
+        # arrange
+        unit = Mock(side_effect=lock_error(1213))
+
+        # act
+        with pytest.raises(RetryExhaustedError) as err:
+            retry_policy.call(
+                "FRS2504A", lambda: retry_policy.call("FRS2504A after 2", unit)
+            )
+
+        # assert
+        assert unit.call_count == 3
+        assert err.value.attempts == 3
+
+    def test_call_does_not_retry_other_errors(self, retry_policy, mock_sleep):
+        # arrange
+        unit = Mock(side_effect=lock_error(1146))
+
+        # act
+        with pytest.raises(RetryExhaustedError) as err:
+            retry_policy.call("FRS2504A", unit)
+
+        # assert
+        assert unit.call_count == 1
+        assert err.value.attempts == 1
+        assert mock_sleep.call_count == 0
+
+    def test_call_async_retries_lock_conflicts(self):
+        # arrange
+        retry_policy = RetryPolicy(max_attempts=2, base_delay_seconds=0)
+        outcomes = [lock_error(1213), "copied"]
+
+        async def unit():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        # act
+        result, attempts = asyncio.run(retry_policy.call_async("FRS2504A", unit))
+
+        # assert
+        assert result == "copied"
+        assert attempts == 2
@@ -0,0 +1,39 @@
+from models.table_schema_model import TableSchemaModel
+from utilities.table_schema_cache import TableSchemaCache
+
+
+class TestTableSchemaCache:
+
+    def test_get_returns_the_schema_while_the_fingerprint_matches(self):
+        # arrange
+        cache = TableSchemaCache()
+        table_schema = TableSchemaModel("FRS2504A_Form", "1:111", ["Serial_Number"], [])
+        cache.set(table_schema)
+
+        # act
+        result = cache.get("FRS2504A_Form", "1:111")
+
+        # assert
+        assert result is table_schema
+
+    def test_get_returns_none_when_the_fingerprint_has_changed(self):
+        # arrange
+        cache = TableSchemaCache()
+        cache.set(TableSchemaModel("FRS2504A_Form", "1:111", ["Serial_Number"], []))
+
+        # act
+        result = cache.get("FRS2504A_Form", "2:222")
+
+        # assert
+        assert result is None
+
+    def test_invalidate_removes_the_schema(self):
+        # arrange
+        cache = TableSchemaCache()
+        cache.set(TableSchemaModel("FRS2504A_Form", "1:111", ["Serial_Number"], []))
+
+        # act
+        cache.invalidate("FRS2504A_Form")
+
+        # assert
+        assert cache.get("FRS2504A_Form", "1:111") is None
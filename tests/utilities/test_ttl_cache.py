@@ -0,0 +1,63 @@
+import pytest
+
+from utilities.ttl_cache import TtlCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTtlCache:
+
+    @pytest.fixture()
+    def clock(self) -> FakeClock:
+        return FakeClock()
+
+    @pytest.fixture()
+    def cache_under_test(self, clock) -> TtlCache:
+        return TtlCache(clock)
+
+    def test_get_returns_the_value_before_it_expires(self, cache_under_test, clock):
+        # arrange
+        cache_under_test.set("gusty", ["FRS2504A"], 60)
+        clock.now = 59
+
+        # act
+        result = cache_under_test.get("gusty")
+
+        # assert
+        assert result == ["FRS2504A"]
+
+    def test_get_returns_none_once_the_value_has_expired(self, cache_under_test, clock):
+        # arrange
+        cache_under_test.set("gusty", ["FRS2504A"], 60)
+        clock.now = 60
+
+        # act
+        result = cache_under_test.get("gusty")
+
+        # assert
+        assert result is None
+
+    def test_set_does_not_cache_when_the_ttl_is_zero(self, cache_under_test):
+        # act
+        cache_under_test.set("gusty", ["FRS2504A"], 0)
+
+        # assert
+        assert cache_under_test.get("gusty") is None
+
+    def test_invalidate_removes_only_the_given_key(self, cache_under_test):
+        # arrange
+        cache_under_test.set("gusty", ["FRS2504A"], 60)
+        cache_under_test.set("cma", ["LMS2101_AA1"], 60)
+
+        # act
+        cache_under_test.invalidate("gusty")
+
+        # assert
+        assert cache_under_test.get("gusty") is None
+        assert cache_under_test.get("cma") == ["LMS2101_AA1"]
@@ -0,0 +1,125 @@
+import math
+from typing import List
+
+from models.copy_cases_configuration_model import CopyMode
+from models.copy_cost_estimate_model import CopyCostEstimateModel
+from models.copy_statistics_model import CopyStatisticsModel
+
+
+class CopyCostModel:
+    """Predicts what each copy strategy would cost a questionnaire and picks the cheapest.
+
+    A cost is the rows read, plus each row written times write_weight, plus each
+    statement times statement_weight. A transaction that would hold more than
+    chunk_size rows locked is charged lock_weight per extra row, which is what
+    makes chunking pay off on big tables. The weights are a starting point, to be
+    tuned against the predicted and actual figures logged for each copy.
+
+    The hashed strategy is not a candidate. The other strategies rewrite cases
+    without updating their row hashes, so a hashed copy after them could skip a
+    case that changed and then changed back.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        write_weight: float = 4.0,
+        statement_weight: float = 50.0,
+        lock_weight: float = 1.0,
+        change_window_seconds: int = 7 * 24 * 60 * 60,
+    ) -> None:
+        self.chunk_size = chunk_size
+        self.write_weight = write_weight
+        self.statement_weight = statement_weight
+        self.lock_weight = lock_weight
+        self.change_window_seconds = change_window_seconds
+
+    def estimate_changed_rows(self, statistics: CopyStatisticsModel) -> int:
+        """Guesses how many cases changed since the questionnaire was last copied.
+
+        With no record of a previous run every case counts as changed. If the
+        table has not been written to since then, none have. Otherwise cases are
+        assumed to change evenly over change_window_seconds.
+        """
+        questionnaire_rows = statistics.questionnaire_rows
+        if statistics.seconds_since_last_run is None:
+            return questionnaire_rows
+        if (
+            statistics.seconds_since_questionnaire_update is not None
+            and statistics.seconds_since_questionnaire_update
+            >= statistics.seconds_since_last_run
+        ):
+            return 0
+        return math.ceil(
+            questionnaire_rows
+            * min(1.0, statistics.seconds_since_last_run / self.change_window_seconds)
+        )
+
+    def estimate_costs(
+        self, statistics: CopyStatisticsModel
+    ) -> List[CopyCostEstimateModel]:
+        questionnaire_rows = statistics.questionnaire_rows
+        edited_rows = min(statistics.edited_rows, questionnaire_rows)
+        unedited_fraction = (
+            1 - edited_rows / questionnaire_rows if questionnaire_rows else 1.0
+        )
+        writable_rows = questionnaire_rows - edited_rows
+        changed_writable_rows = math.ceil(
+            self.estimate_changed_rows(statistics) * unedited_fraction
+        )
+        chunk_count = max(1, math.ceil(questionnaire_rows / self.chunk_size))
+
+        # every questionnaire row is read and probes the edit table by key
+        estimates = [
+            self._estimate(
+                CopyMode.FULL,
+                rows_read=2 * questionnaire_rows,
+                rows_written=writable_rows,
+                statements=1,
+                rows_locked=writable_rows,
+            ),
+            self._estimate(
+                CopyMode.CHUNKED,
+                rows_read=2 * questionnaire_rows,
+                rows_written=writable_rows,
+                statements=2 * chunk_count,
+                rows_locked=min(writable_rows, self.chunk_size),
+            ),
+        ]
+        if (
+            statistics.watermark_available
+            and statistics.seconds_since_last_run is not None
+        ):
+            # finding the new watermark reads the whole questionnaire table
+            estimates.append(
+                self._estimate(
+                    CopyMode.INCREMENTAL,
+                    rows_read=questionnaire_rows + 2 * changed_writable_rows,
+                    rows_written=changed_writable_rows,
+                    statements=4,
+                    rows_locked=changed_writable_rows,
+                )
+            )
+        return estimates
+
+    def choose_strategy(self, statistics: CopyStatisticsModel) -> CopyCostEstimateModel:
+        # min() keeps the first of equal costs, so ties go to the simpler strategy
+        return min(self.estimate_costs(statistics), key=lambda estimate: estimate.cost)
+
+    def _estimate(
+        self,
+        strategy: str,
+        rows_read: int,
+        rows_written: int,
+        statements: int,
+        rows_locked: int,
+    ) -> CopyCostEstimateModel:
+        cost = (
+            rows_read
+            + self.write_weight * rows_written
+            + self.statement_weight * statements
+            + self.lock_weight * max(0, rows_locked - self.chunk_size)
+        )
+        return CopyCostEstimateModel(
+            strategy, rows_read, rows_written, statements, round(cost, 1)
+        )
@@ -1,13 +1,50 @@
-import inspect
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
 
-from google.cloud.logging.handlers import StructuredLogHandler
-from google.cloud.logging_v2.handlers import setup_logging
+_logger_configured = False
 
 
 def setup_logger():
+    global _logger_configured
+    if _logger_configured:
+        return
+
+    # google-cloud-logging is slow to import, so it is only loaded when needed
+    from google.cloud.logging.handlers import StructuredLogHandler
+    from google.cloud.logging_v2.handlers import setup_logging
+
     handler = StructuredLogHandler()
     setup_logging(handler)
+    _logger_configured = True
 
 
 def function_name():
-    return f"{inspect.stack()[1][3]}()"
+    return f"{sys._getframe(1).f_code.co_name}()"
+
+
+@contextmanager
+def log_stage(stage: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Times a stage of the request and logs it with structured fields.
+
+    The yielded dictionary can be updated inside the block, for example with
+    row counts, and is emitted as the log entry's json_fields.
+    """
+    stage_fields: Dict[str, Any] = {"stage": stage, **fields}
+    start_time = time.perf_counter()
+    try:
+        yield stage_fields
+        stage_fields.setdefault("outcome", "success")
+    except Exception:
+        stage_fields["outcome"] = "error"
+        raise
+    finally:
+        stage_fields["duration_ms"] = round(
+            (time.perf_counter() - start_time) * 1000, 3
+        )
+        logging.info(
+            f"Stage '{stage}' took {stage_fields['duration_ms']}ms",
+            extra={"json_fields": stage_fields},
+        )
@@ -0,0 +1,256 @@
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# upper bounds in milliseconds; anything slower lands in the overflow bucket
+DURATION_MS_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+MetricsExporter = Callable[[Dict[str, Any]], None]
+EntryPoint = TypeVar("EntryPoint", bound=Callable[..., Tuple[Any, int]])
+
+
+class Histogram:
+    """Counts observations into fixed buckets, keeping their count and sum."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        # one more than the bounds, for observations above the last one
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": {
+                **{
+                    str(bound): bucket_count
+                    for bound, bucket_count in zip(self.buckets, self.bucket_counts)
+                },
+                "+Inf": self.bucket_counts[-1],
+            },
+            "count": self.count,
+            "sum": round(self.sum, 3),
+        }
+
+
+def log_metrics(metrics: Dict[str, Any]) -> None:
+    logging.info("Metrics for invocation", extra={"json_fields": {"metrics": metrics}})
+
+
+class MetricsRegistry:
+    """Holds an invocation's counters, gauges and histograms until they are flushed.
+
+    Updates only take a lock and a dictionary lookup, so they are cheap enough
+    for the copy path and safe from the worker threads. Flushing hands everything
+    recorded since the last flush to the exporter in one go, and starts again, so
+    each invocation reports only its own metrics.
+    """
+
+    def __init__(self, exporter: MetricsExporter = log_metrics) -> None:
+        self._exporter = exporter
+        self._lock = threading.Lock()
+        self._counters: Dict[MetricKey, float] = {}
+        self._gauges: Dict[MetricKey, float] = {}
+        self._histograms: Dict[MetricKey, Histogram] = {}
+
+    def set_exporter(self, exporter: MetricsExporter) -> None:
+        self._exporter = exporter
+
+    def increment(self, name: str, amount: float = 1, **labels: Any) -> None:
+        key = self.metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = self.metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Sequence[float] = DURATION_MS_BUCKETS,
+        **labels: Any,
+    ) -> None:
+        key = self.metric_key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._collect()
+
+    def flush(self, exporter: Optional[MetricsExporter] = None) -> None:
+        """Exports the metrics recorded since the last flush, then clears them.
+
+        An exporter that fails is logged rather than raised, so reporting
+        metrics never fails the invocation itself.
+        """
+        with self._lock:
+            if not (self._counters or self._gauges or self._histograms):
+                return
+            metrics = self._collect()
+            self._clear()
+
+        try:
+            (exporter or self._exporter)(metrics)
+        except Exception as e:
+            logging.warning(f"Could not export metrics: {e}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _collect(self) -> Dict[str, Any]:
+        return {
+            "counters": self.to_entries(self._counters),
+            "gauges": self.to_entries(self._gauges),
+            "histograms": self.to_entries(
+                {
+                    key: histogram.to_dict()
+                    for key, histogram in self._histograms.items()
+                }
+            ),
+        }
+
+    def _clear(self) -> None:
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def metric_key(name: str, labels: Dict[str, Any]) -> MetricKey:
+        return name, tuple(
+            sorted((label, str(value)) for label, value in labels.items())
+        )
+
+    @staticmethod
+    def to_entries(values: Dict[MetricKey, Any]) -> List[Dict[str, Any]]:
+        return [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(values.items())
+        ]
+
+
+class InvocationMetrics:
+    """Records metrics against the registry of the invocation being handled.
+
+    An instance can handle several requests at once, so one shared registry
+    would let an invocation flush, and clear, another's metrics. Each invocation
+    gets its own registry in a context variable instead. Worker threads must run
+    in a copy of the invocation's context to record against it. Metrics recorded
+    outside an invocation go to a registry of their own.
+    """
+
+    def __init__(self, exporter: MetricsExporter = log_metrics) -> None:
+        self._exporter = exporter
+        self._default_registry = MetricsRegistry(exporter)
+        self._invocation_registry: ContextVar[Optional[MetricsRegistry]] = ContextVar(
+            "invocation_registry", default=None
+        )
+
+    @property
+    def registry(self) -> MetricsRegistry:
+        invocation_registry = self._invocation_registry.get()
+        if invocation_registry is None:
+            return self._default_registry
+        return invocation_registry
+
+    def set_exporter(self, exporter: MetricsExporter) -> None:
+        self._exporter = exporter
+        self._default_registry.set_exporter(exporter)
+
+    @contextmanager
+    def invocation(self) -> Iterator[MetricsRegistry]:
+        """Gives the code inside its own registry, and flushes it on the way out."""
+        invocation_registry = MetricsRegistry(self._exporter)
+        token = self._invocation_registry.set(invocation_registry)
+        try:
+            yield invocation_registry
+        finally:
+            self._invocation_registry.reset(token)
+            invocation_registry.flush()
+
+    def increment(self, name: str, amount: float = 1, **labels: Any) -> None:
+        self.registry.increment(name, amount, **labels)
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        self.registry.set_gauge(name, value, **labels)
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Sequence[float] = DURATION_MS_BUCKETS,
+        **labels: Any,
+    ) -> None:
+        self.registry.observe(name, value, buckets, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self.registry.snapshot()
+
+    def flush(self, exporter: Optional[MetricsExporter] = None) -> None:
+        self.registry.flush(exporter)
+
+    def reset(self) -> None:
+        self.registry.reset()
+
+
+metrics = InvocationMetrics()
+
+
+def record_invocation(function_name: str) -> Callable[[EntryPoint], EntryPoint]:
+    """Counts and times each call to a function entry point, then flushes the metrics.
+
+    Each call records into its own registry, so only its metrics are flushed. The
+    entry point must return its response and status code, as the Cloud Functions
+    here do. Anything it raises is counted with a 500 status code.
+    """
+
+    def decorator(entry_point: EntryPoint) -> EntryPoint:
+        @functools.wraps(entry_point)
+        def record(*args, **kwargs):
+            start_time = time.perf_counter()
+            status_code = 500
+            with metrics.invocation() as invocation_registry:
+                try:
+                    response, status_code = entry_point(*args, **kwargs)
+                    return response, status_code
+                finally:
+                    invocation_registry.increment(
+                        "invocations", function=function_name, status_code=status_code
+                    )
+                    invocation_registry.observe(
+                        "invocation_duration_ms",
+                        (time.perf_counter() - start_time) * 1000,
+                        function=function_name,
+                    )
+
+        return record  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,165 @@
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from types import FrameType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+FrameKey = Tuple[str, int, str]
+
+# where an idle thread is parked: a lock or condition wait, the event loop's
+# selector, or a pool worker waiting for its next task
+WAITING_FRAMES = frozenset(
+    {
+        ("threading", "wait"),
+        ("threading", "_wait_for_tstate_lock"),
+        ("selectors", "select"),
+        ("concurrent.futures.thread", "_worker"),
+    }
+)
+
+
+class StackSampler:
+    """Samples the stacks of every thread on a background thread.
+
+    Copies run on worker threads and the shared event loop as well as the
+    request thread, which cProfile would miss because it only traces the
+    thread that enabled it. The sampler's own thread and threads parked in a
+    wait are skipped, so idle pools do not drown out the work.
+    """
+
+    def __init__(self, interval_seconds: float = 0.005):
+        self.interval_seconds = interval_seconds
+        self.sample_count = 0
+        self.self_samples: Counter = Counter()
+        self.total_samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def sample(self) -> None:
+        # sample() runs on the sampler thread, which is never worth counting
+        sampler_thread_id = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == sampler_thread_id or self.is_waiting(frame):
+                continue
+            stack = self.get_stack(frame)
+            self.sample_count += 1
+            self.self_samples[stack[0]] += 1
+            # a recursive function is only counted once per sample
+            self.total_samples.update(set(stack))
+
+    def get_hot_functions(self, top_count: int) -> List[Dict[str, Any]]:
+        return [
+            {
+                "function": self.format_frame_key(frame_key),
+                "self_samples": self_samples,
+                "total_samples": self.total_samples[frame_key],
+            }
+            for frame_key, self_samples in self.self_samples.most_common(top_count)
+        ]
+
+    @staticmethod
+    def is_waiting(frame: FrameType) -> bool:
+        return (
+            frame.f_globals.get("__name__"),
+            frame.f_code.co_name,
+        ) in WAITING_FRAMES
+
+    @staticmethod
+    def get_stack(frame: Optional[FrameType]) -> List[FrameKey]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        return stack
+
+    @staticmethod
+    def format_frame_key(frame_key: FrameKey) -> str:
+        filename, line_number, function_name = frame_key
+        return f"{filename}:{line_number}({function_name})"
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            self.sample()
+
+
+def get_top_allocations(
+    start_snapshot: tracemalloc.Snapshot,
+    end_snapshot: tracemalloc.Snapshot,
+    top_count: int,
+) -> List[Dict[str, Any]]:
+    # the profiler's own bookkeeping is not what we are looking for
+    profiler_filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    statistics = end_snapshot.filter_traces(profiler_filters).compare_to(
+        start_snapshot.filter_traces(profiler_filters), "lineno"
+    )
+    return [
+        {
+            "location": str(statistic.traceback),
+            "size_diff_kb": round(statistic.size_diff / 1024, 1),
+            "count_diff": statistic.count_diff,
+        }
+        for statistic in statistics[:top_count]
+    ]
+
+
+@contextmanager
+def profile(
+    name: str, top_count: int = 20, sample_interval_milliseconds: int = 5
+) -> Iterator[None]:
+    """Profiles the block and logs its hot functions and top allocation sites.
+
+    Only used when profiling is switched on, as tracing every allocation slows
+    the copy down noticeably.
+    """
+    tracing_already = tracemalloc.is_tracing()
+    if not tracing_already:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start_snapshot = tracemalloc.take_snapshot()
+    sampler = StackSampler(sample_interval_milliseconds / 1000)
+    start_time = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        duration_ms = round((time.perf_counter() - start_time) * 1000, 3)
+        end_snapshot = tracemalloc.take_snapshot()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        if not tracing_already:
+            tracemalloc.stop()
+
+        logging.info(
+            f"Profile of '{name}' over {duration_ms}ms",
+            extra={
+                "json_fields": {
+                    "stage": "profile",
+                    "profiled": name,
+                    "duration_ms": duration_ms,
+                    "peak_memory_kb": round(peak_memory / 1024, 1),
+                    "sample_count": sampler.sample_count,
+                    "sample_interval_ms": sample_interval_milliseconds,
+                    "hot_functions": sampler.get_hot_functions(top_count),
+                    "top_allocations": get_top_allocations(
+                        start_snapshot, end_snapshot, top_count
+                    ),
+                }
+            },
+        )
@@ -0,0 +1,58 @@
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class QuestionnaireIndex:
+    """Sorted index of questionnaire names for prefix lookups.
+
+    "Main" questionnaires are kept in name order so every questionnaire starting
+    with a survey type can be found with a binary search. Each one is paired
+    with its "_EDIT" questionnaire when that is installed.
+    """
+
+    EDIT_SUFFIX = "_EDIT"
+
+    def __init__(self, questionnaires: List[Dict[str, Any]]) -> None:
+        self.questionnaires = questionnaires
+        self._questionnaires_by_name: Dict[str, Dict[str, Any]] = {}
+        edit_questionnaire_names = set()
+
+        for questionnaire in questionnaires:
+            questionnaire_name = questionnaire["name"]
+            if questionnaire_name.endswith(self.EDIT_SUFFIX):
+                edit_questionnaire_names.add(questionnaire_name)
+            else:
+                self._questionnaires_by_name[questionnaire_name] = questionnaire
+
+        self._sorted_names = sorted(self._questionnaires_by_name)
+        self._edit_questionnaire_names = {
+            questionnaire_name: f"{questionnaire_name}{self.EDIT_SUFFIX}"
+            for questionnaire_name in self._sorted_names
+            if f"{questionnaire_name}{self.EDIT_SUFFIX}" in edit_questionnaire_names
+        }
+
+    def find_by_prefix(self, prefix: str) -> List[Dict[str, Any]]:
+        matches = []
+        for position in range(
+            bisect_left(self._sorted_names, prefix), len(self._sorted_names)
+        ):
+            questionnaire_name = self._sorted_names[position]
+            if not questionnaire_name.startswith(prefix):
+                break
+            matches.append(self._questionnaires_by_name[questionnaire_name])
+        return matches
+
+    def resolve(self, survey_types: Iterable[str]) -> List[Dict[str, Any]]:
+        """Returns questionnaires matching any of the survey types, without duplicates."""
+        matched_names = {
+            questionnaire["name"]
+            for survey_type in survey_types
+            for questionnaire in self.find_by_prefix(survey_type)
+        }
+        return [
+            self._questionnaires_by_name[questionnaire_name]
+            for questionnaire_name in sorted(matched_names)
+        ]
+
+    def get_edit_questionnaire_name(self, questionnaire_name: str) -> Optional[str]:
+        return self._edit_questionnaire_names.get(questionnaire_name)
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# ER_LOCK_WAIT_TIMEOUT and ER_LOCK_DEADLOCK, both safe to retry because MySQL
+# rolls back the statement (or the whole transaction for a deadlock)
+RETRYABLE_MYSQL_ERROR_CODES = frozenset({1205, 1213})
+
+
+class RetryExhaustedError(Exception):
+    """Raised when a unit of work fails and will not be tried again.
+
+    The error from the last attempt is chained as the cause, and its message is
+    kept so copy results report the database error itself.
+    """
+
+    def __init__(self, unit_name: str, attempts: int, error: BaseException) -> None:
+        super().__init__(str(error))
+        self.unit_name = unit_name
+        self.attempts = attempts
+        self.__cause__ = error
+
+
+class RetryPolicy:
+    """Retries a unit of work that failed on a lock conflict, backing off with jitter.
+
+    Each delay is drawn between zero and an exponentially growing cap ("full
+    jitter"), so concurrent copies that collided do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_seconds: float = 0.1,
+        max_delay_seconds: float = 2.0,
+        sleep: Callable[[float], None] = time.sleep,
+        random_fraction: Callable[[], float] = random.random,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._sleep = sleep
+        self._random_fraction = random_fraction
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        if isinstance(error, RetryExhaustedError) and error.__cause__ is not None:
+            error = error.__cause__
+        # SQLAlchemy wraps the driver's error, which carries the MySQL error code
+        # as its first argument
+        driver_error = getattr(error, "orig", error)
+        error_arguments: Tuple[Any, ...] = getattr(driver_error, "args", None) or ()
+        if len(error_arguments) == 0:
+            return False
+        return error_arguments[0] in RETRYABLE_MYSQL_ERROR_CODES
+
+    @staticmethod
+    def get_attempts(error: BaseException) -> int:
+        """Returns how many attempts ended in the error, one if it was never retried."""
+        if isinstance(error, RetryExhaustedError):
+            return error.attempts
+        return 1
+
+    def get_delay_seconds(self, attempt: int) -> float:
+        delay_cap = min(
+            self.max_delay_seconds, self.base_delay_seconds * 2 ** (attempt - 1)
+        )
+        return self._random_fraction() * delay_cap
+
+    def call(self, unit_name: str, unit: Callable[[], T]) -> Tuple[T, int]:
+        """Runs the unit, retrying lock conflicts, and returns its result and attempts.
+
+        Once the attempts run out, or straight away if the error is not a lock
+        conflict, a RetryExhaustedError is raised from the last error. One raised
+        by a policy inside the unit, such as for one chunk of a chunked copy, is
+        passed on without retrying, so retries of nested units never multiply.
+        """
+        attempt = 1
+        while True:
+            try:
+                return unit(), attempt
+            except Exception as e:
+                delay_seconds = self._get_retry_delay(unit_name, e, attempt)
+            self._sleep(delay_seconds)
+            attempt += 1
+
+    async def call_async(
+        self, unit_name: str, unit: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, int]:
+        attempt = 1
+        while True:
+            try:
+                return await unit(), attempt
+            except Exception as e:
+                delay_seconds = self._get_retry_delay(unit_name, e, attempt)
+            await asyncio.sleep(delay_seconds)
+            attempt += 1
+
+    def _get_retry_delay(self, unit_name: str, error: Exception, attempt: int) -> float:
+        if isinstance(error, RetryExhaustedError):
+            raise error
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            raise RetryExhaustedError(unit_name, attempt, error) from error
+
+        delay_seconds = self.get_delay_seconds(attempt)
+        logging.warning(
+            f"Lock conflict copying '{unit_name}' on attempt {attempt}, "
+            f"retrying in {delay_seconds:.3f}s: {error}"
+        )
+        return delay_seconds
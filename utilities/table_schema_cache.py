@@ -0,0 +1,38 @@
+import threading
+from typing import Dict, Optional
+
+from models.table_schema_model import TableSchemaModel
+
+
+class TableSchemaCache:
+    """A thread-safe cache of reflected table schemas, keyed by table name.
+
+    An entry is only returned while its fingerprint still matches the table's,
+    so a change to the table's columns makes it miss and be reflected again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._schemas: Dict[str, TableSchemaModel] = {}
+
+    def get(
+        self, table_name: str, fingerprint: Optional[str]
+    ) -> Optional[TableSchemaModel]:
+        if fingerprint is None:
+            return None
+        with self._lock:
+            table_schema = self._schemas.get(table_name)
+        if table_schema is None or table_schema.fingerprint != fingerprint:
+            return None
+        return table_schema
+
+    def set(self, table_schema: TableSchemaModel) -> None:
+        with self._lock:
+            self._schemas[table_schema.table_name] = table_schema
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        with self._lock:
+            if table_name is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(table_name, None)